@@ -1,10 +1,15 @@
+import asyncio
 import logging
 import tempfile
+import time
 from pathlib import Path
 
-from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 
+from app.core.config import settings
+from app.core.telemetry import record_fallback
 from app.schemas.project import ProjectArtifact
 
 router = APIRouter(tags=["v1"])
@@ -15,6 +20,10 @@ logger = logging.getLogger(__name__)
 class PromptRequest(BaseModel):
     prompt: str
     model: str | None = None
+    # Override GENERATE_HEDGING for this request (unified endpoint only)
+    hedge: bool | None = None
+    # Stream tokens as Server-Sent Events instead of one JSON response
+    stream: bool = False
 
 
 class GenerateResponse(BaseModel):
@@ -23,6 +32,21 @@ class GenerateResponse(BaseModel):
     response: str
     fallback_used: bool = False
     fallback_reason: str | None = None
+    latency_ms: float | None = None
+    hedged: bool = False
+
+
+class BulkIngestRequest(BaseModel):
+    source: str
+    output_path: str | None = None
+    long_document: bool | None = None
+
+
+class BulkIngestResponse(BaseModel):
+    status: str
+    output_path: str
+    documents: int
+    already_done: int
 
 
 # ── Root ─────────────────────────────────────────────────────
@@ -34,32 +58,71 @@ async def root():
 # ── Unified endpoint (Gemini → Azure OpenAI fallback) ───────
 @router.post("/generate", response_model=GenerateResponse)
 async def generate(body: PromptRequest):
-    """Generate content using Gemini first; fall back to Azure OpenAI on failure."""
+    """Generate content using Gemini first; fall back to Azure OpenAI on failure.
+
+    With hedging enabled (``GENERATE_HEDGING`` or ``"hedge": true``), Azure
+    OpenAI is also called once Gemini is slower than its recent latency
+    percentile, and the first good answer wins.
+
+    With ``"stream": true`` tokens are sent as Server-Sent Events (see
+    :func:`_sse_response`); hedging does not apply to streamed requests.
+    """
+    if body.stream:
+        from app.services import azure_openai_service, gemini_service
+        from app.services.hedging import AllProvidersFailed
+
+        try:
+            return await _sse_response(
+                ("gemini", body.model or gemini_service.DEFAULT_MODEL,
+                 lambda: gemini_service.stream_content(body.prompt, model=body.model)),
+                ("azure-openai", body.model or azure_openai_service.DEFAULT_DEPLOYMENT,
+                 lambda: azure_openai_service.stream_chat_completion(body.prompt, deployment=body.model)),
+            )
+        except AllProvidersFailed as exc:
+            raise HTTPException(
+                status_code=502,
+                detail=(
+                    f"Both providers failed. "
+                    f"Gemini: {exc.errors.get('gemini')} | Azure OpenAI: {exc.errors.get('azure-openai')}"
+                ),
+            )
+
+    hedge = settings.GENERATE_HEDGING if body.hedge is None else body.hedge
+    if hedge:
+        return await _generate_hedged(body)
+
+    started = time.perf_counter()
     # --- Try Gemini first ---
     try:
         from app.services.gemini_service import generate_content, DEFAULT_MODEL
+        from app.services.hedging import timed_call
 
-        text = generate_content(body.prompt, model=body.model)
+        # Sampled on failure too, so slow errors raise the hedge delay
+        text = await timed_call("gemini", lambda: generate_content(body.prompt, model=body.model))
+        elapsed = time.perf_counter() - started
         return GenerateResponse(
             source="gemini",
             model=body.model or DEFAULT_MODEL,
             response=text,
+            latency_ms=round(elapsed * 1000, 1),
         )
     except Exception as gemini_exc:
         gemini_error = str(gemini_exc)
         logger.warning("Gemini failed (%s), falling back to Azure OpenAI", gemini_error)
+        record_fallback(body.model or DEFAULT_MODEL, gemini_exc)
 
     # --- Fallback to Azure OpenAI ---
     try:
         from app.services.azure_openai_service import chat_completion, DEFAULT_DEPLOYMENT
 
-        text = chat_completion(body.prompt, deployment=body.model)
+        text = await chat_completion(body.prompt, deployment=body.model)
         return GenerateResponse(
             source="azure-openai",
             model=body.model or DEFAULT_DEPLOYMENT,
             response=text,
             fallback_used=True,
             fallback_reason=f"Gemini unavailable: {gemini_error}",
+            latency_ms=round((time.perf_counter() - started) * 1000, 1),
         )
     except Exception as azure_exc:
         raise HTTPException(
@@ -71,14 +134,132 @@ async def generate(body: PromptRequest):
         )
 
 
+async def _generate_hedged(body: PromptRequest) -> GenerateResponse:
+    """Race Gemini against a delayed Azure OpenAI request; first answer wins."""
+    from app.services import azure_openai_service, gemini_service
+    from app.services.hedging import AllProvidersFailed, hedge_delay, hedged_call
+
+    delay = hedge_delay("gemini")
+    try:
+        outcome = await hedged_call(
+            ("gemini", lambda: gemini_service.generate_content(body.prompt, model=body.model)),
+            ("azure-openai", lambda: azure_openai_service.chat_completion(body.prompt, deployment=body.model)),
+            delay=delay,
+        )
+    except AllProvidersFailed as exc:
+        raise HTTPException(
+            status_code=502,
+            detail=(
+                f"Both providers failed. "
+                f"Gemini: {exc.errors.get('gemini')} | Azure OpenAI: {exc.errors.get('azure-openai')}"
+            ),
+        )
+
+    fallback_used = outcome.source != "gemini"
+    if "gemini" in outcome.errors:
+        record_fallback(body.model or gemini_service.DEFAULT_MODEL, outcome.errors["gemini"])
+        fallback_reason = f"Gemini unavailable: {outcome.errors['gemini']}"
+    elif fallback_used:
+        fallback_reason = f"Gemini slower than hedge delay ({delay:.2f}s)"
+    else:
+        fallback_reason = None
+    default_model = gemini_service.DEFAULT_MODEL if not fallback_used else azure_openai_service.DEFAULT_DEPLOYMENT
+    return GenerateResponse(
+        source=outcome.source,
+        model=body.model or default_model,
+        response=outcome.value,
+        fallback_used=fallback_used,
+        fallback_reason=fallback_reason,
+        latency_ms=round(outcome.latency * 1000, 1),
+        hedged=outcome.hedged,
+    )
+
+
+_PROVIDER_NAMES = {"gemini": "Gemini", "azure-openai": "Azure OpenAI"}
+
+
+async def _sse_response(*candidates) -> StreamingResponse:
+    """Stream the first provider that produces a token, as Server-Sent Events.
+
+    *candidates* are ``(source, model, open_stream)`` tuples tried in order;
+    ``open_stream()`` resolves once the provider's first token has arrived,
+    so the response starts at first-token latency. A provider failing before
+    its first token falls through to the next; if all fail,
+    :class:`~app.services.hedging.AllProvidersFailed` is raised. Events::
+
+        event: meta    {"source", "model", "fallback_used", "fallback_reason", "first_token_ms"}
+        data: {"delta": "..."}          (one per chunk)
+        event: done    {"latency_ms"}
+        event: error   {"detail"}       (provider failed mid-stream)
+    """
+    from app.services.hedging import AllProvidersFailed
+    from app.services.streaming import sse_event
+
+    started = time.perf_counter()
+    errors: dict[str, Exception] = {}
+    models = {source: model for source, model, _ in candidates}
+    for source, model, open_stream in candidates:
+        try:
+            chunks = await open_stream()
+            break
+        except Exception as exc:
+            errors[source] = exc
+            logger.warning("%s stream failed before first token (%s)", source, exc)
+    else:
+        raise AllProvidersFailed(errors)
+    for failed, exc in errors.items():
+        record_fallback(models[failed], exc)
+
+    first_token_ms = round((time.perf_counter() - started) * 1000, 1)
+    fallback_reason = "; ".join(f"{_PROVIDER_NAMES[name]} unavailable: {exc}" for name, exc in errors.items()) or None
+
+    async def _events():
+        yield sse_event(
+            {
+                "source": source,
+                "model": model,
+                "fallback_used": bool(errors),
+                "fallback_reason": fallback_reason,
+                "first_token_ms": first_token_ms,
+            },
+            event="meta",
+        )
+        try:
+            async for chunk in chunks:
+                yield sse_event({"delta": chunk})
+        except Exception as exc:
+            logger.warning("%s stream failed mid-response (%s)", source, exc)
+            yield sse_event({"detail": str(exc)}, event="error")
+            return
+        yield sse_event({"latency_ms": round((time.perf_counter() - started) * 1000, 1)}, event="done")
+
+    return StreamingResponse(
+        _events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 # ── Gemini endpoint (direct) ────────────────────────────────
 @router.post("/generate/gemini", response_model=GenerateResponse)
 async def generate_gemini(body: PromptRequest):
-    """Generate content using Google Gemini."""
+    """Generate content using Google Gemini (streamed with ``"stream": true``)."""
+    if body.stream:
+        from app.services import gemini_service
+        from app.services.hedging import AllProvidersFailed
+
+        try:
+            return await _sse_response(
+                ("gemini", body.model or gemini_service.DEFAULT_MODEL,
+                 lambda: gemini_service.stream_content(body.prompt, model=body.model)),
+            )
+        except AllProvidersFailed as exc:
+            raise HTTPException(status_code=502, detail=f"Gemini error: {exc.errors['gemini']}")
+
     try:
         from app.services.gemini_service import generate_content, DEFAULT_MODEL
 
-        text = generate_content(body.prompt, model=body.model)
+        text = await generate_content(body.prompt, model=body.model)
         return GenerateResponse(
             source="gemini",
             model=body.model or DEFAULT_MODEL,
@@ -91,11 +272,23 @@ async def generate_gemini(body: PromptRequest):
 # ── Azure OpenAI endpoint (direct) ──────────────────────────
 @router.post("/generate/azure-openai", response_model=GenerateResponse)
 async def generate_azure_openai(body: PromptRequest):
-    """Generate content using Azure OpenAI (EPAM DIAL proxy)."""
+    """Generate content using Azure OpenAI (EPAM DIAL proxy; streamed with ``"stream": true``)."""
+    if body.stream:
+        from app.services import azure_openai_service
+        from app.services.hedging import AllProvidersFailed
+
+        try:
+            return await _sse_response(
+                ("azure-openai", body.model or azure_openai_service.DEFAULT_DEPLOYMENT,
+                 lambda: azure_openai_service.stream_chat_completion(body.prompt, deployment=body.model)),
+            )
+        except AllProvidersFailed as exc:
+            raise HTTPException(status_code=502, detail=f"Azure OpenAI error: {exc.errors['azure-openai']}")
+
     try:
         from app.services.azure_openai_service import chat_completion, DEFAULT_DEPLOYMENT
 
-        text = chat_completion(body.prompt, deployment=body.model)
+        text = await chat_completion(body.prompt, deployment=body.model)
         return GenerateResponse(
             source="azure-openai",
             model=body.model or DEFAULT_DEPLOYMENT,
@@ -165,16 +358,16 @@ async def ingest(
         if not pdf.filename or not pdf.filename.lower().endswith(".pdf"):
             raise HTTPException(status_code=422, detail="Uploaded file must be a PDF")
 
-        # Write the upload to a temp file so parse_pdf can read it
+        # Write the upload to a temp file so parse_pdf_async can read it
         try:
-            from app.services.pdf_parser import parse_pdf
+            from app.services.pdf_parser import parse_pdf_async
 
             with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
                 tmp.write(await pdf.read())
                 tmp_path = tmp.name
 
             try:
-                pdf_result = parse_pdf(tmp_path)
+                pdf_result = await parse_pdf_async(tmp_path)
                 # Flatten PDF extraction into a readable summary
                 document_text = (
                     f"Purpose: {pdf_result.get('project_purpose', 'N/A')}\n"
@@ -187,6 +380,7 @@ async def ingest(
                     "potential_risks": pdf_result.get("potential_risks"),
                     "ai_source": pdf_result.get("source"),
                     "fallback_used": pdf_result.get("fallback_used"),
+                    "partial": pdf_result.get("partial", False),
                 }
             finally:
                 Path(tmp_path).unlink(missing_ok=True)
@@ -201,3 +395,78 @@ async def ingest(
         document_text=document_text,
         code_metadata=code_metadata,
     )
+
+
+# ── Bulk ingest endpoint (directory / manifest → NDJSON) ────
+def _bulk_root() -> Path:
+    """The configured ``BULK_INGEST_ROOT``; bulk ingest is refused without one."""
+    if not settings.BULK_INGEST_ROOT:
+        raise HTTPException(status_code=403, detail="Bulk ingest is disabled: BULK_INGEST_ROOT is not configured")
+    return Path(settings.BULK_INGEST_ROOT).resolve()
+
+
+def _resolve_bulk_path(raw: Path | str, root: Path) -> Path:
+    """Resolve *raw* against *root* (``..`` and symlinks included) and require it inside *root*."""
+    path = (root / raw).resolve()
+    if not path.is_relative_to(root):
+        raise HTTPException(status_code=400, detail=f"Path must be inside {root}")
+    return path
+
+
+@router.post("/ingest/bulk", response_model=BulkIngestResponse, status_code=202)
+async def ingest_bulk(body: BulkIngestRequest, background_tasks: BackgroundTasks):
+    """Analyse every PDF in a directory or manifest in the background.
+
+    Refused (403) unless ``BULK_INGEST_ROOT`` is set; the source, every PDF
+    it names and the output file must all resolve inside that root, and
+    relative paths are taken relative to it. A second run for an output
+    file that is still being written is rejected (409).
+
+    Results are appended to an NDJSON file (default: ``bulk_ingest.ndjson``
+    inside the source directory, or next to the manifest). Re-submitting
+    the same source resumes, skipping documents already analysed.
+    """
+    from app.services.bulk_ingest import (
+        BulkIngestBusyError,
+        claim_output,
+        discover_pdfs,
+        load_completed,
+        run_bulk_ingest,
+    )
+
+    root = _bulk_root()
+    source = _resolve_bulk_path(body.source, root)
+    if body.output_path:
+        output_path = body.output_path
+    elif source.is_dir():
+        output_path = source / "bulk_ingest.ndjson"
+    else:
+        output_path = source.with_suffix(".ndjson")
+    output_path = _resolve_bulk_path(output_path, root)
+
+    try:
+        paths = await asyncio.to_thread(discover_pdfs, str(source), root)
+    except FileNotFoundError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=f"Manifest entries must be inside {root}: {exc}")
+
+    already_done = len({str(p) for p in paths} & await asyncio.to_thread(load_completed, str(output_path)))
+    # No await between claiming and scheduling: the reservation passes straight to the run
+    try:
+        claim_output(str(output_path))
+    except BulkIngestBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+    background_tasks.add_task(
+        run_bulk_ingest,
+        paths,
+        str(output_path),
+        long_document=body.long_document,
+        claimed=True,
+    )
+    return BulkIngestResponse(
+        status="Accepted",
+        output_path=str(output_path),
+        documents=len(paths),
+        already_done=already_done,
+    )
@@ -0,0 +1,224 @@
+"""Two-level cache – an in-memory LRU tier backed by an optional on-disk tier.
+
+Values are serialised with a pluggable codec (JSON by default). The disk tier
+stores one file per key under ``<directory>/<name>/<key[:2]>/<key>`` and is
+written atomically, so several worker processes can share a directory. When
+``max_disk_bytes`` is set, the least recently used files are evicted once the
+tier grows past it. Hit / miss counters are available from :meth:`stats`.
+
+With ``encode_memory=True`` the memory tier holds the encoded bytes too, so
+every hit decodes a fresh copy (and compact codecs, such as float32 vectors,
+keep the tier small). From async code use :meth:`TwoLevelCache.aget` /
+:meth:`TwoLevelCache.aset`, which move disk reads, writes and eviction scans
+to a worker thread.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+def make_key(*parts: Any) -> str:
+    """Build a stable SHA-256 cache key from *parts*."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x1f")
+    return digest.hexdigest()
+
+
+def _json_encode(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def _json_decode(data: bytes) -> Any:
+    return json.loads(data)
+
+
+class TwoLevelCache:
+    """LRU memory tier in front of an optional persistent disk tier.
+
+    Parameters
+    ----------
+    name : str
+        Namespace – also the sub-directory used by the disk tier.
+    directory : str
+        Root directory for the disk tier. An empty string disables it.
+    max_items : int
+        Capacity of the memory tier; least-recently-used entries are evicted.
+    encode, decode
+        Codec used for the disk tier (JSON by default).
+    max_disk_bytes : int
+        Size bound for the disk tier (0 = unbounded).
+    encode_memory : bool
+        Keep values encoded in the memory tier as well; hits return a decoded copy.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        directory: str = "",
+        max_items: int = 256,
+        encode: Callable[[Any], bytes] = _json_encode,
+        decode: Callable[[bytes], Any] = _json_decode,
+        max_disk_bytes: int = 0,
+        encode_memory: bool = False,
+    ) -> None:
+        self.name = name
+        self.max_items = max_items
+        self._encode = encode
+        self._decode = decode
+        self._memory: OrderedDict[str, Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self._root = Path(directory) / name if directory else None
+        self.max_disk_bytes = max_disk_bytes
+        self.encode_memory = encode_memory
+        self._disk_bytes: int | None = None  # measured lazily on first write
+        self._counts = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    # ── read ─────────────────────────────────────────────────
+    def get(self, key: str) -> Any | None:
+        """Return the cached value for *key*, or ``None`` on a miss."""
+        value = self._recall(key)
+        if value is not None:
+            return value
+        return self._promote(key, self._read_disk(key))
+
+    async def aget(self, key: str) -> Any | None:
+        """:meth:`get` for the event loop – the disk read runs in a worker thread."""
+        value = self._recall(key)
+        if value is not None:
+            return value
+        disk = await asyncio.to_thread(self._read_disk, key) if self._root is not None else None
+        return self._promote(key, disk)
+
+    def stats(self) -> dict:
+        """Hit / miss counters and tier sizes."""
+        with self._lock:
+            counts = dict(self._counts)
+            counts["memory_items"] = len(self._memory)
+        lookups = counts["memory_hits"] + counts["disk_hits"] + counts["misses"]
+        counts["hit_rate"] = round((lookups - counts["misses"]) / lookups, 3) if lookups else 0.0
+        if self._root is not None:
+            counts["disk_bytes"] = self._disk_bytes
+        return counts
+
+    # ── write ────────────────────────────────────────────────
+    def set(self, key: str, value: Any) -> None:
+        """Store *value* under *key* in both tiers."""
+        self._remember(key, value)
+        self._write_disk(key, value)
+
+    async def aset(self, key: str, value: Any) -> None:
+        """:meth:`set` for the event loop – the disk write and eviction run in a worker thread."""
+        self._remember(key, value)
+        if self._root is not None:
+            await asyncio.to_thread(self._write_disk, key, value)
+
+    def clear(self) -> None:
+        """Drop the memory tier (the disk tier is left untouched)."""
+        with self._lock:
+            self._memory.clear()
+
+    # ── internals ────────────────────────────────────────────
+    def _recall(self, key: str) -> Any | None:
+        with self._lock:
+            if key not in self._memory:
+                return None
+            self._memory.move_to_end(key)
+            self._counts["memory_hits"] += 1
+            stored = self._memory[key]
+        return self._decode(stored) if self.encode_memory else stored
+
+    def _promote(self, key: str, value: Any | None) -> Any | None:
+        with self._lock:
+            self._counts["disk_hits" if value is not None else "misses"] += 1
+        if value is not None:
+            self._remember(key, value)
+        return value
+
+    def _remember(self, key: str, value: Any) -> None:
+        stored = self._encode(value) if self.encode_memory else value
+        with self._lock:
+            self._memory[key] = stored
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_items:
+                self._memory.popitem(last=False)
+
+    def _path(self, key: str) -> Path:
+        return self._root / key[:2] / key
+
+    def _read_disk(self, key: str) -> Any | None:
+        if self._root is None:
+            return None
+        path = self._path(key)
+        try:
+            value = self._decode(path.read_bytes())
+            if self.max_disk_bytes:
+                # Touch so size-bounded eviction drops least recently *used* files
+                os.utime(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as exc:
+            logger.warning("Discarding unreadable %s cache entry %s: %s", self.name, key, exc)
+            self._path(key).unlink(missing_ok=True)
+            return None
+
+    def _write_disk(self, key: str, value: Any) -> None:
+        if self._root is None:
+            return
+        path = self._path(key)
+        data = self._encode(value)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp_name, path)
+        except OSError as exc:
+            logger.warning("Could not persist %s cache entry %s: %s", self.name, key, exc)
+            return
+        if self.max_disk_bytes:
+            self._account_disk(len(data))
+
+    def _disk_entries(self) -> list[Path]:
+        return [p for p in self._root.glob("*/*") if p.is_file() and not p.name.startswith(".tmp-")]
+
+    def _account_disk(self, written: int) -> None:
+        with self._lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = sum(p.stat().st_size for p in self._disk_entries())
+            else:
+                # Approximate (rewrites count twice); re-measured on eviction
+                self._disk_bytes += written
+            if self._disk_bytes <= self.max_disk_bytes:
+                return
+            # Evict least recently used files down to 90 % of the bound
+            entries = []
+            for entry in self._disk_entries():
+                try:
+                    entries.append((entry.stat(), entry))
+                except FileNotFoundError:
+                    continue
+            entries.sort(key=lambda item: item[0].st_mtime)
+            total = sum(stat.st_size for stat, _ in entries)
+            target = int(self.max_disk_bytes * 0.9)
+            for stat, entry in entries:
+                if total <= target:
+                    break
+                entry.unlink(missing_ok=True)
+                total -= stat.st_size
+                self._counts["evictions"] += 1
+            self._disk_bytes = total
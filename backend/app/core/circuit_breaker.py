@@ -0,0 +1,171 @@
+"""Per-provider circuit breakers – skip providers that are known to be failing.
+
+Each provider/deployment pair (e.g. ``"gemini:gemini-3-flash-preview"``) has
+one :class:`CircuitBreaker`, shared by every request in the process:
+
+* **closed** – calls flow; outcomes go into a rolling window of the last
+  ``BREAKER_WINDOW_SIZE`` calls. Once the window holds ``BREAKER_MIN_CALLS``
+  outcomes and either the error rate reaches ``BREAKER_FAILURE_RATE`` or the
+  share of calls slower than ``BREAKER_SLOW_CALL_SECONDS`` reaches
+  ``BREAKER_SLOW_CALL_RATE``, the breaker opens.
+* **open** – calls fail immediately with :class:`CircuitOpenError`, so callers
+  fall back without waiting for a timeout. After ``BREAKER_OPEN_SECONDS`` the
+  breaker moves to half-open.
+* **half-open** – up to ``BREAKER_HALF_OPEN_CALLS`` trial calls are let
+  through. A success closes the breaker; a failure re-opens it. A trial that
+  ends without an outcome (cancelled, e.g. a hedged loser or a timeout)
+  frees its slot for the next caller.
+"""
+
+from __future__ import annotations
+
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from app.core.config import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose breaker is open."""
+
+    def __init__(self, name: str, retry_in: float) -> None:
+        self.name = name
+        self.retry_in = retry_in
+        super().__init__(f"Circuit open for {name} (retry in {retry_in:.1f}s)")
+
+
+class CircuitBreaker:
+    """Closed / open / half-open breaker over a rolling window of call outcomes."""
+
+    def __init__(self, name: str, clock: Callable[[], float] = time.monotonic) -> None:
+        self.name = name
+        self._clock = clock
+        # (succeeded, latency_seconds) for the most recent calls
+        self._window: deque[tuple[bool, float]] = deque(maxlen=settings.BREAKER_WINDOW_SIZE)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials = 0
+        self._lock = threading.Lock()
+
+    # ── State ────────────────────────────────────────────────
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._maybe_half_open()
+            return self._state
+
+    def _maybe_half_open(self) -> None:
+        if self._state == OPEN and self._clock() - self._opened_at >= settings.BREAKER_OPEN_SECONDS:
+            self._state = HALF_OPEN
+            self._trials = 0
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._trials = 0
+
+    def _rates(self) -> tuple[float, float]:
+        if not self._window:
+            return 0.0, 0.0
+        failures = sum(1 for ok, _ in self._window if not ok)
+        slow = sum(1 for _, latency in self._window if latency >= settings.BREAKER_SLOW_CALL_SECONDS)
+        return failures / len(self._window), slow / len(self._window)
+
+    def before_call(self) -> None:
+        """Admit a call or raise :class:`CircuitOpenError`."""
+        with self._lock:
+            self._maybe_half_open()
+            if self._state == OPEN:
+                retry_in = settings.BREAKER_OPEN_SECONDS - (self._clock() - self._opened_at)
+                raise CircuitOpenError(self.name, max(0.0, retry_in))
+            if self._state == HALF_OPEN:
+                if self._trials >= settings.BREAKER_HALF_OPEN_CALLS:
+                    raise CircuitOpenError(self.name, 0.0)
+                self._trials += 1
+
+    def record(self, succeeded: bool, latency: float) -> None:
+        """Record the outcome of an admitted call."""
+        with self._lock:
+            if self._state == HALF_OPEN:
+                if succeeded and latency < settings.BREAKER_SLOW_CALL_SECONDS:
+                    self._state = CLOSED
+                    self._window.clear()
+                else:
+                    self._open()
+                    return
+            self._window.append((succeeded, latency))
+            if self._state == CLOSED and len(self._window) >= settings.BREAKER_MIN_CALLS:
+                error_rate, slow_rate = self._rates()
+                if error_rate >= settings.BREAKER_FAILURE_RATE or slow_rate >= settings.BREAKER_SLOW_CALL_RATE:
+                    self._open()
+
+    def release(self) -> None:
+        """Give back an admitted call's half-open trial slot without recording an outcome."""
+        with self._lock:
+            if self._state == HALF_OPEN and self._trials > 0:
+                self._trials -= 1
+
+    # ── Guarded calls ────────────────────────────────────────
+    async def call_async(self, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Any:
+        """Await *fn* through the breaker."""
+        self.before_call()
+        started = time.perf_counter()
+        try:
+            result = await fn(*args, **kwargs)
+        except Exception:
+            self.record(False, time.perf_counter() - started)
+            raise
+        except BaseException:
+            # Cancelled (or interrupted): not a provider outcome, but the slot must be freed
+            self.release()
+            raise
+        self.record(True, time.perf_counter() - started)
+        return result
+
+    def snapshot(self) -> dict:
+        """Current state and rolling-window statistics (for the health endpoint)."""
+        with self._lock:
+            self._maybe_half_open()
+            error_rate, slow_rate = self._rates()
+            latencies = sorted(latency for _, latency in self._window)
+            p95 = latencies[max(0, math.ceil(0.95 * len(latencies)) - 1)] if latencies else None
+            return {
+                "state": self._state,
+                "calls": len(self._window),
+                "error_rate": round(error_rate, 3),
+                "slow_call_rate": round(slow_rate, 3),
+                "p95_latency_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            }
+
+
+_breakers: dict[str, CircuitBreaker] = {}
+_registry_lock = threading.Lock()
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    """Return the shared breaker for *name* (``"<provider>:<model>"``)."""
+    with _registry_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker(name)
+        return _breakers[name]
+
+
+def breaker_states() -> dict[str, dict]:
+    """Snapshot of every breaker created so far, keyed by name."""
+    with _registry_lock:
+        breakers = list(_breakers.values())
+    return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+
+def reset_breakers() -> None:
+    """Forget all breaker state (tests, manual recovery)."""
+    with _registry_lock:
+        _breakers.clear()
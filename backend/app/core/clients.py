@@ -0,0 +1,129 @@
+"""Shared provider clients – one pooled set of LLM SDK clients per process.
+
+Every service (``ai_engine``, ``azure_openai_service``, ``gemini_service``,
+``pdf_parser``) takes its clients from :func:`get_clients` instead of building
+its own, so TLS connections are established once and kept alive across
+requests and jobs. The registry is opened in the FastAPI ``lifespan`` and
+closed on shutdown; outside the app (scripts, tests) it is created lazily
+on first use. Each SDK client is itself built on first use, so a provider
+whose API key is missing fails only when it is called.
+
+``LLM_PROVIDER_BACKEND=stub`` swaps in the offline
+:class:`~app.core.stub_provider.StubProviderClients` for load testing.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+
+import httpx
+from google import genai
+from google.genai import types as genai_types
+from openai import AsyncAzureOpenAI
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProviderClients:
+    """Async Azure OpenAI and Gemini clients on tuned httpx pools.
+
+    Each provider gets its own ``httpx.AsyncClient`` so connection limits
+    apply per provider, with keep-alive enabled so steady-state calls skip
+    TCP/TLS setup.
+    """
+
+    def __init__(self) -> None:
+        limits = httpx.Limits(
+            max_connections=settings.LLM_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS,
+        )
+        timeout = httpx.Timeout(
+            settings.LLM_TIMEOUT_SECONDS,
+            connect=settings.LLM_CONNECT_TIMEOUT_SECONDS,
+        )
+
+        self._azure_async_http = httpx.AsyncClient(limits=limits, timeout=timeout)
+        self._gemini_async_http = httpx.AsyncClient(limits=limits, timeout=timeout)
+
+        # SDK clients are built on first use, so a provider without an API key
+        # only fails when it is actually called (and the app starts without it)
+        self._sdk_lock = threading.Lock()
+        self._async_azure: AsyncAzureOpenAI | None = None
+        self._gemini: genai.Client | None = None
+
+    def _azure_kwargs(self) -> dict:
+        return {
+            "api_key": settings.AZURE_OPENAI_API_KEY,
+            "api_version": settings.AZURE_OPENAI_API_VERSION,
+            "azure_endpoint": settings.AZURE_OPENAI_ENDPOINT,
+            # Retries are handled by app.core.retry, not the SDK
+            "max_retries": 0,
+        }
+
+    @property
+    def async_azure(self) -> AsyncAzureOpenAI:
+        with self._sdk_lock:
+            if self._async_azure is None:
+                self._async_azure = AsyncAzureOpenAI(**self._azure_kwargs(), http_client=self._azure_async_http)
+            return self._async_azure
+
+    @property
+    def gemini(self) -> genai.Client:
+        with self._sdk_lock:
+            if self._gemini is None:
+                self._gemini = genai.Client(
+                    api_key=settings.GEMINI_API_KEY,
+                    http_options=genai_types.HttpOptions(httpx_async_client=self._gemini_async_http),
+                )
+            return self._gemini
+
+    async def aclose(self) -> None:
+        """Close every pooled connection."""
+        await self._azure_async_http.aclose()
+        await self._gemini_async_http.aclose()
+
+
+_clients: ProviderClients | None = None
+_lock = threading.Lock()
+
+
+def _build_clients() -> ProviderClients:
+    backend = settings.LLM_PROVIDER_BACKEND
+    if backend == "live":
+        return ProviderClients()
+    if backend == "stub":
+        from app.core.stub_provider import StubProviderClients
+
+        logger.warning("LLM_PROVIDER_BACKEND=stub – provider calls are served locally")
+        return StubProviderClients()  # type: ignore[return-value]
+    raise ValueError(f"Unknown LLM_PROVIDER_BACKEND {backend!r} (expected 'live' or 'stub')")
+
+
+def get_clients() -> ProviderClients:
+    """Return the process-wide client registry, creating it on first use."""
+    global _clients
+    with _lock:
+        if _clients is None:
+            _clients = _build_clients()
+        return _clients
+
+
+def open_clients() -> ProviderClients:
+    """Eagerly create the registry (called from the app lifespan)."""
+    clients = get_clients()
+    logger.info("Provider client pools opened")
+    return clients
+
+
+async def close_clients() -> None:
+    """Close the registry; a later :func:`get_clients` builds a fresh one."""
+    global _clients
+    with _lock:
+        clients, _clients = _clients, None
+    if clients is not None:
+        await clients.aclose()
+        logger.info("Provider client pools closed")
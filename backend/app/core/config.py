@@ -33,8 +33,142 @@ class Settings(BaseSettings):
     # ── Google Gemini ────────────────────────────────────────
     GEMINI_API_KEY: str = ""
 
+    # ── Provider backend ─────────────────────────────────────
+    # "live" = Azure OpenAI + Gemini; "stub" = offline deterministic stand-in
+    LLM_PROVIDER_BACKEND: str = "live"
+    # Stub behaviour: log-normal latency (median, spread) and failure rates
+    STUB_LATENCY_SECONDS: float = 0.5
+    STUB_EMBEDDING_LATENCY_SECONDS: float = 0.05
+    STUB_LATENCY_SIGMA: float = 0.4
+    STUB_STREAM_CHUNK_SECONDS: float = 0.02
+    STUB_ERROR_RATE: float = 0.0
+    STUB_RATE_LIMIT_RATE: float = 0.0
+    STUB_SEED: int | None = None
+    STUB_EMBEDDING_DIMENSIONS: int = 1536
+
+    # ── Provider connection pools (shared by all LLM clients) ─
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    LLM_TIMEOUT_SECONDS: float = 60.0
+    LLM_CONNECT_TIMEOUT_SECONDS: float = 10.0
+
+    # Upper bound for one /generate provider call, retries included
+    GENERATE_TIMEOUT_SECONDS: float = 90.0
+
+    # ── /generate hedging ────────────────────────────────────
+    # Send the prompt to the secondary provider too when the primary is slow
+    GENERATE_HEDGING: bool = False
+    # Hedge once the primary exceeds this percentile of its recent latencies
+    GENERATE_HEDGE_PERCENTILE: float = 95.0
+    # Delay used until GENERATE_HEDGE_MIN_SAMPLES latencies have been seen
+    GENERATE_HEDGE_DEFAULT_DELAY_SECONDS: float = 2.0
+    GENERATE_HEDGE_MIN_DELAY_SECONDS: float = 0.25
+    GENERATE_HEDGE_MIN_SAMPLES: int = 20
+    # Recent successful latencies kept per provider
+    GENERATE_LATENCY_WINDOW: int = 200
+
+    # ── Provider circuit breakers (one per provider + deployment) ─
+    # Rolling window of recent calls used to compute error / slow-call rates
+    BREAKER_WINDOW_SIZE: int = 50
+    # No decision is made until the window holds this many calls
+    BREAKER_MIN_CALLS: int = 10
+    BREAKER_FAILURE_RATE: float = 0.5
+    BREAKER_SLOW_CALL_SECONDS: float = 30.0
+    BREAKER_SLOW_CALL_RATE: float = 0.8
+    # How long an open breaker rejects calls before allowing trial calls
+    BREAKER_OPEN_SECONDS: float = 30.0
+    BREAKER_HALF_OPEN_CALLS: int = 1
+
+    # ── Client-side rate limits (per deployment / model) ─────
+    RATE_LIMIT_ENABLED: bool = True
+    # {"<deployment>": {"rpm": requests per minute, "tpm": tokens per minute}} – copy the
+    # quotas of your own Azure deployments / Gemini tier; none are assumed, so nothing is limited by default
+    RATE_LIMITS: dict[str, dict[str, int]] = {}
+    # Limits for deployments not listed above (0 = unlimited)
+    RATE_LIMIT_DEFAULT_RPM: int = 0
+    RATE_LIMIT_DEFAULT_TPM: int = 0
+    # Completion tokens reserved per chat call until the real usage is known
+    RATE_LIMIT_COMPLETION_TOKENS: int = 1000
+
+    # ── Provider telemetry ───────────────────────────────────
+    # USD per million tokens; cached_input defaults to input when omitted
+    MODEL_PRICES: dict[str, dict[str, float]] = {
+        "gpt-4o": {"input": 2.50, "cached_input": 1.25, "output": 10.00},
+        "gpt-4o-mini-2024-07-18": {"input": 0.15, "cached_input": 0.075, "output": 0.60},
+        "text-embedding-3-small-1": {"input": 0.02, "output": 0.0},
+        "gemini-3-flash-preview": {"input": 0.50, "cached_input": 0.05, "output": 3.00},
+    }
+    # Finished jobs whose telemetry is kept for GET /health/telemetry
+    TELEMETRY_RECENT_JOBS: int = 100
+
+    # ── Risk analysis prompt ─────────────────────────────────
+    # Token budget for the project JSON sent to analyze_risk
+    RISK_PAYLOAD_TOKEN_BUDGET: int = 3000
+    # Analyse retrieved policies per framework (EU AI Act, NIST AI RMF, UNESCO,
+    # internal ethics) in concurrent calls and merge the risks
+    RISK_FANOUT_ENABLED: bool = False
+    # Reason similarity (token Jaccard) above which same-category risks merge
+    RISK_DEDUPE_SIMILARITY: float = 0.6
+
+    # ── Request coalescing ───────────────────────────────────
+    # Identical in-flight LLM / embedding calls share one upstream request
+    SINGLE_FLIGHT_ENABLED: bool = True
+
+    # ── Provider retries (app.core.retry) ────────────────────
+    # Attempts per call, including the first
+    RETRY_MAX_ATTEMPTS: int = 3
+    RETRY_BASE_DELAY_SECONDS: float = 0.5
+    RETRY_MAX_DELAY_SECONDS: float = 8.0
+    # A longer Retry-After fails fast so callers can fall back instead
+    RETRY_MAX_RETRY_AFTER_SECONDS: float = 30.0
+    # Retries shared by all provider calls of one assessment / bulk document
+    RETRY_JOB_BUDGET: int = 10
+
+    # ── Embedding batches (AzureAIEngine.get_embeddings) ─────
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_BATCH_MAX_TOKENS: int = 16_000
+    EMBEDDING_BATCH_CONCURRENCY: int = 4
+
+    # ── Embedding cache ──────────────────────────────────────
+    # Disk tier root, shared with the PDF cache (empty = memory tier only)
+    EMBEDDING_CACHE_DIRECTORY: str = "./cache"
+    EMBEDDING_CACHE_MAX_ITEMS: int = 4096
+    EMBEDDING_CACHE_MAX_DISK_MB: int = 256
+
     # ── ChromaDB ─────────────────────────────────────────────
     CHROMA_PERSIST_DIRECTORY: str = "./chroma_data"
+    # "chroma" (persistent ChromaDB) or "numpy" (in-memory exact search)
+    VECTOR_STORE_BACKEND: str = "chroma"
+    # Versioned embeddings.npy + policies.json (behind a CURRENT pointer) for the numpy backend
+    POLICY_INDEX_DIRECTORY: str = "./policy_index"
+
+    # ── PDF parsing ──────────────────────────────────────────
+    # Documents with at least this many pages are extracted in a process pool
+    PDF_PARALLEL_MIN_PAGES: int = 32
+    # Worker processes for parallel extraction (0 = one per CPU core)
+    PDF_EXTRACT_WORKERS: int = 0
+    # A single page taking longer than this is skipped (empty text)
+    PDF_PAGE_TIMEOUT_SECONDS: float = 10.0
+    # Extracted text / analysis cache (empty directory = memory tier only)
+    PDF_CACHE_DIRECTORY: str = "./cache"
+    PDF_CACHE_MAX_ITEMS: int = 128
+    PDF_CACHE_MAX_DISK_MB: int = 512
+    # How text is fitted to the prompt: "head" (first 12 000 chars) or "relevance"
+    # (TF-IDF ranked passages within PDF_PROMPT_TOKEN_BUDGET, opt-in)
+    PDF_PAGE_SELECTION: str = "head"
+    PDF_PROMPT_TOKEN_BUDGET: int = 2500
+    # Long-document mode: analyse the full text in chunks instead of truncating
+    PDF_LONG_DOCUMENT_MODE: bool = False
+    PDF_CHUNK_TOKENS: int = 3000
+    PDF_CHUNK_CONCURRENCY: int = 4
+    PDF_MAX_CHUNKS: int = 32
+
+    # ── Bulk ingestion ───────────────────────────────────────
+    BULK_EXTRACT_CONCURRENCY: int = 4
+    BULK_ANALYSIS_CONCURRENCY: int = 8
+    # /ingest/bulk is refused unless set; it only reads and writes paths under this directory
+    BULK_INGEST_ROOT: str = ""
 
 
 settings = Settings()
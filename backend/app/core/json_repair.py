@@ -0,0 +1,149 @@
+"""Schema-validated parsing of LLM JSON outputs, with local repair.
+
+:func:`parse_llm_json` first validates the raw text directly against a
+Pydantic model (``model_validate_json`` – a single pass in pydantic-core).
+Only when that fails does it try to repair the text locally:
+
+* markdown fences and prose before / after the JSON value are dropped;
+* trailing commas before ``}`` / ``]`` are removed;
+* a truncated value (e.g. the completion hit ``max_tokens`` mid-array) is cut
+  back to its last complete element and its open brackets are closed.
+
+The repaired value is validated again, after an optional ``salvage`` step
+(e.g. dropping incomplete list items). Only if that fails too is
+:class:`LLMOutputError` raised – and the caller falls back or re-requests.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections.abc import Callable
+from typing import TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=BaseModel)
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+# Truncation is at the tail, so the last few cut points are enough
+_MAX_CUT_ATTEMPTS = 16
+
+
+class LLMOutputError(ValueError):
+    """The model output could not be parsed or validated, even after repair."""
+
+
+def strip_fences(raw_text: str) -> str:
+    """Remove a surrounding ```json ... ``` wrapper, if any."""
+    text = raw_text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[-1]
+    if text.endswith("```"):
+        text = text.rsplit("```", 1)[0]
+    return text.strip()
+
+
+def repair_json(text: str) -> str | None:
+    """Return the first JSON object / array in *text*, repaired, or ``None``."""
+    start = min((i for i in (text.find("{"), text.find("[")) if i >= 0), default=-1)
+    if start < 0:
+        return None
+
+    out: list[str] = []
+    stack: list[str] = []
+    # (length of *out*, open brackets) after each comma / opener – places a
+    # truncated value can be cut back to
+    cuts: list[tuple[int, tuple[str, ...]]] = []
+    in_string = escaped = False
+
+    for char in text[start:]:
+        if in_string:
+            out.append(char)
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in _CLOSERS:
+            stack.append(char)
+            out.append(char)
+            cuts.append((len(out), tuple(stack)))
+            continue
+        elif char in "}]":
+            if not stack or _CLOSERS[stack[-1]] != char:
+                return None
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            stack.pop()
+            out.append(char)
+            if not stack:
+                # Complete value – anything after it is prose
+                return "".join(out)
+            continue
+        elif char == ",":
+            cuts.append((len(out), tuple(stack)))
+        out.append(char)
+
+    # Truncated: close an open string, then the open brackets
+    candidates = ["".join(out) + ('"' if in_string else ""), *("".join(out[:n]) for n, _ in reversed(cuts))]
+    stacks = [tuple(stack), *(s for _, s in reversed(cuts))]
+    for body, open_brackets in list(zip(candidates, stacks))[:_MAX_CUT_ATTEMPTS]:
+        body = body.rstrip().rstrip(",")
+        closed = body + "".join(_CLOSERS[b] for b in reversed(open_brackets))
+        try:
+            json.loads(closed)
+        except json.JSONDecodeError:
+            continue
+        return closed
+    return None
+
+
+def _error(exc: ValidationError) -> LLMOutputError:
+    errors = exc.errors()
+    missing = {str(e["loc"][0]) for e in errors if e["type"] == "missing" and len(e["loc"]) == 1}
+    if missing and len(missing) == len(errors):
+        return LLMOutputError(f"Model response missing keys: {missing}")
+    first = errors[0]
+    location = ".".join(str(part) for part in first["loc"]) or "<root>"
+    return LLMOutputError(f"Model response failed validation ({exc.error_count()} errors): {location}: {first['msg']}")
+
+
+def parse_llm_json(
+    raw_text: str,
+    model: type[M],
+    *,
+    salvage: Callable[[object], object] | None = None,
+) -> M:
+    """Parse *raw_text* into *model*, repairing it locally if needed.
+
+    *salvage* receives the decoded, repaired value and may drop or fix parts
+    of it before the second validation.
+    """
+    text = strip_fences(raw_text)
+    try:
+        return model.model_validate_json(text)
+    except ValidationError as exc:
+        first_error = exc
+
+    repaired = repair_json(text)
+    if repaired is None:
+        raise LLMOutputError(f"Model response is not valid JSON: {text[:80]!r}") from first_error
+    data = json.loads(repaired)
+    if salvage is not None:
+        data = salvage(data)
+    try:
+        result = model.model_validate(data)
+    except ValidationError as exc:
+        raise _error(exc) from exc
+    logger.info("Repaired %s output locally (%d chars → %d)", model.__name__, len(text), len(repaired))
+    return result
@@ -0,0 +1,164 @@
+"""Client-side rate limiting – stay inside each deployment's RPM / TPM quota.
+
+Every deployment (``gpt-4o``, ``text-embedding-3-small-1``, the Gemini model,
+…) has one :class:`DeploymentLimiter` holding two token buckets: one for
+requests per minute and one for estimated tokens per minute. Both refill
+continuously, so a caller that arrives when the quota is spent waits just
+long enough for capacity instead of receiving a 429.
+
+Waiters are served first-come-first-served: only the head of the queue
+sleeps for capacity while the others wait behind it, so a large request
+cannot be starved by a stream of small ones. After a call returns,
+:meth:`DeploymentLimiter.settle` corrects the token bucket with the usage the
+provider actually reported.
+
+Limits come from ``RATE_LIMITS`` (``{"<deployment>": {"rpm": …, "tpm": …}}``,
+empty by default – set it from your deployments' quotas); deployments without
+an entry use ``RATE_LIMIT_DEFAULT_RPM`` / ``RATE_LIMIT_DEFAULT_TPM``, where
+``0`` means unlimited.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Any
+
+from app.core.config import settings
+
+
+class _Bucket:
+    """Continuously refilling token bucket (``capacity`` per minute)."""
+
+    def __init__(self, per_minute: int, now: float) -> None:
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.rate = per_minute / 60.0
+        self._updated = now
+
+    def refill(self, now: float) -> None:
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_for(self, amount: float) -> float:
+        """Seconds until *amount* is available (0 if it already is)."""
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+
+class DeploymentLimiter:
+    """Request and token buckets for one deployment, with a FIFO wait queue."""
+
+    def __init__(self, name: str, rpm: int, tpm: int) -> None:
+        self.name = name
+        now = time.monotonic()
+        self._requests = _Bucket(rpm, now) if rpm > 0 else None
+        self._tokens = _Bucket(tpm, now) if tpm > 0 else None
+        self._state_lock = threading.Lock()
+        # Waiters in arrival order; the head's future is resolved when it reaches the front
+        self._queue: deque[asyncio.Future[None]] = deque()
+
+    @property
+    def unlimited(self) -> bool:
+        return self._requests is None and self._tokens is None
+
+    def _try_take(self, tokens: int) -> float:
+        """Take capacity for one request of *tokens*, or return the wait needed."""
+        with self._state_lock:
+            now = time.monotonic()
+            wait = 0.0
+            if self._requests is not None:
+                self._requests.refill(now)
+                wait = max(wait, self._requests.wait_for(1))
+            if self._tokens is not None:
+                self._tokens.refill(now)
+                # A request larger than the whole bucket waits for a full bucket
+                wait = max(wait, self._tokens.wait_for(min(tokens, self._tokens.capacity)))
+            if wait > 0:
+                return wait
+            if self._requests is not None:
+                self._requests.level -= 1
+            if self._tokens is not None:
+                self._tokens.level -= tokens
+            return 0.0
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait (in FIFO order) until one request of *tokens* fits the quota."""
+        if self.unlimited:
+            return
+        turn = asyncio.get_running_loop().create_future()
+        self._queue.append(turn)
+        try:
+            if len(self._queue) > 1:
+                await turn
+            while (wait := self._try_take(tokens)) > 0:
+                await asyncio.sleep(wait)
+        finally:
+            was_head = self._queue[0] is turn
+            self._queue.remove(turn)
+            if was_head and self._queue and not self._queue[0].done():
+                self._queue[0].set_result(None)
+
+    def settle(self, reserved: int, actual: int | None) -> None:
+        """Correct the token bucket once the provider reports real usage."""
+        if self._tokens is None or actual is None:
+            return
+        with self._state_lock:
+            self._tokens.refill(time.monotonic())
+            self._tokens.level = min(self._tokens.capacity, self._tokens.level + reserved - actual)
+
+    def snapshot(self) -> dict:
+        """Configured per-minute limits and the capacity available right now."""
+        with self._state_lock:
+            now = time.monotonic()
+            state: dict[str, Any] = {}
+            for label, bucket in (("requests", self._requests), ("tokens", self._tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                    state[label] = {"per_minute": int(bucket.capacity), "available": int(bucket.level)}
+            return state
+
+
+def usage_tokens(response: Any) -> int | None:
+    """Total tokens reported by an Azure OpenAI or Gemini response, if any."""
+    usage = getattr(response, "usage", None)
+    total = getattr(usage, "total_tokens", None)
+    if isinstance(total, int):
+        return total
+    metadata = getattr(response, "usage_metadata", None)
+    total = getattr(metadata, "total_token_count", None)
+    return total if isinstance(total, int) else None
+
+
+_limiters: dict[str, DeploymentLimiter] = {}
+_registry_lock = threading.Lock()
+
+
+def get_limiter(deployment: str) -> DeploymentLimiter:
+    """Return the shared limiter for *deployment*."""
+    with _registry_lock:
+        if deployment not in _limiters:
+            if settings.RATE_LIMIT_ENABLED:
+                limits = settings.RATE_LIMITS.get(deployment, {})
+            else:
+                limits = {"rpm": 0, "tpm": 0}
+            _limiters[deployment] = DeploymentLimiter(
+                deployment,
+                rpm=int(limits.get("rpm", settings.RATE_LIMIT_DEFAULT_RPM)),
+                tpm=int(limits.get("tpm", settings.RATE_LIMIT_DEFAULT_TPM)),
+            )
+        return _limiters[deployment]
+
+
+def limiter_states() -> dict[str, dict]:
+    """Bucket levels of every limited deployment seen so far, keyed by name."""
+    with _registry_lock:
+        limiters = list(_limiters.values())
+    return {limiter.name: limiter.snapshot() for limiter in limiters if not limiter.unlimited}
+
+
+def reset_limiters() -> None:
+    """Drop every limiter so the next call re-reads the settings (tests)."""
+    with _registry_lock:
+        _limiters.clear()
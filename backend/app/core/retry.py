@@ -0,0 +1,153 @@
+"""Shared retry policy for provider calls – backoff with jitter, Retry-After, budgets.
+
+Every provider call (embeddings, risk analysis, PDF extraction, /generate)
+goes through :func:`retry_call_async` (via
+:func:`app.core.telemetry.tracked_call_async`):
+
+* **Classification** – only transient failures are retried: HTTP 408 / 409 /
+  429 / 5xx, connection errors and timeouts. Client errors (400, 401, 404 …),
+  malformed output and open circuit breakers fail immediately.
+* **Backoff** – "full jitter": attempt *n* sleeps a random time in
+  ``[0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2**n)]`` so
+  concurrent callers do not retry in lock-step.
+* **Retry-After** – a server-provided ``retry-after`` / ``retry-after-ms``
+  header replaces the computed delay. If it asks for longer than
+  ``RETRY_MAX_RETRY_AFTER_SECONDS`` the error is raised at once so callers
+  can fall back to the other provider instead of waiting.
+* **Per-job budget** – inside :func:`retry_budget`, all calls made by one job
+  (including concurrent tasks and worker threads) share a fixed number of
+  retries, which bounds the extra load a failing provider can cause.
+
+The SDK clients are built with ``max_retries=0`` so this is the only retry
+layer.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import contextvars
+import email.utils
+import logging
+import random
+import threading
+import time
+from collections.abc import Awaitable, Callable, Iterator
+from typing import TypeVar
+
+import httpx
+import openai
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+RETRYABLE_STATUS = frozenset({408, 409, 429, 500, 502, 503, 504})
+
+
+# ── Per-job retry budget ─────────────────────────────────────
+class RetryBudget:
+    """A pool of retries shared by every provider call of one job."""
+
+    def __init__(self, retries: int) -> None:
+        self.remaining = retries
+        self.used = 0
+        self._lock = threading.Lock()
+
+    def take(self) -> bool:
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            self.used += 1
+            return True
+
+
+_budget: contextvars.ContextVar[RetryBudget | None] = contextvars.ContextVar("retry_budget", default=None)
+
+
+@contextlib.contextmanager
+def retry_budget(retries: int | None = None) -> Iterator[RetryBudget]:
+    """Share *retries* (default ``RETRY_JOB_BUDGET``) across the calls made inside."""
+    budget = RetryBudget(settings.RETRY_JOB_BUDGET if retries is None else retries)
+    token = _budget.set(budget)
+    try:
+        yield budget
+    finally:
+        _budget.reset(token)
+
+
+# ── Classification ───────────────────────────────────────────
+def _status_code(exc: BaseException) -> int | None:
+    for attr in ("status_code", "code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """True for transient provider failures worth retrying."""
+    if isinstance(exc, (openai.APIConnectionError, httpx.TransportError, TimeoutError, ConnectionError)):
+        return True
+    status = _status_code(exc)
+    return status in RETRYABLE_STATUS if status is not None else False
+
+
+def retry_after(exc: BaseException) -> float | None:
+    """Seconds requested by the server's ``Retry-After`` headers, if any."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if (ms := headers.get("retry-after-ms")) is not None:
+            return float(ms) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            parsed = email.utils.parsedate_to_datetime(value)
+            return max(0.0, parsed.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    """Full-jitter exponential delay before retry number *attempt* (0-based)."""
+    ceiling = min(settings.RETRY_MAX_DELAY_SECONDS, settings.RETRY_BASE_DELAY_SECONDS * 2**attempt)
+    return random.uniform(0, ceiling)
+
+
+def _next_delay(exc: BaseException, attempt: int) -> float | None:
+    """Delay before retrying after *exc*, or ``None`` to give up."""
+    if attempt + 1 >= settings.RETRY_MAX_ATTEMPTS or not is_retryable(exc):
+        return None
+    requested = retry_after(exc)
+    if requested is not None and requested > settings.RETRY_MAX_RETRY_AFTER_SECONDS:
+        return None
+    budget = _budget.get()
+    if budget is not None and not budget.take():
+        logger.warning("Retry budget exhausted; not retrying %s", exc)
+        return None
+    return requested if requested is not None else backoff_delay(attempt)
+
+
+# ── Runners ──────────────────────────────────────────────────
+async def retry_call_async(fn: Callable[[], Awaitable[T]], *, label: str = "provider call") -> T:
+    """Await ``fn()`` under the retry policy."""
+    attempt = 0
+    while True:
+        try:
+            return await fn()
+        except Exception as exc:
+            delay = _next_delay(exc, attempt)
+            if delay is None:
+                raise
+            logger.info("Retrying %s in %.2fs after %s", label, delay, exc)
+            await asyncio.sleep(delay)
+            attempt += 1
+
@@ -0,0 +1,82 @@
+"""Single-flight request coalescing – one upstream call per identical request.
+
+While a call for a key is in flight, further callers with the same key wait
+for it instead of issuing their own, and all receive the same outcome (the
+result, or the exception). Nothing is remembered once the call finishes, so
+results are never stale – this complements caching rather than replacing it.
+
+Keys should cover everything that affects the answer: model / deployment,
+parameters and content (build them with :func:`app.core.cache.make_key`).
+Followers get a deep copy of the result so callers can mutate it freely.
+
+A caller being cancelled does not cancel the shared call while other callers
+still wait for it; when the last waiter for a key leaves, the shared call is
+cancelled too, so abandoned requests do not keep spending upstream quota.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+import threading
+import weakref
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+class _AsyncCall:
+    def __init__(self, task: asyncio.Task) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent identical coroutine calls."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        # asyncio tasks are loop-bound; keep one in-flight table per loop
+        self._async_calls: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, dict[str, _AsyncCall]] = (
+            weakref.WeakKeyDictionary()
+        )
+        self.coalesced = 0
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Await ``fn()`` – or the identical call already in flight for *key*."""
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await fn()
+
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            calls = self._async_calls.setdefault(loop, {})
+            call = calls.get(key)
+            leader = call is None
+            if leader:
+                call = calls[key] = _AsyncCall(loop.create_task(fn()))
+                call.task.add_done_callback(lambda _t, c=call: self._forget(calls, key, c))
+            else:
+                self.coalesced += 1
+            call.waiters += 1
+
+        try:
+            # Shield so one caller being cancelled does not cancel the shared call
+            result = await asyncio.shield(call.task)
+        finally:
+            with self._lock:
+                call.waiters -= 1
+                abandoned = call.waiters == 0 and not call.task.done()
+                if abandoned:
+                    self._forget(calls, key, call)
+            if abandoned:
+                call.task.cancel()
+        return result if leader else copy.deepcopy(result)
+
+    def _forget(self, calls: dict[str, _AsyncCall], key: str, call: _AsyncCall) -> None:
+        # Only drop our own entry – a cancelled call may already have been replaced
+        if calls.get(key) is call:
+            del calls[key]
@@ -0,0 +1,346 @@
+"""Deterministic stub provider – offline stand-in for Azure OpenAI and Gemini.
+
+With ``LLM_PROVIDER_BACKEND=stub`` the client registry
+(:func:`app.core.clients.get_clients`) returns :class:`StubProviderClients`
+instead of the real SDK clients. The stubs expose the subset of the SDK
+surface the services use, so ``AzureAIEngine``, ``chat_completion``,
+``generate_content``, the streaming variants and the PDF extractors run
+unchanged. Rate limiting, circuit breakers, retries, caching and
+coalescing all still apply, so load tests measure the pipeline's own
+overhead without spending provider quota.
+
+* **Embeddings** – feature-hashed bag of words, L2-normalised, with
+  ``STUB_EMBEDDING_DIMENSIONS`` dimensions. Identical texts always map to the
+  same vector, and texts that share words are close.
+* **Completions** – schema-valid JSON for the risk-analysis and PDF-extraction
+  prompts (recognised by their output keys), deterministic filler text
+  otherwise. Answers depend only on the prompt.
+* **Behaviour** – log-normal latency (median ``STUB_LATENCY_SECONDS`` or
+  ``STUB_EMBEDDING_LATENCY_SECONDS``, spread ``STUB_LATENCY_SIGMA``), plus
+  ``STUB_ERROR_RATE`` 503s and ``STUB_RATE_LIMIT_RATE`` 429s raised as the
+  real SDK exception types. ``STUB_SEED`` makes the draws reproducible.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections.abc import AsyncIterator
+from typing import Any
+
+import httpx
+import openai
+from google.genai import errors as genai_errors
+from google.genai import types as genai_types
+from openai.types import CreateEmbeddingResponse
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from app.core.config import settings
+from app.core.tokens import estimate_tokens
+
+_DOCUMENT_MARKER = "--- DOCUMENT TEXT ---"
+_WORD = re.compile(r"\w+")
+
+_FILLER = (
+    "the model reviews project context and policy guidance to summarise data flows "
+    "controls risks owners evidence deployment monitoring oversight fairness "
+    "transparency security retention consent accuracy robustness documentation"
+).split()
+
+_RISKS = (
+    ("Data Privacy", "Personal data is processed without a documented lawful basis (EU AI Act Art. 10)."),
+    ("Security", "Credentials or secrets appear in the repository (NIST AI RMF MANAGE 2.7)."),
+    ("Human Oversight", "Automated decisions lack a documented human review step (EU AI Act Art. 14)."),
+    ("Bias", "Training data representativeness is not assessed (NIST AI RMF MEASURE 2.11)."),
+    ("Accountability", "No owner is named for model outcomes (UNESCO Recommendation, Principle 6)."),
+    ("High-Risk System", "The use case falls under Annex III without a conformity assessment (EU AI Act)."),
+)
+_SEVERITIES = ("low", "medium", "high")
+
+_DATA_TYPES = {
+    "pii": ("personal", "name", "address", "email", "pii"),
+    "biometric_data": ("biometric", "face", "fingerprint", "voice"),
+    "health_records": ("health", "medical", "patient", "clinical"),
+    "financial_data": ("financial", "payment", "card", "bank", "transaction"),
+}
+_DEPLOYMENTS = (
+    ("public_cloud", ("aws", "azure", "gcp", "public cloud")),
+    ("on_premise", ("on-premise", "on premise", "on-prem")),
+    ("private_cloud", ("private cloud",)),
+)
+
+
+def _digest(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode(), digest_size=8).digest(), "big")
+
+
+# ── Deterministic content ────────────────────────────────────
+def stub_embedding(text: str, dimensions: int | None = None) -> list[float]:
+    """Feature-hashed, L2-normalised embedding of *text*."""
+    dimensions = dimensions or settings.STUB_EMBEDDING_DIMENSIONS
+    vector = [0.0] * dimensions
+    for word in _WORD.findall(text.lower()) or [text]:
+        h = _digest(word)
+        vector[h % dimensions] += 1.0 if (h >> 32) & 1 else -1.0
+    norm = math.sqrt(sum(v * v for v in vector)) or 1.0
+    return [v / norm for v in vector]
+
+
+def _risk_answer(prompt: str) -> dict:
+    rng = random.Random(_digest(prompt))
+    chosen = rng.sample(_RISKS, k=rng.randint(1, 3))
+    return {
+        "risks": [
+            {"category": category, "severity": rng.choice(_SEVERITIES), "reason": reason}
+            for category, reason in chosen
+        ]
+    }
+
+
+def _extraction_answer(prompt: str) -> dict:
+    document = prompt.split(_DOCUMENT_MARKER, 1)[-1].strip()
+    lowered = document.lower()
+    first_sentence = re.split(r"(?<=[.!?])\s", document, maxsplit=1)[0][:200]
+    data_types = [label for label, words in _DATA_TYPES.items() if any(w in lowered for w in words)]
+    deployment = next((target for target, words in _DEPLOYMENTS if any(w in lowered for w in words)), "unknown")
+    return {
+        "project_purpose": first_sentence or "Not specified",
+        "data_types_used": data_types,
+        "potential_risks": [f"Processing of {label.replace('_', ' ')}" for label in data_types],
+        "human_in_the_loop": any(
+            w in lowered for w in ("human review", "human oversight", "human-in-the-loop", "manual approval")
+        ),
+        "deployment_target": deployment,
+    }
+
+
+def _text_answer(prompt: str) -> str:
+    rng = random.Random(_digest(prompt))
+    words = [rng.choice(_FILLER) for _ in range(60)]
+    return "Stub reply: " + " ".join(words).capitalize() + "."
+
+
+def stub_answer(prompt: str) -> str:
+    """Deterministic reply to *prompt*: JSON for known schemas, text otherwise."""
+    if '"project_purpose"' in prompt:
+        return json.dumps(_extraction_answer(prompt))
+    if '"risks"' in prompt:
+        return json.dumps(_risk_answer(prompt))
+    return _text_answer(prompt)
+
+
+def _chunks(text: str, words_per_chunk: int = 4) -> list[str]:
+    words = text.split(" ")
+    return [
+        " ".join(words[i : i + words_per_chunk]) + (" " if i + words_per_chunk < len(words) else "")
+        for i in range(0, len(words), words_per_chunk)
+    ]
+
+
+# ── Latency and failures ─────────────────────────────────────
+class _Behaviour:
+    """Latency / error draws, reproducible when ``STUB_SEED`` is set."""
+
+    def __init__(self) -> None:
+        self._rng = random.Random(settings.STUB_SEED)
+        self._lock = threading.Lock()
+
+    def draw(self, provider: str, embedding: bool = False) -> tuple[float, Exception | None]:
+        median = settings.STUB_EMBEDDING_LATENCY_SECONDS if embedding else settings.STUB_LATENCY_SECONDS
+        with self._lock:
+            delay = median * self._rng.lognormvariate(0.0, settings.STUB_LATENCY_SIGMA) if median > 0 else 0.0
+            roll = self._rng.random()
+        if roll < settings.STUB_RATE_LIMIT_RATE:
+            return delay, _error(provider, 429)
+        if roll < settings.STUB_RATE_LIMIT_RATE + settings.STUB_ERROR_RATE:
+            return delay, _error(provider, 503)
+        return delay, None
+
+
+def _error(provider: str, status: int) -> Exception:
+    message = "stub: rate limit exceeded" if status == 429 else "stub: service unavailable"
+    if provider == "gemini":
+        body = {"error": {"code": status, "message": message}}
+        return (genai_errors.ClientError if status < 500 else genai_errors.ServerError)(status, body)
+    response = httpx.Response(
+        status,
+        headers={"retry-after": "1"} if status == 429 else None,
+        request=httpx.Request("POST", "https://stub.invalid/openai"),
+    )
+    error_cls = openai.RateLimitError if status == 429 else openai.InternalServerError
+    return error_cls(message, response=response, body=None)
+
+
+# ── Response builders ────────────────────────────────────────
+def _prompt_text(messages: list[dict]) -> str:
+    return "\n".join(str(m.get("content", "")) for m in messages)
+
+
+def _contents_text(contents: Any) -> str:
+    if isinstance(contents, str):
+        return contents
+    return "\n".join(str(part) for part in contents)
+
+
+def _chat_completion(model: str, prompt: str) -> ChatCompletion:
+    answer = stub_answer(prompt)
+    prompt_tokens, completion_tokens = estimate_tokens(prompt), estimate_tokens(answer)
+    return ChatCompletion(
+        id=f"stub-{_digest(prompt):x}",
+        object="chat.completion",
+        created=int(time.time()),
+        model=model,
+        choices=[{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": answer}}],
+        usage={
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "prompt_tokens_details": {"cached_tokens": 0},
+        },
+    )
+
+
+def _chat_chunk(model: str, prompt: str, text: str) -> ChatCompletionChunk:
+    return ChatCompletionChunk(
+        id=f"stub-{_digest(prompt):x}",
+        object="chat.completion.chunk",
+        created=int(time.time()),
+        model=model,
+        choices=[{"index": 0, "delta": {"content": text}}],
+    )
+
+
+def _embedding_response(model: str, input: str | list[str]) -> CreateEmbeddingResponse:
+    texts = [input] if isinstance(input, str) else list(input)
+    tokens = sum(estimate_tokens(t) for t in texts)
+    return CreateEmbeddingResponse(
+        object="list",
+        model=model,
+        data=[{"object": "embedding", "index": i, "embedding": stub_embedding(t)} for i, t in enumerate(texts)],
+        usage={"prompt_tokens": tokens, "total_tokens": tokens},
+    )
+
+
+def _gemini_response(text: str, prompt: str) -> genai_types.GenerateContentResponse:
+    prompt_tokens, answer_tokens = estimate_tokens(prompt), estimate_tokens(text)
+    return genai_types.GenerateContentResponse(
+        candidates=[
+            genai_types.Candidate(content=genai_types.Content(role="model", parts=[genai_types.Part(text=text)]))
+        ],
+        usage_metadata=genai_types.GenerateContentResponseUsageMetadata(
+            prompt_token_count=prompt_tokens,
+            candidates_token_count=answer_tokens,
+            total_token_count=prompt_tokens + answer_tokens,
+        ),
+    )
+
+
+# ── Azure OpenAI surface ─────────────────────────────────────
+class _AsyncChatCompletions:
+    def __init__(self, behaviour: _Behaviour) -> None:
+        self._behaviour = behaviour
+
+    async def create(self, *, model: str, messages: list[dict], stream: bool = False, **_: Any):
+        delay, error = self._behaviour.draw("azure-openai")
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        prompt = _prompt_text(messages)
+        if not stream:
+            return _chat_completion(model, prompt)
+
+        async def _stream() -> AsyncIterator[ChatCompletionChunk]:
+            for i, text in enumerate(_chunks(stub_answer(prompt))):
+                if i:
+                    await asyncio.sleep(settings.STUB_STREAM_CHUNK_SECONDS)
+                yield _chat_chunk(model, prompt, text)
+
+        return _stream()
+
+
+class _AsyncEmbeddings:
+    def __init__(self, behaviour: _Behaviour) -> None:
+        self._behaviour = behaviour
+
+    async def create(self, *, model: str, input: str | list[str], **_: Any) -> CreateEmbeddingResponse:
+        delay, error = self._behaviour.draw("azure-openai", embedding=True)
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return _embedding_response(model, input)
+
+
+class _Chat:
+    def __init__(self, completions: Any) -> None:
+        self.completions = completions
+
+
+class StubAzureOpenAI:
+    """Stands in for ``AsyncAzureOpenAI``."""
+
+    def __init__(self, behaviour: _Behaviour) -> None:
+        self.chat = _Chat(_AsyncChatCompletions(behaviour))
+        self.embeddings = _AsyncEmbeddings(behaviour)
+
+
+# ── Gemini surface ───────────────────────────────────────────
+class _AsyncGeminiModels:
+    def __init__(self, behaviour: _Behaviour) -> None:
+        self._behaviour = behaviour
+
+    async def generate_content(self, *, model: str, contents: Any, **_: Any) -> genai_types.GenerateContentResponse:
+        delay, error = self._behaviour.draw("gemini")
+        await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        prompt = _contents_text(contents)
+        return _gemini_response(stub_answer(prompt), prompt)
+
+    async def generate_content_stream(
+        self, *, model: str, contents: Any, **_: Any
+    ) -> AsyncIterator[genai_types.GenerateContentResponse]:
+        delay, error = self._behaviour.draw("gemini")
+        prompt = _contents_text(contents)
+
+        # Like the SDK, the request is made when iteration starts
+        async def _stream() -> AsyncIterator[genai_types.GenerateContentResponse]:
+            await asyncio.sleep(delay)
+            if error is not None:
+                raise error
+            for i, text in enumerate(_chunks(stub_answer(prompt))):
+                if i:
+                    await asyncio.sleep(settings.STUB_STREAM_CHUNK_SECONDS)
+                yield _gemini_response(text, prompt)
+
+        return _stream()
+
+
+class _GeminiAio:
+    def __init__(self, behaviour: _Behaviour) -> None:
+        self.models = _AsyncGeminiModels(behaviour)
+
+
+class StubGeminiClient:
+    """Stands in for ``genai.Client`` (``aio.models``)."""
+
+    def __init__(self, behaviour: _Behaviour) -> None:
+        self.aio = _GeminiAio(behaviour)
+
+
+# ── Registry ─────────────────────────────────────────────────
+class StubProviderClients:
+    """Drop-in for :class:`app.core.clients.ProviderClients` with no network."""
+
+    def __init__(self) -> None:
+        behaviour = _Behaviour()
+        self.async_azure = StubAzureOpenAI(behaviour)
+        self.gemini = StubGeminiClient(behaviour)
+
+    async def aclose(self) -> None:
+        """Nothing to release – kept for interface parity."""
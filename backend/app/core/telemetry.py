@@ -0,0 +1,264 @@
+"""Provider call telemetry – latency, tokens, retries, fallbacks and cost.
+
+Every provider call goes through :func:`tracked_call_async`, which runs it
+under the shared retry policy (:mod:`app.core.retry`) and records:
+
+* latency of the whole call, retries included (time to first token for streams);
+* prompt, completion and cached prompt tokens, as reported by the provider;
+* retries and whether the call finally failed;
+* estimated cost from ``MODEL_PRICES`` (USD per million tokens).
+
+Fallbacks between providers are recorded with :func:`record_fallback`, and
+items discarded from a model's output while salvaging it with
+:func:`record_dropped_items`.
+
+Records are aggregated per model in a process-wide :class:`Telemetry`, and in
+the current job's :class:`Telemetry` when the call runs inside
+:func:`job_telemetry`. Job scope follows the context, like
+:func:`app.core.retry.retry_budget`. Finished jobs are kept in a short
+in-memory history (``TELEMETRY_RECENT_JOBS``).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Iterator
+from typing import Any, TypeVar
+
+from app.core.config import settings
+from app.core.retry import retry_call_async
+
+T = TypeVar("T")
+
+
+def usage_breakdown(response: Any) -> tuple[int, int, int]:
+    """``(prompt, completion, cached)`` tokens reported by an Azure OpenAI or Gemini response."""
+    usage = getattr(response, "usage", None)
+    if usage is not None:
+        details = getattr(usage, "prompt_tokens_details", None)
+        return (
+            _int(getattr(usage, "prompt_tokens", 0)),
+            _int(getattr(usage, "completion_tokens", 0)),
+            _int(getattr(details, "cached_tokens", 0)),
+        )
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is not None:
+        return (
+            _int(getattr(metadata, "prompt_token_count", 0)),
+            _int(getattr(metadata, "candidates_token_count", 0)),
+            _int(getattr(metadata, "cached_content_token_count", 0)),
+        )
+    return 0, 0, 0
+
+
+def _int(value: Any) -> int:
+    return value if isinstance(value, int) else 0
+
+
+def estimate_cost(model: str, prompt: int, completion: int, cached: int) -> float | None:
+    """Estimated USD cost of one call, or ``None`` when *model* has no price."""
+    price = settings.MODEL_PRICES.get(model)
+    if price is None:
+        return None
+    input_price = price.get("input", 0.0)
+    cached_price = price.get("cached_input", input_price)
+    return (
+        (prompt - cached) * input_price + cached * cached_price + completion * price.get("output", 0.0)
+    ) / 1_000_000
+
+
+# ── Aggregation ──────────────────────────────────────────────
+class _ModelStats:
+    def __init__(self) -> None:
+        self.calls = 0
+        self.errors = 0
+        self.retries = 0
+        self.fallbacks = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cached_tokens = 0
+        self.cost_usd = 0.0
+        self.unpriced_calls = 0
+        self.fallback_reasons: dict[str, int] = {}
+        self.dropped_items = 0
+
+    def snapshot(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "retries": self.retries,
+            "fallbacks": self.fallbacks,
+            "fallback_reasons": dict(self.fallback_reasons),
+            "dropped_items": self.dropped_items,
+            "latency_ms_avg": round(self.latency_total / self.calls * 1000, 1) if self.calls else None,
+            "latency_ms_max": round(self.latency_max * 1000, 1),
+            "latency_ms_total": round(self.latency_total * 1000, 1),
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "cached_tokens": self.cached_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "unpriced_calls": self.unpriced_calls,
+        }
+
+
+class Telemetry:
+    """Per-model aggregates of provider calls (thread-safe)."""
+
+    def __init__(self) -> None:
+        self._models: dict[str, _ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats(self, model: str) -> _ModelStats:
+        if model not in self._models:
+            self._models[model] = _ModelStats()
+        return self._models[model]
+
+    def record_call(
+        self,
+        model: str,
+        latency: float,
+        *,
+        retries: int = 0,
+        failed: bool = False,
+        usage: tuple[int, int, int] = (0, 0, 0),
+    ) -> None:
+        prompt, completion, cached = usage
+        cost = estimate_cost(model, prompt, completion, cached)
+        with self._lock:
+            stats = self._stats(model)
+            stats.calls += 1
+            stats.errors += failed
+            stats.retries += retries
+            stats.latency_total += latency
+            stats.latency_max = max(stats.latency_max, latency)
+            stats.prompt_tokens += prompt
+            stats.completion_tokens += completion
+            stats.cached_tokens += cached
+            if cost is None:
+                stats.unpriced_calls += 1
+            else:
+                stats.cost_usd += cost
+
+    def record_fallback(self, model: str, error: BaseException) -> None:
+        # Bucket by error type, e.g. RateLimitError, CircuitOpenError, APITimeoutError
+        bucket = type(error).__name__
+        with self._lock:
+            stats = self._stats(model)
+            stats.fallbacks += 1
+            stats.fallback_reasons[bucket] = stats.fallback_reasons.get(bucket, 0) + 1
+
+    def record_dropped_items(self, model: str, count: int) -> None:
+        with self._lock:
+            self._stats(model).dropped_items += count
+
+    def snapshot(self) -> dict:
+        """``{"models": {model: stats}, "totals": {...}}``."""
+        with self._lock:
+            models = {name: stats.snapshot() for name, stats in sorted(self._models.items())}
+        summed = (
+            "calls", "errors", "retries", "fallbacks", "dropped_items",
+            "prompt_tokens", "completion_tokens", "cached_tokens", "latency_ms_total",
+        )
+        totals = {key: sum(m[key] for m in models.values()) for key in summed}
+        totals["latency_ms_total"] = round(totals["latency_ms_total"], 1)
+        totals["cost_usd"] = round(sum(m["cost_usd"] for m in models.values()), 6)
+        return {"models": models, "totals": totals}
+
+
+_global = Telemetry()
+_job: contextvars.ContextVar[Telemetry | None] = contextvars.ContextVar("job_telemetry", default=None)
+_recent_jobs: OrderedDict[str, dict] = OrderedDict()
+_recent_lock = threading.Lock()
+
+
+def _sinks() -> list[Telemetry]:
+    job = _job.get()
+    return [_global] if job is None else [_global, job]
+
+
+@contextlib.contextmanager
+def job_telemetry(job_id: str) -> Iterator[Telemetry]:
+    """Aggregate the provider calls made inside into a per-job :class:`Telemetry`."""
+    telemetry = Telemetry()
+    token = _job.set(telemetry)
+    try:
+        yield telemetry
+    finally:
+        _job.reset(token)
+        with _recent_lock:
+            _recent_jobs[job_id] = telemetry.snapshot()
+            while len(_recent_jobs) > settings.TELEMETRY_RECENT_JOBS:
+                _recent_jobs.popitem(last=False)
+
+
+def record_fallback(model: str, error: BaseException) -> None:
+    """Record that *model* failed with *error* and the caller fell back to another provider."""
+    for sink in _sinks():
+        sink.record_fallback(model, error)
+
+
+def record_dropped_items(model: str, count: int) -> None:
+    """Record that *count* invalid items were discarded from *model*'s output."""
+    for sink in _sinks():
+        sink.record_dropped_items(model, count)
+
+
+def current_job_snapshot() -> dict | None:
+    """Telemetry of the job running in the current context so far."""
+    job = _job.get()
+    return job.snapshot() if job is not None else None
+
+
+def telemetry_snapshot() -> dict:
+    """Process-wide per-model aggregates plus totals of recent jobs."""
+    snapshot = _global.snapshot()
+    with _recent_lock:
+        snapshot["recent_jobs"] = {job_id: job["totals"] for job_id, job in reversed(_recent_jobs.items())}
+    return snapshot
+
+
+def job_snapshot(job_id: str) -> dict | None:
+    """Full per-model telemetry of a recent job, if still held in memory."""
+    with _recent_lock:
+        return _recent_jobs.get(job_id)
+
+
+def reset_telemetry() -> None:
+    """Drop all aggregates (for tests)."""
+    global _global
+    _global = Telemetry()
+    with _recent_lock:
+        _recent_jobs.clear()
+
+
+# ── Instrumented calls ───────────────────────────────────────
+def _record(model: str, started: float, attempts: int, response: Any = None, failed: bool = False) -> None:
+    latency = time.perf_counter() - started
+    usage = usage_breakdown(response) if response is not None else (0, 0, 0)
+    for sink in _sinks():
+        sink.record_call(model, latency, retries=max(0, attempts - 1), failed=failed, usage=usage)
+
+
+async def tracked_call_async(model: str, attempt: Callable[[], Awaitable[T]]) -> T:
+    """Await ``attempt()`` under the retry policy and record it against *model*."""
+    attempts = 0
+
+    async def _counted() -> T:
+        nonlocal attempts
+        attempts += 1
+        return await attempt()
+
+    started = time.perf_counter()
+    try:
+        response = await retry_call_async(_counted, label=model)
+    except Exception:
+        _record(model, started, attempts, failed=True)
+        raise
+    _record(model, started, attempts, response)
+    return response
@@ -0,0 +1,22 @@
+"""Local token estimation – cheap, dependency-free budgeting for LLM prompts.
+
+The estimate assumes ~4 characters per token, which is close to the
+cl100k/o200k tokenisers for English prose and JSON. It is deliberately
+conservative (rounds up) because it is used to stay *under* provider limits.
+"""
+
+from __future__ import annotations
+
+import math
+
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """Return an upper-leaning estimate of the number of tokens in *text*."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def tokens_to_chars(tokens: int) -> int:
+    """Return the approximate number of characters that fit in *tokens*."""
+    return tokens * CHARS_PER_TOKEN
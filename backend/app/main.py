@@ -16,6 +16,7 @@ from pydantic import BaseModel
 from sqlmodel import Session
 
 from app.api.routes import router as api_router
+from app.core.clients import close_clients, open_clients
 from app.core.config import settings
 from app.core.db import AssessmentJob, create_db_and_tables, engine
 
@@ -64,11 +65,23 @@ def _start_opa_server() -> subprocess.Popen | None:
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Startup: create DB tables, start OPA. Shutdown: stop OPA."""
+    """Startup: create DB tables, open provider clients and the policy store, start OPA.
+
+    Shutdown: stop OPA, close provider clients, the policy store and the PDF
+    extraction pool.
+    """
+    from app.services.pdf_extraction import shutdown_pool
+    from app.services.vector_store import close_policy_store, open_policy_store
+
     create_db_and_tables()
+    open_clients()
+    open_policy_store()
 
     opa_proc = _start_opa_server()
     yield
+    await close_clients()
+    close_policy_store()
+    shutdown_pool()
     # Shutdown: stop OPA if we started it
     if opa_proc and opa_proc.poll() is None:
         logger.info("Stopping OPA server (PID %d)", opa_proc.pid)
@@ -103,6 +116,65 @@ async def health_check():
     return {"status": "ok"}
 
 
+@app.get("/health/ready", tags=["health"])
+async def readiness_check():
+    """Readiness probe: 503 until the policy vector store is open and warm."""
+    from app.services.vector_store import policy_store_status
+
+    store = policy_store_status()
+    return JSONResponse(
+        status_code=200 if store["ready"] else 503,
+        content={"status": "ready" if store["ready"] else "not_ready", "policy_store": store},
+    )
+
+
+@app.get("/health/providers", tags=["health"])
+async def provider_health():
+    """Circuit-breaker state and rate-limit headroom per LLM provider / deployment."""
+    from app.core.circuit_breaker import OPEN, breaker_states
+    from app.core.rate_limiter import limiter_states
+
+    providers = breaker_states()
+    degraded = any(p["state"] == OPEN for p in providers.values())
+    return {
+        "status": "degraded" if degraded else "ok",
+        "providers": providers,
+        "rate_limits": limiter_states(),
+    }
+
+
+@app.get("/health/caches", tags=["health"])
+async def cache_health():
+    """Hit / miss counters for the embedding and PDF caches, plus provider prompt caching (from telemetry)."""
+    from app.services.ai_engine import embedding_cache_stats, prompt_cache_stats
+    from app.services.pdf_parser import _cache as pdf_cache
+
+    return {
+        "embeddings": embedding_cache_stats(),
+        "pdf": pdf_cache.stats(),
+        "risk_prompt": prompt_cache_stats(),
+    }
+
+
+@app.get("/health/telemetry", tags=["health"])
+async def telemetry_summary():
+    """Per-model provider latency, tokens, retries, fallbacks and cost, plus recent job totals."""
+    from app.core.telemetry import telemetry_snapshot
+
+    return telemetry_snapshot()
+
+
+@app.get("/health/telemetry/{job_id}", tags=["health"])
+async def job_telemetry_detail(job_id: str):
+    """Per-model provider telemetry of one recent assessment job."""
+    from app.core.telemetry import job_snapshot
+
+    snapshot = job_snapshot(job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No telemetry recorded for this job")
+    return snapshot
+
+
 # ── Assessment endpoint ──────────────────────────────────────
 class AssessResponse(BaseModel):
     job_id: str
@@ -181,17 +253,31 @@ async def run_assessment(job_id: str, pdf_path: str, github_url: str) -> None:
     ------
     1. **Ingestion** – GitScanner (clone + list files), Gitleaks (secret scan),
        PDF parser (Azure OpenAI → Gemini fallback).
-    2. **RAG** – AzureAIEngine.get_embedding → PolicyVectorStore.search →
-       AzureAIEngine.analyze_risk.
+    2. **RAG** – AzureAIEngine.get_embedding → shared PolicyVectorStore.search →
+       AzureAIEngine.analyze_risk (or, with ``RISK_FANOUT_ENABLED``,
+       analyze_risk_by_framework – one concurrent call per framework).
     3. **Scoring** – calculate_trust_score.
     4. **OPA** – OPAGatekeeper.evaluate_payload.
+
+    All provider calls of the job share one retry budget
+    (``RETRY_JOB_BUDGET``), and their latency, tokens, retries, fallbacks and
+    cost are aggregated into the result's ``telemetry`` key.
     """
+    from app.core.retry import retry_budget
+    from app.core.telemetry import job_telemetry
+
+    with retry_budget(), job_telemetry(job_id):
+        await _run_assessment(job_id, pdf_path, github_url)
+
+
+async def _run_assessment(job_id: str, pdf_path: str, github_url: str) -> None:
     from app.core.scoring import calculate_trust_score
+    from app.core.telemetry import current_job_snapshot
     from app.services.ai_engine import AzureAIEngine
     from app.services.git_scanner import clone_repo_context, list_files, scan_secrets
     from app.services.opa_client import OPAGatekeeper
-    from app.services.pdf_parser import parse_pdf
-    from app.services.vector_store import PolicyVectorStore
+    from app.services.pdf_parser import parse_pdf_async
+    from app.services.vector_store import get_policy_store
 
     try:
         # ── Phase 1: Ingestion ───────────────────────────────
@@ -218,7 +304,7 @@ async def run_assessment(job_id: str, pdf_path: str, github_url: str) -> None:
             code_metadata["secret_findings"] = secrets_result["findings"]
 
         # 1c. PDF parsing (Azure OpenAI → Gemini fallback)
-        pdf_result = parse_pdf(pdf_path)
+        pdf_result = await parse_pdf_async(pdf_path)
 
         # Build a textual summary for embedding
         project_description = (
@@ -236,9 +322,7 @@ async def run_assessment(job_id: str, pdf_path: str, github_url: str) -> None:
         embedding = await ai_engine.get_embedding(project_description)
 
         # 2b. Search the policy vector store for relevant policies
-        vector_store = PolicyVectorStore(
-            persist_directory=settings.CHROMA_PERSIST_DIRECTORY,
-        )
+        vector_store = get_policy_store()
         policy_hits = vector_store.search(query_embedding=embedding)
         if not policy_hits:
             logger.warning(
@@ -254,7 +338,10 @@ async def run_assessment(job_id: str, pdf_path: str, github_url: str) -> None:
             "code_metadata": code_metadata,
             "pdf_analysis": pdf_result,
         }
-        risk_result = await ai_engine.analyze_risk(project_json, policies)
+        if settings.RISK_FANOUT_ENABLED:
+            risk_result = await ai_engine.analyze_risk_by_framework(project_json, policy_hits)
+        else:
+            risk_result = await ai_engine.analyze_risk(project_json, policies)
         risks = risk_result.get("risks", [])
 
         # ── Phase 3: Scoring ─────────────────────────────────
@@ -284,6 +371,7 @@ async def run_assessment(job_id: str, pdf_path: str, github_url: str) -> None:
             "risks": risks,
             "trust_score": trust_score,
             "opa_result": opa_result,
+            "telemetry": current_job_snapshot(),
         }
 
         with Session(engine) as session:
@@ -0,0 +1,118 @@
+"""Pydantic schemas for structured LLM outputs – PDF extraction and risk analysis.
+
+Validators normalise the values models commonly get slightly wrong
+(capitalised or synonymous severities, free-form deployment targets, a bare
+string where a list is expected), so well-meaning outputs validate without a
+re-request. Extra keys are ignored. A severity that cannot be normalised is
+kept as ``"unknown"`` (and logged) – the risk stays in the report for review
+without being given a severity the model never stated.
+"""
+
+import logging
+from typing import Literal
+
+from pydantic import BaseModel, Field, field_validator
+
+Severity = Literal["low", "medium", "high", "critical", "unknown"]
+DeploymentTarget = Literal["public_cloud", "private_cloud", "on_premise", "hybrid", "unknown"]
+
+_SEVERITY_ALIASES = {
+    "critical": "critical",
+    "prohibited": "critical",
+    "unacceptable": "critical",
+    "very high": "critical",
+    "high": "high",
+    "severe": "high",
+    "major": "high",
+    "elevated": "high",
+    "medium": "medium",
+    "moderate": "medium",
+    "med": "medium",
+    "limited": "medium",
+    "low": "low",
+    "minor": "low",
+    "minimal": "low",
+    "negligible": "low",
+    "info": "low",
+    "informational": "low",
+}
+
+_DEPLOYMENT_ALIASES = {
+    "public": "public_cloud",
+    "cloud": "public_cloud",
+    "aws": "public_cloud",
+    "azure": "public_cloud",
+    "gcp": "public_cloud",
+    "private": "private_cloud",
+    "on_prem": "on_premise",
+    "on_premises": "on_premise",
+    "onprem": "on_premise",
+    "on_site": "on_premise",
+}
+
+# Unknown or missing severities are reported as this, so the risk is kept and stands out for review
+UNKNOWN_SEVERITY = "unknown"
+
+logger = logging.getLogger(__name__)
+
+
+def _as_list(value):
+    if value is None:
+        return []
+    if isinstance(value, str):
+        return [value] if value.strip() else []
+    return value
+
+
+class PdfExtraction(BaseModel):
+    """Structured analysis of a PDF, as requested by ``EXTRACTION_PROMPT``."""
+
+    project_purpose: str = Field(..., description="Concise summary of the project's purpose")
+    data_types_used: list[str] = Field(..., description="Normalised data-type labels")
+    potential_risks: list[str] = Field(..., description="Concrete risks found in the document")
+    human_in_the_loop: bool = Field(default=False, description="Explicit human oversight of decisions")
+    deployment_target: DeploymentTarget = Field(default="unknown", description="Where the system runs")
+
+    @field_validator("data_types_used", "potential_risks", mode="before")
+    @classmethod
+    def _listify(cls, value):
+        return _as_list(value)
+
+    @field_validator("human_in_the_loop", mode="before")
+    @classmethod
+    def _null_is_false(cls, value):
+        return False if value is None else value
+
+    @field_validator("deployment_target", mode="before")
+    @classmethod
+    def _normalise_deployment(cls, value):
+        if not isinstance(value, str):
+            return "unknown"
+        label = value.strip().lower().replace("-", "_").replace(" ", "_")
+        label = _DEPLOYMENT_ALIASES.get(label, label)
+        return label if label in DeploymentTarget.__args__ else "unknown"
+
+
+class RiskItem(BaseModel):
+    """One risk found by ``analyze_risk``."""
+
+    category: str = Field(..., min_length=1, description="Short risk category label")
+    severity: Severity = Field(default=UNKNOWN_SEVERITY, description="low, medium, high, critical or unknown")
+    reason: str = Field(..., description="Why the risk exists, citing the policy where applicable")
+
+    @field_validator("severity", mode="before")
+    @classmethod
+    def _normalise_severity(cls, value):
+        label = None
+        if isinstance(value, str):
+            label = value.strip().lower().removesuffix("risk").removesuffix("severity").strip()
+        if label in _SEVERITY_ALIASES:
+            return _SEVERITY_ALIASES[label]
+        logger.warning("Unrecognised risk severity %r – reporting it as %r", value, UNKNOWN_SEVERITY)
+        return UNKNOWN_SEVERITY
+
+
+class RiskReport(BaseModel):
+    """Output of ``analyze_risk``: ``{"risks": [...]}``."""
+
+    risks: list[RiskItem] = Field(default_factory=list)
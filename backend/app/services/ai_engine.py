@@ -2,22 +2,177 @@
 
 from __future__ import annotations
 
-import json
+import asyncio
+import logging
+import re
+from array import array
 
 from openai import AsyncAzureOpenAI
 
+from app.core.cache import TwoLevelCache, make_key
+from app.core.clients import get_clients
 from app.core.config import settings
+from app.core.json_repair import parse_llm_json
+from app.core.rate_limiter import get_limiter, usage_tokens
+from app.core.single_flight import SingleFlight
+from app.core.telemetry import record_dropped_items, telemetry_snapshot, tracked_call_async
+from app.core.tokens import estimate_tokens
+from app.schemas.llm_outputs import RiskItem, RiskReport
+from app.services.prompt_compactor import compact_project_payload, dumps_compact
 
 EMBEDDING_MODEL = "text-embedding-3-small-1"
 RISK_ANALYSIS_MODEL = "gpt-4o"
 
+logger = logging.getLogger(__name__)
+
+
+# ── Embedding cache ──────────────────────────────────────────
+def _encode_vector(vector: list[float]) -> bytes:
+    """Pack a vector as raw float32 (native byte order, 4 bytes per dimension)."""
+    return array("f", vector).tobytes()
+
+
+def _decode_vector(data: bytes) -> list[float]:
+    packed = array("f")
+    packed.frombytes(data)
+    return packed.tolist()
+
+
+_embedding_cache = TwoLevelCache(
+    "embeddings",
+    directory=settings.EMBEDDING_CACHE_DIRECTORY,
+    max_items=settings.EMBEDDING_CACHE_MAX_ITEMS,
+    encode=_encode_vector,
+    decode=_decode_vector,
+    max_disk_bytes=settings.EMBEDDING_CACHE_MAX_DISK_MB * 1024 * 1024,
+    # Memory tier holds packed float32 bytes (4 bytes per dimension); each hit decodes a fresh list
+    encode_memory=True,
+)
+
+
+# Identical embedding / risk-analysis calls in flight share one request
+_flights = SingleFlight("azure-ai-engine")
+
+
+def embedding_cache_stats() -> dict:
+    """Hit / miss counters of the embedding cache."""
+    return _embedding_cache.stats()
+
+
+# ── Provider prompt caching ──────────────────────────────────
+def prompt_cache_stats() -> dict:
+    """Prompt tokens sent by analyze_risk and how many the provider served from cache.
+
+    A view over the risk-analysis model's telemetry, which records each
+    call's usage (cached prompt tokens included) – there is no separate counter.
+    """
+    model = telemetry_snapshot()["models"].get(RISK_ANALYSIS_MODEL, {})
+    stats = {key: model.get(key, 0) for key in ("calls", "prompt_tokens", "cached_tokens")}
+    stats["cached_ratio"] = (
+        round(stats["cached_tokens"] / stats["prompt_tokens"], 3) if stats["prompt_tokens"] else 0.0
+    )
+    return stats
+
+
+def _policy_block(policies: list[str]) -> str:
+    """Policies in canonical order, so the same set always renders identically."""
+    canonical = sorted({p.strip() for p in policies if p.strip()})
+    return "## Applicable policies\n" + "\n".join(f"- {p}" for p in canonical)
+
+
+# ── Per-framework fan-out ────────────────────────────────────
+# Policy id prefixes (see scripts/seed_db.py) → framework; anything else is internal
+_FRAMEWORK_PREFIXES = (
+    ("eu-ai-act", "EU AI Act"),
+    ("nist-ai-rmf", "NIST AI RMF"),
+    ("unesco", "UNESCO"),
+)
+INTERNAL_FRAMEWORK = "Internal ethics"
+
+_SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+
+def policy_framework(policy_id: str) -> str:
+    """Framework a policy belongs to, from its id prefix."""
+    for prefix, framework in _FRAMEWORK_PREFIXES:
+        if policy_id.startswith(prefix):
+            return framework
+    return INTERNAL_FRAMEWORK
+
+
+def group_policies_by_framework(policy_hits: list[dict]) -> dict[str, list[str]]:
+    """Policy texts of vector-store *policy_hits*, grouped by framework in a stable order."""
+    groups: dict[str, list[str]] = {}
+    for hit in policy_hits:
+        groups.setdefault(policy_framework(hit["id"]), []).append(hit["document"])
+    return dict(sorted(groups.items()))
+
+
+def _reason_tokens(reason: str) -> set[str]:
+    return set(re.findall(r"[a-z0-9]+", reason.lower()))
+
+
+def _similarity(a: set[str], b: set[str]) -> float:
+    if not a or not b:
+        return float(a == b)
+    return len(a & b) / len(a | b)
+
+
+def merge_risks(risk_lists: list[list[dict]], threshold: float | None = None) -> list[dict]:
+    """Merge risks from several analyses, dropping near-duplicates.
+
+    Two risks are duplicates when their categories match (case-insensitively)
+    and the token Jaccard similarity of their reasons is at least *threshold*
+    (``RISK_DEDUPE_SIMILARITY``). The first occurrence is kept, raised to the
+    highest severity among its duplicates. The result depends only on the
+    order of *risk_lists*, not on which call finished first.
+    """
+    threshold = settings.RISK_DEDUPE_SIMILARITY if threshold is None else threshold
+    merged: list[dict] = []
+    seen: list[tuple[str, set[str]]] = []
+    for risks in risk_lists:
+        for risk in risks:
+            category = risk["category"].strip().lower()
+            tokens = _reason_tokens(risk["reason"])
+            for index, (seen_category, seen_tokens) in enumerate(seen):
+                if seen_category == category and _similarity(tokens, seen_tokens) >= threshold:
+                    kept = merged[index]
+                    if _SEVERITY_RANK.get(risk["severity"], 0) > _SEVERITY_RANK.get(kept["severity"], 0):
+                        kept["severity"] = risk["severity"]
+                    break
+            else:
+                merged.append(dict(risk))
+                seen.append((category, tokens))
+    return merged
+
+
+def _pack_batches(texts: list[str], max_items: int, max_tokens: int) -> list[list[int]]:
+    """Group indices of *texts* into batches bounded by item count and tokens.
+
+    A single text larger than *max_tokens* still gets a batch of its own.
+    """
+    batches: list[list[int]] = []
+    current: list[int] = []
+    current_tokens = 0
+    for index, text in enumerate(texts):
+        tokens = estimate_tokens(text)
+        if current and (len(current) >= max_items or current_tokens + tokens > max_tokens):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
 _RISK_SYSTEM_PROMPT = """\
 You are an AI-risk analyst. You will receive:
-1. A JSON object describing a software project (code metadata, optional PDF analysis, etc.).
-2. A list of organisational AI-ethics / compliance policies drawn from global
+1. A list of organisational AI-ethics / compliance policies drawn from global
    regulatory frameworks including the **EU AI Act**, the **NIST AI Risk
    Management Framework (AI RMF)**, and **UNESCO recommendations on Ethics
    of AI**.
+2. A JSON object describing a software project (code metadata, optional PDF analysis, etc.).
 
 Analyse the project against the policies and return a JSON object with a single
 key "risks" whose value is an array of risk objects. Each risk object MUST have
@@ -36,23 +191,118 @@ Return ONLY valid JSON. No markdown, no extra keys.
 """
 
 
+def _drop_invalid_risks(data):
+    """Keep the risks that validate on their own, e.g. after a truncated array was cut back.
+
+    Bad severities are already kept as ``"unknown"`` by :class:`RiskItem`, so only
+    items without a usable category or reason are dropped – each one is logged
+    and counted in telemetry.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get("risks"), list):
+        return data
+    kept = []
+    for item in data["risks"]:
+        try:
+            kept.append(RiskItem.model_validate(item))
+        except ValueError as exc:
+            logger.warning("Dropping invalid risk from %s output: %r (%s)", RISK_ANALYSIS_MODEL, item, exc)
+    dropped = len(data["risks"]) - len(kept)
+    if dropped:
+        record_dropped_items(RISK_ANALYSIS_MODEL, dropped)
+    return {**data, "risks": kept}
+
+
 class AzureAIEngine:
     """Async wrapper around Azure OpenAI for embeddings (and future chat)."""
 
-    def __init__(self) -> None:
-        self._client = AsyncAzureOpenAI(
-            api_key=settings.AZURE_OPENAI_API_KEY,
-            api_version=settings.AZURE_OPENAI_API_VERSION,
-            azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-        )
+    def __init__(self, client: AsyncAzureOpenAI | None = None) -> None:
+        # Defaults to the shared, pooled client – constructing an engine is cheap
+        self._client = client or get_clients().async_azure
 
     async def get_embedding(self, text: str) -> list[float]:
-        """Return the embedding vector for *text* using text-embedding-3-small."""
-        response = await self._client.embeddings.create(
-            model=EMBEDDING_MODEL,
-            input=text,
+        """Return the embedding vector for *text* using text-embedding-3-small.
+
+        Vectors are cached by model and text hash, so repeated texts skip
+        the network round trip.
+        """
+        key = make_key("embedding", EMBEDDING_MODEL, text)
+        cached = await _embedding_cache.aget(key)
+        if cached is not None:
+            return cached
+        return await _flights.do(key, lambda: self._embed_one(key, text))
+
+    async def _embed_one(self, key: str, text: str) -> list[float]:
+        limiter, reserved = get_limiter(EMBEDDING_MODEL), estimate_tokens(text)
+
+        async def _attempt():
+            await limiter.acquire(reserved)
+            response = await self._client.embeddings.create(
+                model=EMBEDDING_MODEL,
+                input=text,
+            )
+            limiter.settle(reserved, usage_tokens(response))
+            return response
+
+        response = await tracked_call_async(EMBEDDING_MODEL, _attempt)
+        embedding = response.data[0].embedding
+        await _embedding_cache.aset(key, embedding)
+        return embedding
+
+    async def get_embeddings(self, texts: list[str]) -> list[list[float]]:
+        """Return embedding vectors for *texts*, in input order.
+
+        Cached texts are served locally. The remaining unique texts are
+        packed into batches of at most ``EMBEDDING_BATCH_SIZE`` inputs and
+        ``EMBEDDING_BATCH_MAX_TOKENS`` estimated tokens. Up to
+        ``EMBEDDING_BATCH_CONCURRENCY`` batches are in flight at once, each
+        admitted by the embedding deployment's rate limiter.
+        """
+        keys = [make_key("embedding", EMBEDDING_MODEL, text) for text in texts]
+        vectors: dict[str, list[float]] = {}
+        missing: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key in vectors or key in missing:
+                continue
+            cached = await _embedding_cache.aget(key)
+            if cached is not None:
+                vectors[key] = cached
+            else:
+                missing[key] = text
+
+        pending_keys = list(missing)
+        pending_texts = list(missing.values())
+        limiter = get_limiter(EMBEDDING_MODEL)
+        semaphore = asyncio.Semaphore(settings.EMBEDDING_BATCH_CONCURRENCY)
+
+        async def _embed_batch(batch: list[int]) -> None:
+            inputs = [pending_texts[i] for i in batch]
+            reserved = sum(estimate_tokens(text) for text in inputs)
+
+            async def _attempt():
+                await limiter.acquire(reserved)
+                response = await self._client.embeddings.create(
+                    model=EMBEDDING_MODEL,
+                    input=inputs,
+                )
+                limiter.settle(reserved, usage_tokens(response))
+                return response
+
+            async with semaphore:
+                response = await tracked_call_async(EMBEDDING_MODEL, _attempt)
+            # The API reports each vector's input position in ``index``
+            for datum in sorted(response.data, key=lambda d: d.index):
+                key = pending_keys[batch[datum.index]]
+                vectors[key] = datum.embedding
+                await _embedding_cache.aset(key, datum.embedding)
+
+        batches = _pack_batches(
+            pending_texts,
+            settings.EMBEDDING_BATCH_SIZE,
+            settings.EMBEDDING_BATCH_MAX_TOKENS,
         )
-        return response.data[0].embedding
+        await asyncio.gather(*(_embed_batch(batch) for batch in batches))
+        # Repeated texts get their own list, not a shared reference
+        return [list(vectors[key]) for key in keys]
 
     async def analyze_risk(
         self,
@@ -61,6 +311,18 @@ class AzureAIEngine:
     ) -> dict:
         """Analyse a project against policies and return structured risks.
 
+        *project_json* is compacted to ``RISK_PAYLOAD_TOKEN_BUDGET`` tokens
+        (file lists become histograms, secret findings are capped) before it
+        is sent.
+
+        The prompt is ordered for provider-side prefix caching: the static
+        system prompt and the canonically ordered policy block come first,
+        and only the per-project payload at the end varies between jobs.
+
+        The output is validated against :class:`~app.schemas.llm_outputs.RiskReport`
+        (severities normalised) and repaired locally when it is malformed,
+        so most recoverable outputs don't cost another round trip.
+
         Returns a dict of the form::
 
             {
@@ -71,19 +333,63 @@ class AzureAIEngine:
             }
         """
         user_content = (
+            f"{_policy_block(policies)}\n\n"
             "## Project context\n"
-            f"```json\n{json.dumps(project_json, indent=2)}\n```\n\n"
-            "## Applicable policies\n"
-            + "\n".join(f"- {p}" for p in policies)
+            f"```json\n{dumps_compact(compact_project_payload(project_json))}\n```"
+        )
+        key = make_key("risk", RISK_ANALYSIS_MODEL, _RISK_SYSTEM_PROMPT, user_content)
+        return await _flights.do(key, lambda: self._complete_risk(user_content))
+
+    async def analyze_risk_by_framework(
+        self,
+        project_json: dict,
+        policy_hits: list[dict],
+    ) -> dict:
+        """Analyse the project once per policy framework, concurrently, and merge the risks.
+
+        *policy_hits* are vector-store hits (``id``, ``document``). Policies
+        are grouped with :func:`group_policies_by_framework`; each group gets
+        its own, shorter :meth:`analyze_risk` call, and the results are
+        merged with :func:`merge_risks`. With one group (or none) this is a
+        single :meth:`analyze_risk` call. If any group fails the error is
+        raised, as a single call would.
+        """
+        groups = group_policies_by_framework(policy_hits)
+        if len(groups) <= 1:
+            return await self.analyze_risk(project_json, [h["document"] for h in policy_hits])
+
+        results = await asyncio.gather(
+            *(self.analyze_risk(project_json, policies) for policies in groups.values()),
+            return_exceptions=True,
         )
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return {"risks": merge_risks([result["risks"] for result in results])}
 
-        response = await self._client.chat.completions.create(
-            model=RISK_ANALYSIS_MODEL,
-            response_format={"type": "json_object"},
-            messages=[
-                {"role": "system", "content": _RISK_SYSTEM_PROMPT},
-                {"role": "user", "content": user_content},
-            ],
+    async def _complete_risk(self, user_content: str) -> dict:
+        limiter = get_limiter(RISK_ANALYSIS_MODEL)
+        reserved = (
+            estimate_tokens(_RISK_SYSTEM_PROMPT)
+            + estimate_tokens(user_content)
+            + settings.RATE_LIMIT_COMPLETION_TOKENS
         )
 
-        return json.loads(response.choices[0].message.content)
+        async def _attempt():
+            await limiter.acquire(reserved)
+            response = await self._client.chat.completions.create(
+                model=RISK_ANALYSIS_MODEL,
+                response_format={"type": "json_object"},
+                messages=[
+                    {"role": "system", "content": _RISK_SYSTEM_PROMPT},
+                    {"role": "user", "content": user_content},
+                ],
+            )
+            limiter.settle(reserved, usage_tokens(response))
+            return response
+
+        response = await tracked_call_async(RISK_ANALYSIS_MODEL, _attempt)
+
+        return parse_llm_json(
+            response.choices[0].message.content, RiskReport, salvage=_drop_invalid_risks
+        ).model_dump()
@@ -1,26 +1,100 @@
 """Azure OpenAI service – thin wrapper around the openai SDK (Azure flavour)."""
 
-from openai import AzureOpenAI
+import asyncio
+from collections.abc import AsyncIterator
 
+from app.core.cache import make_key
+from app.core.circuit_breaker import get_breaker
+from app.core.clients import get_clients
 from app.core.config import settings
-
-# Initialise the Azure OpenAI client with credentials from .env
-_client = AzureOpenAI(
-    api_key=settings.AZURE_OPENAI_API_KEY,
-    api_version=settings.AZURE_OPENAI_API_VERSION,
-    azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
-)
+from app.core.rate_limiter import get_limiter, usage_tokens
+from app.core.single_flight import SingleFlight
+from app.core.telemetry import tracked_call_async
+from app.core.tokens import estimate_tokens
+from app.services.streaming import prime
 
 DEFAULT_DEPLOYMENT = settings.AZURE_OPENAI_DEPLOYMENT_NAME
 
+_SYSTEM_PROMPT = "You are a helpful assistant."
+
+# Identical prompts in flight share one Azure OpenAI call
+_flights = SingleFlight("azure-openai")
+
+
+def _messages(prompt: str) -> list[dict]:
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "user", "content": prompt},
+    ]
+
 
-def chat_completion(prompt: str, deployment: str | None = None) -> str:
-    """Send a prompt to Azure OpenAI and return the assistant's reply."""
-    response = _client.chat.completions.create(
-        model=deployment or DEFAULT_DEPLOYMENT,
-        messages=[
-            {"role": "system", "content": "You are a helpful assistant."},
-            {"role": "user", "content": prompt},
-        ],
+async def _complete_once(prompt: str, deployment: str):
+    limiter = get_limiter(deployment)
+    reserved = estimate_tokens(prompt) + settings.RATE_LIMIT_COMPLETION_TOKENS
+    await limiter.acquire(reserved)
+    # The client is resolved inside the breaker, so an open breaker skips it entirely
+    response = await get_breaker(f"azure-openai:{deployment}").call_async(
+        lambda: get_clients().async_azure.chat.completions.create(model=deployment, messages=_messages(prompt))
     )
+    limiter.settle(reserved, usage_tokens(response))
+    return response
+
+
+async def _complete(prompt: str, deployment: str) -> str:
+    response = await tracked_call_async(deployment, lambda: _complete_once(prompt, deployment))
     return response.choices[0].message.content
+
+
+async def chat_completion(prompt: str, deployment: str | None = None) -> str:
+    """Send a prompt to Azure OpenAI and return the assistant's reply.
+
+    Uses the async client on the shared connection pool, so the event loop
+    is never blocked. Waits for the deployment's rate limit, and raises
+    :class:`~app.core.circuit_breaker.CircuitOpenError` without calling
+    Azure while the deployment's circuit breaker is open. Transient errors
+    are retried per :mod:`app.core.retry`, concurrent identical calls are
+    coalesced into one, and the whole call is bounded by
+    ``GENERATE_TIMEOUT_SECONDS``.
+    """
+    deployment = deployment or DEFAULT_DEPLOYMENT
+    key = make_key("chat", deployment, _SYSTEM_PROMPT, prompt)
+    return await asyncio.wait_for(
+        _flights.do(key, lambda: _complete(prompt, deployment)),
+        settings.GENERATE_TIMEOUT_SECONDS,
+    )
+
+
+async def stream_chat_completion(prompt: str, deployment: str | None = None) -> AsyncIterator[str]:
+    """Stream an Azure OpenAI reply; return an async iterator of text chunks.
+
+    Returns once the first chunk has arrived. Rate limiting, the circuit
+    breaker and retries apply up to that point, so a failure before the
+    first token raises here and the caller can still fall back.
+    """
+    deployment = deployment or DEFAULT_DEPLOYMENT
+    limiter = get_limiter(deployment)
+    reserved = estimate_tokens(prompt) + settings.RATE_LIMIT_COMPLETION_TOKENS
+
+    async def _chunks(stream) -> AsyncIterator[str]:
+        try:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            # Streamed replies carry no usage at this API version, so the
+            # reservation is settled as its own estimate – on early close too.
+            limiter.settle(reserved, None)
+
+    async def _open() -> AsyncIterator[str]:
+        stream = await get_clients().async_azure.chat.completions.create(
+            model=deployment,
+            messages=_messages(prompt),
+            stream=True,
+        )
+        return await prime(_chunks(stream))
+
+    async def _attempt() -> AsyncIterator[str]:
+        await limiter.acquire(reserved)
+        return await get_breaker(f"azure-openai:{deployment}").call_async(_open)
+
+    return await tracked_call_async(deployment, _attempt)
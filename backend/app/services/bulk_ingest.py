@@ -0,0 +1,234 @@
+"""Bulk PDF ingestion – back-fill analyses for whole document archives.
+
+Documents flow through two bounded stages connected by a bounded queue:
+
+1. **Extraction** – ``BULK_EXTRACT_CONCURRENCY`` workers read, hash and
+   extract PDF text (CPU-bound, off the event loop).
+2. **Analysis** – ``BULK_ANALYSIS_CONCURRENCY`` workers run the LLM
+   extraction with the usual Azure OpenAI → Gemini fallback.
+
+Each finished document is appended to an NDJSON file as one line::
+
+    {"path": "...", "sha256": "...", "status": "ok", "result": {...}}
+    {"path": "...", "sha256": null, "status": "error", "error": "..."}
+
+Re-running against the same output file skips every path already recorded
+with ``"status": "ok"``, so interrupted back-fills resume where they stopped.
+Only one run per output file may be active in a process at a time; a second
+one raises :class:`BulkIngestBusyError`. File I/O runs in worker threads, and
+if either stage fails unexpectedly the other is cancelled rather than left
+waiting on the hand-off queue.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from pathlib import Path
+
+from app.core.config import settings
+from app.core.retry import retry_budget
+from app.services.pdf_parser import analyse_pdf_async, prepare_pdf_async
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+# Output files with a run in progress (resolved paths)
+_active_outputs: set[str] = set()
+
+
+class BulkIngestBusyError(RuntimeError):
+    """Raised when another bulk ingest run is already appending to the same output file."""
+
+    def __init__(self, output_path: str) -> None:
+        self.output_path = output_path
+        super().__init__(f"A bulk ingest run is already writing to {output_path}")
+
+
+def claim_output(output_path: str) -> None:
+    """Reserve *output_path* for one run, or raise :class:`BulkIngestBusyError`."""
+    key = str(Path(output_path).resolve())
+    if key in _active_outputs:
+        raise BulkIngestBusyError(output_path)
+    _active_outputs.add(key)
+
+
+def release_output(output_path: str) -> None:
+    """Give back a reservation made with :func:`claim_output`."""
+    _active_outputs.discard(str(Path(output_path).resolve()))
+
+
+def discover_pdfs(source: str, root: Path | None = None) -> list[Path]:
+    """Return the resolved paths of the PDFs named by *source*.
+
+    *source* is either a directory (searched recursively for ``*.pdf``) or a
+    manifest file listing one PDF path per line. Relative manifest entries
+    are resolved against the manifest's directory; blank lines and lines
+    starting with ``#`` are ignored.
+
+    With *root*, every path (after resolving ``..`` and symlinks) must lie
+    inside it, or :class:`ValueError` is raised.
+    """
+    path = Path(source)
+    if path.is_dir():
+        paths = sorted(p for p in path.rglob("*") if p.is_file() and p.suffix.lower() == ".pdf")
+    elif path.is_file():
+        paths = []
+        for line in path.read_text(encoding="utf-8").splitlines():
+            line = line.strip()
+            if line and not line.startswith("#"):
+                entry = Path(line)
+                paths.append(entry if entry.is_absolute() else path.parent / entry)
+    else:
+        raise FileNotFoundError(f"Bulk ingest source not found: {source}")
+
+    resolved = [p.resolve() for p in paths]
+    if root is not None:
+        outside = [str(p) for p in resolved if not p.is_relative_to(root)]
+        if outside:
+            raise ValueError(f"{len(outside)} path(s) outside {root}, e.g. {outside[0]}")
+    return resolved
+
+
+def load_completed(output_path: str) -> set[str]:
+    """Return the paths already recorded as successful in *output_path*."""
+    completed: set[str] = set()
+    path = Path(output_path)
+    if not path.exists():
+        return completed
+    for line in path.read_text(encoding="utf-8").splitlines():
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            # A partially written last line from an interrupted run
+            continue
+        if record.get("status") == "ok":
+            completed.add(record["path"])
+    return completed
+
+
+async def run_bulk_ingest(
+    paths: list[Path],
+    output_path: str,
+    *,
+    long_document: bool | None = None,
+    extract_concurrency: int | None = None,
+    analysis_concurrency: int | None = None,
+    claimed: bool = False,
+) -> dict:
+    """Analyse *paths* through the two-stage pipeline, appending to *output_path*.
+
+    Pass ``claimed=True`` when the caller already reserved *output_path* with
+    :func:`claim_output`; it is released when the run ends either way.
+
+    Returns a summary ``{"total", "skipped", "succeeded", "failed"}``.
+    """
+    if not claimed:
+        claim_output(output_path)
+    try:
+        return await _run_pipeline(
+            paths,
+            output_path,
+            long_document=long_document,
+            extract_concurrency=extract_concurrency or settings.BULK_EXTRACT_CONCURRENCY,
+            analysis_concurrency=analysis_concurrency or settings.BULK_ANALYSIS_CONCURRENCY,
+        )
+    finally:
+        release_output(output_path)
+
+
+def _open_output(output_path: str):
+    Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+    return open(output_path, "a", encoding="utf-8")
+
+
+def _append_line(out, line: str) -> None:
+    out.write(line)
+    out.flush()
+
+
+async def _run_pipeline(
+    paths: list[Path],
+    output_path: str,
+    *,
+    long_document: bool | None,
+    extract_concurrency: int,
+    analysis_concurrency: int,
+) -> dict:
+    completed = await asyncio.to_thread(load_completed, output_path)
+    pending = [p for p in paths if str(p) not in completed]
+    summary = {"total": len(paths), "skipped": len(paths) - len(pending), "succeeded": 0, "failed": 0}
+    if not pending:
+        return summary
+
+    work: asyncio.Queue = asyncio.Queue()
+    for path in pending:
+        work.put_nowait(path)
+    # Bounded hand-off queue: extraction cannot run far ahead of analysis
+    prepared_queue: asyncio.Queue = asyncio.Queue(maxsize=analysis_concurrency * 2)
+
+    out = await asyncio.to_thread(_open_output, output_path)
+    write_lock = asyncio.Lock()
+
+    async def _record(path: Path, digest: str | None, outcome: dict | Exception) -> None:
+        if isinstance(outcome, Exception):
+            summary["failed"] += 1
+            record = {"path": str(path), "sha256": digest, "status": "error", "error": str(outcome)}
+            logger.warning("Bulk ingest failed for %s: %s", path, outcome)
+        else:
+            summary["succeeded"] += 1
+            record = {"path": str(path), "sha256": digest, "status": "ok", "result": outcome}
+        async with write_lock:
+            await asyncio.to_thread(_append_line, out, json.dumps(record, default=str) + "\n")
+
+    async def _extract_worker() -> None:
+        while True:
+            try:
+                path = work.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                prepared = await prepare_pdf_async(str(path), long_document)
+            except Exception as exc:
+                await _record(path, None, exc)
+                continue
+            await prepared_queue.put(prepared)
+
+    async def _extract_all() -> None:
+        await asyncio.gather(*(_extract_worker() for _ in range(extract_concurrency)))
+        for _ in range(analysis_concurrency):
+            await prepared_queue.put(_DONE)
+
+    async def _analysis_worker() -> None:
+        while True:
+            prepared = await prepared_queue.get()
+            if prepared is _DONE:
+                return
+            try:
+                # Each document gets its own retry budget
+                with retry_budget():
+                    outcome = await analyse_pdf_async(prepared)
+            except Exception as exc:
+                outcome = exc
+            await _record(Path(prepared.file_path), prepared.digest, outcome)
+
+    try:
+        # A stage that dies (e.g. the output disk fills up) cancels the other instead of
+        # leaving extractors blocked on a full hand-off queue
+        async with asyncio.TaskGroup() as group:
+            for _ in range(analysis_concurrency):
+                group.create_task(_analysis_worker())
+            group.create_task(_extract_all())
+    finally:
+        await asyncio.to_thread(out.close)
+
+    logger.info(
+        "Bulk ingest finished: %d succeeded, %d failed, %d skipped (of %d)",
+        summary["succeeded"],
+        summary["failed"],
+        summary["skipped"],
+        summary["total"],
+    )
+    return summary
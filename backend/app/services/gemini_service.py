@@ -1,19 +1,88 @@
 """Google Gemini service – thin wrapper around the google-genai SDK."""
 
-from google import genai
+import asyncio
+from collections.abc import AsyncIterator
 
+from app.core.cache import make_key
+from app.core.circuit_breaker import get_breaker
+from app.core.clients import get_clients
 from app.core.config import settings
-
-# Initialise the Gemini client with the API key from .env
-_client = genai.Client(api_key=settings.GEMINI_API_KEY)
+from app.core.rate_limiter import get_limiter, usage_tokens
+from app.core.single_flight import SingleFlight
+from app.core.telemetry import tracked_call_async
+from app.core.tokens import estimate_tokens
+from app.services.streaming import prime
 
 DEFAULT_MODEL = "gemini-3-flash-preview"
 
+# Identical prompts in flight share one Gemini call
+_flights = SingleFlight("gemini")
+
 
-def generate_content(prompt: str, model: str | None = None) -> str:
-    """Send a prompt to Gemini and return the text response."""
-    response = _client.models.generate_content(
-        model=model or DEFAULT_MODEL,
-        contents=prompt,
+async def _generate_once(prompt: str, model: str):
+    limiter = get_limiter(model)
+    reserved = estimate_tokens(prompt) + settings.RATE_LIMIT_COMPLETION_TOKENS
+    await limiter.acquire(reserved)
+    # The client is resolved inside the breaker, so an open breaker skips it entirely
+    response = await get_breaker(f"gemini:{model}").call_async(
+        lambda: get_clients().gemini.aio.models.generate_content(model=model, contents=prompt)
     )
+    limiter.settle(reserved, usage_tokens(response))
+    return response
+
+
+async def _generate(prompt: str, model: str) -> str:
+    response = await tracked_call_async(model, lambda: _generate_once(prompt, model))
     return response.text
+
+
+async def generate_content(prompt: str, model: str | None = None) -> str:
+    """Send a prompt to Gemini and return the text response.
+
+    Uses the async client on the shared connection pool, so the event loop
+    is never blocked. Waits for the model's rate limit, and raises
+    :class:`~app.core.circuit_breaker.CircuitOpenError` without calling
+    Gemini while the model's circuit breaker is open. Transient errors are
+    retried per :mod:`app.core.retry`, concurrent identical calls are
+    coalesced into one, and the whole call is bounded by
+    ``GENERATE_TIMEOUT_SECONDS``.
+    """
+    model = model or DEFAULT_MODEL
+    key = make_key("generate", model, prompt)
+    return await asyncio.wait_for(
+        _flights.do(key, lambda: _generate(prompt, model)),
+        settings.GENERATE_TIMEOUT_SECONDS,
+    )
+
+
+async def stream_content(prompt: str, model: str | None = None) -> AsyncIterator[str]:
+    """Stream a Gemini response; return an async iterator of text chunks.
+
+    Returns once the first chunk has arrived. Rate limiting, the circuit
+    breaker and retries apply up to that point, so a failure before the
+    first token raises here and the caller can still fall back.
+    """
+    model = model or DEFAULT_MODEL
+    limiter = get_limiter(model)
+    reserved = estimate_tokens(prompt) + settings.RATE_LIMIT_COMPLETION_TOKENS
+
+    async def _chunks(response) -> AsyncIterator[str]:
+        total = None
+        try:
+            async for chunk in response:
+                total = usage_tokens(chunk) or total
+                if chunk.text:
+                    yield chunk.text
+        finally:
+            # Also runs when the client disconnects or the stream errors mid-way.
+            limiter.settle(reserved, total)
+
+    async def _open() -> AsyncIterator[str]:
+        response = await get_clients().gemini.aio.models.generate_content_stream(model=model, contents=prompt)
+        return await prime(_chunks(response))
+
+    async def _attempt() -> AsyncIterator[str]:
+        await limiter.acquire(reserved)
+        return await get_breaker(f"gemini:{model}").call_async(_open)
+
+    return await tracked_call_async(model, _attempt)
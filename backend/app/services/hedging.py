@@ -0,0 +1,165 @@
+"""Hedged provider calls – race a slow primary against a secondary provider.
+
+The primary is called first. If it has not answered within the hedge delay,
+the same request is sent to the secondary as well; the first successful
+answer wins and the other call is cancelled. A primary that *fails* before
+the delay triggers the secondary immediately, exactly like a plain fallback.
+
+The hedge delay is a percentile (``GENERATE_HEDGE_PERCENTILE``) of the
+primary's recent latencies, so only genuinely slow calls are duplicated.
+Every attempt is sampled – failures, timeouts and calls cancelled by the
+hedge included – so slow errors push the delay up instead of being ignored.
+Until enough samples exist, ``GENERATE_HEDGE_DEFAULT_DELAY_SECONDS`` is used.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from app.core.config import settings
+
+ProviderCall = Callable[[], Awaitable[Any]]
+
+
+class LatencyTracker:
+    """Rolling window of call latencies (seconds) for one provider."""
+
+    def __init__(self, window: int | None = None) -> None:
+        self._samples: deque[float] = deque(maxlen=window or settings.GENERATE_LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, pct: float) -> float | None:
+        """Nearest-rank percentile of the window, or ``None`` when empty."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        rank = max(1, math.ceil(pct / 100 * len(samples)))
+        return samples[min(rank, len(samples)) - 1]
+
+
+_trackers: dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def get_tracker(provider: str) -> LatencyTracker:
+    """Return the process-wide latency tracker for *provider*."""
+    with _trackers_lock:
+        if provider not in _trackers:
+            _trackers[provider] = LatencyTracker()
+        return _trackers[provider]
+
+
+def hedge_delay(provider: str) -> float:
+    """Seconds to wait on *provider* before sending the hedged request."""
+    tracker = get_tracker(provider)
+    if len(tracker) < settings.GENERATE_HEDGE_MIN_SAMPLES:
+        return settings.GENERATE_HEDGE_DEFAULT_DELAY_SECONDS
+    observed = tracker.percentile(settings.GENERATE_HEDGE_PERCENTILE)
+    return max(settings.GENERATE_HEDGE_MIN_DELAY_SECONDS, observed)
+
+
+@dataclass
+class HedgeResult:
+    """Outcome of :func:`hedged_call`."""
+
+    source: str
+    value: Any
+    latency: float  # seconds from the start of the request to the winning answer
+    hedged: bool  # the secondary was started while the primary was still running
+    errors: dict[str, Exception] = field(default_factory=dict)
+
+
+class AllProvidersFailed(Exception):
+    """Raised when every provider in a hedged (or streamed) call failed."""
+
+    def __init__(self, errors: dict[str, Exception]) -> None:
+        self.errors = errors
+        super().__init__(" | ".join(f"{name}: {exc}" for name, exc in errors.items()))
+
+
+async def timed_call(provider: str, call: ProviderCall) -> Any:
+    """Await *call* and record its latency, whether it succeeds, fails or is cancelled."""
+    started = time.perf_counter()
+    try:
+        return await call()
+    finally:
+        get_tracker(provider).record(time.perf_counter() - started)
+
+
+async def hedged_call(
+    primary: tuple[str, ProviderCall],
+    secondary: tuple[str, ProviderCall],
+    *,
+    delay: float | None = None,
+) -> HedgeResult:
+    """Race *primary* against *secondary*, starting the latter after *delay*.
+
+    *delay* defaults to :func:`hedge_delay` for the primary. Raises
+    :class:`AllProvidersFailed` when both providers fail.
+    """
+    primary_name, primary_call = primary
+    secondary_name, secondary_call = secondary
+    delay = hedge_delay(primary_name) if delay is None else delay
+
+    started = time.perf_counter()
+    names: dict[asyncio.Task, str] = {}
+    errors: dict[str, Exception] = {}
+    hedged = False
+
+    def _launch(name: str, call: ProviderCall) -> asyncio.Task:
+        task = asyncio.create_task(timed_call(name, call))
+        names[task] = name
+        return task
+
+    pending = {_launch(primary_name, primary_call)}
+    secondary_started = False
+    try:
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=None if secondary_started else delay,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                # Primary is slower than the hedge delay – race the secondary
+                hedged = secondary_started = True
+                pending.add(_launch(secondary_name, secondary_call))
+                continue
+
+            for task in done:
+                exc = task.exception()
+                if exc is None:
+                    return HedgeResult(
+                        source=names[task],
+                        value=task.result(),
+                        latency=time.perf_counter() - started,
+                        hedged=hedged,
+                        errors=errors,
+                    )
+                errors[names[task]] = exc
+
+            if not secondary_started:
+                secondary_started = True
+                pending.add(_launch(secondary_name, secondary_call))
+    finally:
+        for task in pending:
+            task.cancel()
+        # Let the losers unwind so their latency samples are recorded now
+        await asyncio.gather(*pending, return_exceptions=True)
+
+    raise AllProvidersFailed(errors)
@@ -0,0 +1,209 @@
+"""In-memory exact-search policy store on NumPy – the ``VECTOR_STORE_BACKEND=numpy`` backend.
+
+All policy embeddings live in one contiguous, L2-normalised float32 matrix, so
+``search`` is a single matrix-vector product plus ``argpartition`` (and
+``search_many`` a single matrix-matrix product for a batch of queries) – exact
+top-k in microseconds for a corpus of a few thousand policies, with no
+chromadb on the hot path.
+
+On disk, each write publishes a new version directory under
+``persist_directory`` holding ``embeddings.npy`` (memory-mapped read-only, so
+the OS page cache is shared between workers) and ``policies.json`` (ids and
+documents in row order). The version becomes current with a single atomic
+rename of the ``CURRENT`` pointer file, so readers never pair a matrix with
+the wrong ids. Every read checks the pointer and reloads when another process
+(e.g. ``seed_db``) has published a newer version – no restart needed. Seed
+with :meth:`NumpyPolicyVectorStore.add_policies` to write once per batch.
+
+``distance`` is the squared L2 distance between normalised vectors
+(``2 - 2·cosine``), which matches chromadb's default ``l2`` space for the
+(already normalised) OpenAI embeddings.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+CURRENT_FILE = "CURRENT"
+EMBEDDINGS_FILE = "embeddings.npy"
+POLICIES_FILE = "policies.json"
+
+
+def _normalise(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+class NumpyPolicyVectorStore:
+    """Exact cosine search over a memory-mapped matrix, with the PolicyVectorStore interface."""
+
+    def __init__(self, persist_directory: str = "./policy_index") -> None:
+        self._dir = Path(persist_directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        # (matrix, ids, documents) – replaced as a whole, so readers never see a half-applied write
+        self._snapshot: tuple[np.ndarray | None, list[str], list[str]] = (None, [], [])
+        self._signature: tuple[int, int] | None = None
+        self._current()
+
+    # ── persistence ──────────────────────────────────────────
+    def _pointer_signature(self) -> tuple[int, int] | None:
+        # os.replace gives the pointer a new inode, so this changes on every publish
+        try:
+            stat = os.stat(self._dir / CURRENT_FILE)
+        except FileNotFoundError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _current(self) -> tuple[np.ndarray | None, list[str], list[str]]:
+        """The latest published snapshot, reloaded if the pointer has moved."""
+        signature = self._pointer_signature()
+        if signature != self._signature:
+            with self._reload_lock:
+                if signature != self._signature:
+                    self._snapshot = self._load()
+                    self._signature = signature
+        return self._snapshot
+
+    def _current_version(self) -> str | None:
+        try:
+            return (self._dir / CURRENT_FILE).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+
+    def _load(self) -> tuple[np.ndarray | None, list[str], list[str]]:
+        version = self._current_version()
+        if version is None:
+            return None, [], []
+        matrix = np.load(self._dir / version / EMBEDDINGS_FILE, mmap_mode="r")
+        meta = json.loads((self._dir / version / POLICIES_FILE).read_text(encoding="utf-8"))
+        if len(meta["ids"]) != matrix.shape[0]:
+            raise ValueError(
+                f"Policy index at {self._dir / version} is inconsistent: "
+                f"{len(meta['ids'])} ids, {matrix.shape[0]} rows"
+            )
+        return matrix, meta["ids"], meta["documents"]
+
+    def _save(self, matrix: np.ndarray, ids: list[str], documents: list[str]) -> None:
+        previous = self._current_version()
+        version = f"v{time.time_ns()}-{os.getpid()}"
+        version_dir = self._dir / version
+        version_dir.mkdir()
+        with open(version_dir / EMBEDDINGS_FILE, "wb") as fh:
+            np.save(fh, np.ascontiguousarray(matrix, dtype=np.float32))
+        (version_dir / POLICIES_FILE).write_text(json.dumps({"ids": ids, "documents": documents}), encoding="utf-8")
+
+        # The single commit point – until this rename, readers keep the previous version
+        pointer_tmp = self._dir / f"{CURRENT_FILE}.{os.getpid()}.tmp"
+        pointer_tmp.write_text(version, encoding="utf-8")
+        os.replace(pointer_tmp, self._dir / CURRENT_FILE)
+
+        # Keep the previous version for readers that resolved the pointer just before the swap
+        for stale in self._dir.glob("v*"):
+            if stale.is_dir() and stale.name not in (version, previous):
+                shutil.rmtree(stale, ignore_errors=True)
+
+    # ── write ────────────────────────────────────────────────
+    def add_policy(self, id: str, text: str, embedding: list[float]) -> None:
+        """Insert (or upsert) a single policy document with its embedding."""
+        self.add_policies([(id, text, embedding)])
+
+    def add_policies(self, policies: list[tuple[str, str, list[float]]]) -> None:
+        """Upsert several ``(id, text, embedding)`` policies with a single write."""
+        if not policies:
+            return
+        with self._write_lock:
+            matrix, ids, documents = self._current()
+            rows = _normalise(np.asarray([embedding for _, _, embedding in policies], dtype=np.float32))
+            if matrix is not None and matrix.shape[0] and rows.shape[1] != matrix.shape[1]:
+                raise ValueError(f"Embedding dimension {rows.shape[1]} does not match the index ({matrix.shape[1]})")
+
+            matrix = np.array(matrix) if matrix is not None else np.empty((0, rows.shape[1]), dtype=np.float32)
+            ids, documents = list(ids), list(documents)
+            position = {policy_id: index for index, policy_id in enumerate(ids)}
+            appended = []
+            for row, (policy_id, text, _) in zip(rows, policies):
+                if policy_id in position:
+                    matrix[position[policy_id]] = row
+                    documents[position[policy_id]] = text
+                else:
+                    position[policy_id] = len(ids)
+                    ids.append(policy_id)
+                    documents.append(text)
+                    appended.append(row)
+            if appended:
+                matrix = np.vstack([matrix, np.asarray(appended, dtype=np.float32)])
+
+            self._save(matrix, ids, documents)
+            self._current()
+
+    # ── read ─────────────────────────────────────────────────
+    def count(self) -> int:
+        """Number of stored policies."""
+        return len(self._current()[1])
+
+    def warm(self) -> int:
+        """Page the matrix into memory; return the policy count."""
+        matrix = self._current()[0]
+        if matrix is not None:
+            float(np.asarray(matrix).sum())
+        return self.count()
+
+    def search(
+        self,
+        query_embedding: list[float],
+        top_k: int = 5,
+    ) -> list[dict]:
+        """Return the *top_k* most similar policies for the given embedding.
+
+        Each result dict contains ``id``, ``document``, and ``distance``.
+        """
+        return self.search_many([query_embedding], top_k=top_k)[0]
+
+    def search_many(
+        self,
+        query_embeddings: list[list[float]],
+        top_k: int = 5,
+    ) -> list[list[dict]]:
+        """Top-k for every query with one matrix-matrix product; hits in input order."""
+        if not len(query_embeddings):
+            return []
+        matrix, ids, documents = self._current()
+        if matrix is None or not ids or top_k <= 0:
+            return [[] for _ in query_embeddings]
+        queries = _normalise(np.asarray(query_embeddings, dtype=np.float32).reshape(len(query_embeddings), -1))
+        if queries.shape[1] != matrix.shape[1]:
+            raise ValueError(f"Query dimension {queries.shape[1]} does not match the index ({matrix.shape[1]})")
+
+        scores = queries @ matrix.T
+        k = min(top_k, len(ids))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        top = np.take_along_axis(top, np.argsort(-top_scores, axis=1, kind="stable"), axis=1)
+        return [
+            [
+                {"id": ids[i], "document": documents[i], "distance": max(0.0, 2.0 - 2.0 * float(row[i]))}
+                for i in indices
+            ]
+            for row, indices in zip(scores, top)
+        ]
+
+    # ── convenience ──────────────────────────────────────────
+    async def get_relevant_policies(
+        self,
+        project_description: str,
+        top_k: int = 5,
+    ) -> list[str]:
+        """Embed *project_description* and return the top-k policy texts."""
+        from app.services.ai_engine import AzureAIEngine
+
+        query_embedding = await AzureAIEngine().get_embedding(project_description)
+        return [h["document"] for h in self.search(query_embedding=query_embedding, top_k=top_k)]
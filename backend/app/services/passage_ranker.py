@@ -0,0 +1,150 @@
+"""Passage ranker – picks the most informative parts of a document for the prompt.
+
+Pages are split into short passages and scored locally with TF-IDF against a
+vocabulary of risk, data-type and deployment terms. The highest-scoring
+passages are packed into a character budget and returned in document order,
+so the extraction prompt carries the sections that drive ``data_types_used``,
+``potential_risks`` and ``deployment_target`` instead of just the first pages.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+
+# Target passage size – small enough to pack precisely, big enough for context
+PASSAGE_CHARS = 1_000
+
+# Marker inserted where passages were skipped
+GAP_MARKER = "\n[…]\n"
+
+_RISK_TERMS = (
+    "risk", "bias", "discrimination", "fairness", "harm", "safety", "privacy",
+    "security", "breach", "leak", "surveillance", "manipulation", "scoring",
+    "profiling", "prohibited", "compliance", "gdpr", "hipaa", "regulation",
+    "audit", "explainability", "transparency", "accountability", "misuse",
+    "oversight", "human", "review", "approval", "manual", "loop",
+)
+_DATA_TERMS = (
+    "data", "dataset", "biometric", "facial", "face", "fingerprint", "voice",
+    "pii", "personal", "identifiable", "health", "medical", "patient",
+    "financial", "payment", "credit", "location", "gps", "children", "minor",
+    "sensitive", "consent", "retention", "encryption", "anonymised",
+    "anonymized", "pseudonymised", "record", "demographic", "ethnicity",
+)
+_DEPLOYMENT_TERMS = (
+    "deploy", "deployed", "deployment", "cloud", "aws", "azure", "gcp",
+    "google", "premise", "prem", "hybrid", "hosted", "hosting", "kubernetes",
+    "saas", "datacenter", "region", "edge", "infrastructure", "server",
+)
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _stem(token: str) -> str:
+    """Very light stemming so 'risks' / 'risk' and 'records' / 'record' match."""
+    return token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+
+
+VOCABULARY: frozenset[str] = frozenset(_stem(t) for t in _RISK_TERMS + _DATA_TERMS + _DEPLOYMENT_TERMS)
+
+
+def _tokenise(text: str) -> list[str]:
+    return [_stem(token) for token in _WORD.findall(text.lower())]
+
+
+def _split_long_line(line: str, limit: int) -> list[str]:
+    """Cut *line* into pieces of at most *limit*, at the last whitespace where possible."""
+    pieces: list[str] = []
+    while len(line) > limit:
+        cut = line.rfind(" ", limit // 2, limit + 1)
+        cut = cut + 1 if cut > 0 else limit
+        pieces.append(line[:cut])
+        line = line[cut:]
+    pieces.append(line)
+    return pieces
+
+
+def split_passages(pages: list[str], passage_chars: int = PASSAGE_CHARS) -> list[str]:
+    """Split page texts into passages of roughly *passage_chars*, never across pages.
+
+    Lines longer than a passage (pages extracted as a single line) are
+    hard-split at whitespace near *passage_chars*.
+    """
+    passages: list[str] = []
+    for page in pages:
+        current = ""
+        for line in page.splitlines(keepends=True):
+            for piece in _split_long_line(line, passage_chars):
+                if current and len(current) + len(piece) > passage_chars:
+                    passages.append(current.strip())
+                    current = ""
+                current += piece
+        if current.strip():
+            passages.append(current.strip())
+    return [p for p in passages if p]
+
+
+def score_passages(passages: list[str]) -> list[float]:
+    """Return a TF-IDF relevance score for each passage.
+
+    Term frequency is log-scaled, IDF is computed across the document's own
+    passages (so terms that appear everywhere count for less), and the sum
+    is normalised by ``sqrt(passage length)`` so long passages do not win
+    merely by being long.
+    """
+    tokenised = [_tokenise(p) for p in passages]
+    document_frequency = Counter(term for tokens in tokenised for term in set(tokens) if term in VOCABULARY)
+    total = len(passages)
+
+    scores: list[float] = []
+    for tokens in tokenised:
+        counts = Counter(t for t in tokens if t in VOCABULARY)
+        weight = sum(
+            (1 + math.log(tf)) * math.log(1 + total / document_frequency[term])
+            for term, tf in counts.items()
+        )
+        scores.append(weight / math.sqrt(len(tokens)) if tokens else 0.0)
+    return scores
+
+
+def select_passages(pages: list[str], max_chars: int) -> str:
+    """Pack the highest-value passages of *pages* into *max_chars*.
+
+    The opening passage is always kept (it usually states the project's
+    purpose); the rest are added greedily by score, and passages with no
+    vocabulary hits are dropped even if there is room. Selected passages are
+    returned in document order, separated by :data:`GAP_MARKER` where text
+    was skipped.
+    """
+    passages = split_passages(pages)
+    if not passages:
+        return ""
+
+    scores = score_passages(passages)
+    ranked = sorted((i for i in range(1, len(passages)) if scores[i] > 0), key=lambda i: scores[i], reverse=True)
+    order = [0] + ranked
+
+    chosen: set[int] = set()
+    used = 0
+    for index in order:
+        cost = len(passages[index]) + len(GAP_MARKER)
+        if used + cost > max_chars:
+            continue
+        chosen.add(index)
+        used += cost
+
+    if not chosen:
+        return passages[0][:max_chars]
+
+    parts: list[str] = []
+    previous = -1
+    for index in sorted(chosen):
+        if parts and index != previous + 1:
+            parts.append(GAP_MARKER)
+        elif parts:
+            parts.append("\n")
+        parts.append(passages[index])
+        previous = index
+    return "".join(parts)
@@ -0,0 +1,222 @@
+"""PDF text extraction – page-level pypdf extraction, serial or across a process pool.
+
+pypdf is pure Python and CPU-bound, so large documents are split into page
+ranges that are extracted by worker processes and reassembled in page order.
+Each page runs under a deadline so a single malformed page cannot stall the
+whole document. In pool workers (and any main thread) the deadline is a
+``SIGALRM`` timer; elsewhere – small documents extracted serially under
+``asyncio.to_thread`` – it is checked cooperatively between the page's
+content-stream operators, so small documents never pay a process round trip.
+The cooperative check cannot interrupt pypdf while it parses a single
+operator or decompresses the stream, so it bounds slow pages, not wedged ones.
+A pool task that outlives its budget is abandoned and the pool is replaced
+with a fresh one, so later documents do not queue behind it.
+
+This module deliberately imports nothing but pypdf and the settings so that
+spawned worker processes start quickly.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import math
+import multiprocessing
+import os
+import signal
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+
+from pypdf import PdfReader
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Ranges per worker – more, smaller ranges balance uneven page costs
+_RANGES_PER_WORKER = 4
+
+_pool: ProcessPoolExecutor | None = None
+_pool_lock = threading.Lock()
+
+
+# ── Worker side ──────────────────────────────────────────────
+def _deadline_can_arm(seconds: float) -> bool:
+    return (
+        seconds > 0
+        and hasattr(signal, "setitimer")
+        and threading.current_thread() is threading.main_thread()
+    )
+
+
+@contextmanager
+def _page_deadline(seconds: float):
+    """Raise :class:`TimeoutError` if the block runs longer than *seconds*.
+
+    Uses ``SIGALRM`` and therefore only arms on POSIX in a main thread (which
+    is where process-pool tasks run); elsewhere it is a no-op and
+    :func:`_extract_page_text` checks the deadline itself.
+    """
+    if not _deadline_can_arm(seconds):
+        yield
+        return
+
+    def _on_alarm(signum, frame):
+        raise TimeoutError(f"page extraction exceeded {seconds:.1f}s")
+
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _extract_page_text(page, seconds: float) -> str:
+    """Extract one page's text, bounded by *seconds* (0 = no deadline)."""
+    if seconds <= 0 or _deadline_can_arm(seconds):
+        with _page_deadline(seconds):
+            return page.extract_text() or ""
+
+    # Thread-safe fallback: pypdf calls the visitor before every content-stream operator
+    deadline = time.monotonic() + seconds
+
+    def _check_deadline(operator, operands, cm, tm) -> None:
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"page extraction exceeded {seconds:.1f}s")
+
+    return page.extract_text(visitor_operand_before=_check_deadline) or ""
+
+
+def _extract_page_range(file_path: str, start: int, stop: int, page_timeout: float) -> list[str]:
+    """Extract the text of pages ``[start, stop)``, one string per page.
+
+    Pages that time out or fail to decode yield an empty string so the
+    caller can still reassemble the document in order.
+    """
+    return _extract_reader_pages(PdfReader(file_path), file_path, start, stop, page_timeout)
+
+
+def _extract_reader_pages(reader: PdfReader, file_path: str, start: int, stop: int, page_timeout: float) -> list[str]:
+    texts: list[str] = []
+    for index in range(start, stop):
+        try:
+            texts.append(_extract_page_text(reader.pages[index], page_timeout))
+        except Exception as exc:
+            logger.warning("Skipping page %d of %s: %s", index + 1, file_path, exc)
+            texts.append("")
+    return texts
+
+
+# ── Parent side ──────────────────────────────────────────────
+def _worker_count() -> int:
+    return settings.PDF_EXTRACT_WORKERS or os.cpu_count() or 1
+
+
+def _new_pool() -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=_worker_count(), mp_context=multiprocessing.get_context("spawn"))
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Return the shared extraction pool, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = _new_pool()
+        return _pool
+
+
+def shutdown_pool() -> None:
+    """Shut down the shared extraction pool (it is recreated on next use)."""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _recycle_pool(pool: ProcessPoolExecutor) -> None:
+    """Replace *pool* – a timed-out task is still occupying one of its workers."""
+    global _pool
+    pool.shutdown(wait=False, cancel_futures=True)
+    with _pool_lock:
+        if _pool is pool:
+            _pool = _new_pool()
+
+
+def split_page_ranges(page_count: int, parts: int) -> list[tuple[int, int]]:
+    """Split ``range(page_count)`` into at most *parts* contiguous ``(start, stop)`` ranges."""
+    if page_count <= 0:
+        return []
+    size = math.ceil(page_count / max(parts, 1))
+    return [(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+
+def _extract_in_pool(file_path: str, ranges: list[tuple[int, int]]) -> list[str]:
+    """Extract *ranges* in the process pool and reassemble them in order."""
+    page_timeout = settings.PDF_PAGE_TIMEOUT_SECONDS
+    pool = _get_pool()
+
+    try:
+        futures = [
+            pool.submit(_extract_page_range, file_path, start, stop, page_timeout)
+            for start, stop in ranges
+        ]
+    except BrokenProcessPool:
+        shutdown_pool()
+        raise
+
+    pages: list[str] = []
+    timed_out = False
+    for (start, stop), future in zip(ranges, futures):
+        # Outer guard in case the in-worker deadline cannot fire (non-POSIX)
+        budget = page_timeout * (stop - start) + page_timeout if page_timeout > 0 else None
+        try:
+            pages.extend(future.result(timeout=budget))
+        except FutureTimeoutError:
+            timed_out = True
+            logger.warning(
+                "Pages %d-%d of %s timed out after %.1fs – skipped", start + 1, stop, file_path, budget
+            )
+            pages.extend([""] * (stop - start))
+        except BrokenProcessPool:
+            shutdown_pool()
+            raise
+    if timed_out:
+        # Other ranges are already collected, so abandoning the stuck worker loses nothing
+        _recycle_pool(pool)
+    return pages
+
+
+def _extract_pages_parallel(file_path: str, page_count: int) -> list[str]:
+    """Fan page ranges out to the process pool and reassemble them in order."""
+    return _extract_in_pool(file_path, split_page_ranges(page_count, _worker_count() * _RANGES_PER_WORKER))
+
+
+def _extract_pages_serial(reader: PdfReader, file_path: str) -> list[str]:
+    """Extract every page in order, in-process, still under the page deadline."""
+    return _extract_reader_pages(reader, file_path, 0, len(reader.pages), settings.PDF_PAGE_TIMEOUT_SECONDS)
+
+
+def extract_pages(file_path: str, data: bytes | None = None) -> list[str]:
+    """Return the text of every page in *file_path*, in page order.
+
+    Documents with at least ``PDF_PARALLEL_MIN_PAGES`` pages are split across
+    the shared process pool; smaller ones are extracted serially. Either way
+    each page is bounded by ``PDF_PAGE_TIMEOUT_SECONDS``. Pass the file's
+    *data* when it has already been read, so the serial path does not read
+    it again (pool workers still open *file_path* themselves).
+    """
+    reader = PdfReader(io.BytesIO(data) if data is not None else file_path)
+    page_count = len(reader.pages)
+
+    if page_count < settings.PDF_PARALLEL_MIN_PAGES or _worker_count() <= 1:
+        return _extract_pages_serial(reader, file_path)
+
+    logger.info("Extracting %d pages of %s across %d processes", page_count, file_path, _worker_count())
+    return _extract_pages_parallel(file_path, page_count)
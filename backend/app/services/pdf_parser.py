@@ -1,35 +1,72 @@
 """PDF parser service – extracts structured project metadata from PDF files.
 
-Extracts text from the PDF using pypdf, then sends the text to Azure OpenAI
-(chat completion) for structured analysis. Falls back to Google Gemini on failure.
+Extracts text from the PDF using pypdf, fits it to the prompt budget (by
+default keeping the passages that rank highest for risk, data and deployment
+terms), then sends the text to Azure OpenAI (chat completion) for structured
+analysis. Falls back to Google Gemini on failure.
 Returns a strict JSON dict with project purpose, data types, and risks.
+
+Both stages are cached by the PDF's SHA-256 digest: the extracted text (keyed
+by digest + extraction settings) and the structured analysis (additionally
+keyed by prompt version and models), so re-uploads skip pypdf and the LLM.
+Analyses served by the Gemini fallback (or with failed chunks) are not
+cached – they reflect a transient provider failure, so the next upload tries
+again.
+
+In long-document mode the full text is split into token-bounded chunks that
+are analysed concurrently and merged back into the same output schema,
+instead of truncating the document. Chunks dropped past ``PDF_MAX_CHUNKS``
+or failed on both providers mark the result ``partial``, with counts.
+
+There is one implementation, :func:`parse_pdf_async`: pypdf extraction runs
+in a worker thread and the provider calls are awaited on ``AsyncAzureOpenAI``
+/ the async Gemini client, so the event loop never blocks.
 """
 
-import json
+import asyncio
+import copy
+import hashlib
 import logging
+import re
+from dataclasses import dataclass
 from pathlib import Path
 
-from google import genai
-from openai import AzureOpenAI
-from pypdf import PdfReader
-
+from app.core.cache import TwoLevelCache, make_key
+from app.core.circuit_breaker import get_breaker
+from app.core.clients import get_clients
 from app.core.config import settings
+from app.core.json_repair import parse_llm_json
+from app.core.rate_limiter import get_limiter, usage_tokens
+from app.core.telemetry import record_fallback, tracked_call_async
+from app.core.tokens import estimate_tokens, tokens_to_chars
+from app.schemas.llm_outputs import PdfExtraction
+from app.services.passage_ranker import select_passages
+from app.services.pdf_extraction import extract_pages
 
 logger = logging.getLogger(__name__)
 
-# ── Clients ──────────────────────────────────────────────────
-_azure_client = AzureOpenAI(
-    api_key=settings.AZURE_OPENAI_API_KEY,
-    api_version=settings.AZURE_OPENAI_API_VERSION,
-    azure_endpoint=settings.AZURE_OPENAI_ENDPOINT,
+# ── Cache ────────────────────────────────────────────────────
+_cache = TwoLevelCache(
+    "pdf",
+    directory=settings.PDF_CACHE_DIRECTORY,
+    max_items=settings.PDF_CACHE_MAX_ITEMS,
+    max_disk_bytes=settings.PDF_CACHE_MAX_DISK_MB * 1024 * 1024,
 )
 
-_gemini_client = genai.Client(api_key=settings.GEMINI_API_KEY)
-
 # ── Constants ────────────────────────────────────────────────
 AZURE_DEPLOYMENT = settings.AZURE_OPENAI_DEPLOYMENT_NAME
 GEMINI_MODEL = "gemini-3-flash-preview"
 
+# Circuit breakers shared with the /generate endpoints for the same models
+AZURE_BREAKER = f"azure-openai:{AZURE_DEPLOYMENT}"
+GEMINI_BREAKER = f"gemini:{GEMINI_MODEL}"
+
+# In "head" selection mode, truncate extracted text to ~12 000 chars
+MAX_TEXT_CHARS = 12_000
+
+# Bump whenever EXTRACTION_PROMPT changes so cached analyses are not reused
+EXTRACTION_PROMPT_VERSION = 1
+
 EXTRACTION_PROMPT = """\
 You are a document analysis assistant. Analyse the following document text
 and extract the information into **strict JSON** (no markdown fences, no extra keys):
@@ -69,99 +106,156 @@ def _read_pdf_bytes(file_path: str) -> bytes:
     return path.read_bytes()
 
 
-def _extract_text(file_path: str) -> str:
-    """Extract plain text from a PDF using pypdf."""
-    reader = PdfReader(file_path)
-    pages = [page.extract_text() or "" for page in reader.pages]
+def _text_budget(long_document: bool) -> int | None:
+    """Return the character budget for the prompt text (``None`` = full text)."""
+    if long_document:
+        return None
+    if settings.PDF_PAGE_SELECTION == "relevance":
+        return tokens_to_chars(settings.PDF_PROMPT_TOKEN_BUDGET)
+    return MAX_TEXT_CHARS
+
+
+def _extract_text(file_path: str, max_chars: int | None = MAX_TEXT_CHARS, data: bytes | None = None) -> str:
+    """Extract plain text from a PDF using pypdf (parallel for large documents).
+
+    Text longer than *max_chars* is fitted to it – by relevance-ranked
+    passage selection or plain truncation, per ``PDF_PAGE_SELECTION``.
+    Pass ``None`` to keep all of it. *data* is the file's bytes, if already read.
+    """
+    pages = extract_pages(file_path, data)
     text = "\n".join(pages).strip()
     if not text:
         raise ValueError("PDF contains no extractable text.")
-    # Truncate to ~12 000 chars to stay within token limits
-    return text[:12_000]
+    if max_chars is None or len(text) <= max_chars:
+        return text
+    if settings.PDF_PAGE_SELECTION == "relevance":
+        return select_passages(pages, max_chars)
+    return text[:max_chars]
+
+
+def _cached_text(file_path: str, text_key: str, max_chars: int | None, data: bytes) -> str:
+    """Return the extracted text for *file_path*, using the cache when possible."""
+    text = _cache.get(text_key)
+    if text is None:
+        text = _extract_text(file_path, max_chars, data=data)
+        _cache.set(text_key, text)
+    return text
+
+
+def _chunk_text(text: str, max_tokens: int) -> list[str]:
+    """Split *text* into chunks of at most ~*max_tokens*, preferring line breaks."""
+    max_chars = tokens_to_chars(max_tokens)
+    chunks: list[str] = []
+    current = ""
+    for line in text.splitlines(keepends=True):
+        # Hard-split lines that are longer than a whole chunk
+        while len(line) > max_chars:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:max_chars])
+            line = line[max_chars:]
+        if len(current) + len(line) > max_chars:
+            chunks.append(current)
+            current = ""
+        current += line
+    if current.strip():
+        chunks.append(current)
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def _document_keys(file_path: str, long_document: bool) -> tuple[bytes, str, str, str]:
+    """Read *file_path* once and return ``(pdf_bytes, digest, text_key, analysis_key)``.
+
+    The bytes are handed on to extraction, so the file is not read twice.
+    """
+    pdf_bytes = _read_pdf_bytes(file_path)
+    digest = hashlib.sha256(pdf_bytes).hexdigest()
+    text_key = make_key("text", digest, _text_budget(long_document), settings.PDF_PAGE_SELECTION)
+    analysis_key = make_key(
+        "analysis",
+        text_key,
+        EXTRACTION_PROMPT_VERSION,
+        AZURE_DEPLOYMENT,
+        GEMINI_MODEL,
+        settings.PDF_CHUNK_TOKENS if long_document else None,
+    )
+    return pdf_bytes, digest, text_key, analysis_key
 
 
 # ── Azure OpenAI approach ────────────────────────────────────
-def _extract_via_azure(pdf_text: str) -> dict:
+def _azure_messages(pdf_text: str) -> list[dict]:
+    return [
+        {
+            "role": "system",
+            "content": "You are a helpful document analysis assistant.",
+        },
+        {
+            "role": "user",
+            "content": f"{EXTRACTION_PROMPT}\n\n--- DOCUMENT TEXT ---\n{pdf_text}",
+        },
+    ]
+
+
+def _reserved_tokens(pdf_text: str) -> int:
+    """Tokens to reserve against the rate limit for one extraction call."""
+    return estimate_tokens(EXTRACTION_PROMPT) + estimate_tokens(pdf_text) + settings.RATE_LIMIT_COMPLETION_TOKENS
+
+
+async def _extract_via_azure_async(pdf_text: str) -> dict:
     """Send extracted PDF text to Azure OpenAI and parse the JSON response."""
-    response = _azure_client.chat.completions.create(
-        model=AZURE_DEPLOYMENT,
-        messages=[
-            {
-                "role": "system",
-                "content": "You are a helpful document analysis assistant.",
-            },
-            {
-                "role": "user",
-                "content": f"{EXTRACTION_PROMPT}\n\n--- DOCUMENT TEXT ---\n{pdf_text}",
-            },
-        ],
-    )
+    async def _attempt():
+        limiter, reserved = get_limiter(AZURE_DEPLOYMENT), _reserved_tokens(pdf_text)
+        await limiter.acquire(reserved)
+        response = await get_breaker(AZURE_BREAKER).call_async(
+            lambda: get_clients().async_azure.chat.completions.create(
+                model=AZURE_DEPLOYMENT, messages=_azure_messages(pdf_text)
+            )
+        )
+        limiter.settle(reserved, usage_tokens(response))
+        return response
+
+    response = await tracked_call_async(AZURE_DEPLOYMENT, _attempt)
     raw = response.choices[0].message.content.strip()
     return _parse_json(raw)
 
 
 # ── Gemini approach ──────────────────────────────────────────
-def _extract_via_gemini(pdf_text: str) -> dict:
+async def _extract_via_gemini_async(pdf_text: str) -> dict:
     """Send extracted PDF text to Gemini and parse the JSON response."""
-    response = _gemini_client.models.generate_content(
-        model=GEMINI_MODEL,
-        contents=[f"{EXTRACTION_PROMPT}\n\n--- DOCUMENT TEXT ---\n{pdf_text}"],
-    )
+    async def _attempt():
+        limiter, reserved = get_limiter(GEMINI_MODEL), _reserved_tokens(pdf_text)
+        await limiter.acquire(reserved)
+        response = await get_breaker(GEMINI_BREAKER).call_async(
+            lambda: get_clients().gemini.aio.models.generate_content(
+                model=GEMINI_MODEL, contents=[f"{EXTRACTION_PROMPT}\n\n--- DOCUMENT TEXT ---\n{pdf_text}"]
+            )
+        )
+        limiter.settle(reserved, usage_tokens(response))
+        return response
+
+    response = await tracked_call_async(GEMINI_MODEL, _attempt)
     raw = response.text.strip()
     return _parse_json(raw)
 
 
 # ── JSON parser helper ───────────────────────────────────────
 def _parse_json(raw_text: str) -> dict:
-    """Attempt to parse JSON from model output, stripping markdown fences if present."""
-    text = raw_text.strip()
-    # Strip ```json ... ``` wrappers
-    if text.startswith("```"):
-        text = text.split("\n", 1)[-1]
-    if text.endswith("```"):
-        text = text.rsplit("```", 1)[0]
-    text = text.strip()
-
-    parsed = json.loads(text)
-
-    # Validate expected keys
-    expected = {"project_purpose", "data_types_used", "potential_risks"}
-    if not expected.issubset(parsed.keys()):
-        missing = expected - parsed.keys()
-        raise ValueError(f"Model response missing keys: {missing}")
-
-    # Ensure optional fields have safe defaults
-    parsed.setdefault("human_in_the_loop", False)
-    parsed.setdefault("deployment_target", "unknown")
-
-    return parsed
-
-
-# ── Public API ───────────────────────────────────────────────
-def parse_pdf(file_path: str) -> dict:
-    """Extract project metadata from a PDF.
-
-    Tries Azure OpenAI first; falls back to Google Gemini on any failure.
+    """Validate model output against :class:`PdfExtraction`, repairing it locally if needed.
 
-    Returns
-    -------
-    dict
-        {
-            "project_purpose": str,
-            "data_types_used": list[str],
-            "potential_risks": list[str],
-            "source": "azure-openai" | "gemini",
-            "fallback_used": bool,
-            "fallback_reason": str | None,
-        }
+    Missing optional fields get safe defaults; raises
+    :class:`~app.core.json_repair.LLMOutputError` (a ``ValueError``) when the
+    output cannot be recovered.
     """
-    pdf_bytes = _read_pdf_bytes(file_path)
-    pdf_text = _extract_text(file_path)
-    filename = Path(file_path).name
+    return parse_llm_json(raw_text, PdfExtraction).model_dump()
+
 
+# ── Single-pass analysis (Azure → Gemini fallback) ──────────
+async def _analyse_text_async(pdf_text: str) -> dict:
+    """Analyse *pdf_text* with Azure OpenAI, falling back to Gemini on failure."""
     # --- Try Azure OpenAI first ---
     try:
-        result = _extract_via_azure(pdf_text)
+        result = await _extract_via_azure_async(pdf_text)
         result["source"] = "azure-openai"
         result["fallback_used"] = False
         result["fallback_reason"] = None
@@ -170,10 +264,11 @@ def parse_pdf(file_path: str) -> dict:
     except Exception as azure_exc:
         azure_error = str(azure_exc)
         logger.warning("Azure OpenAI PDF parsing failed (%s), falling back to Gemini", azure_error)
+        record_fallback(AZURE_DEPLOYMENT, azure_exc)
 
     # --- Fallback to Gemini ---
     try:
-        result = _extract_via_gemini(pdf_text)
+        result = await _extract_via_gemini_async(pdf_text)
         result["source"] = "gemini"
         result["fallback_used"] = True
         result["fallback_reason"] = f"Azure OpenAI unavailable: {azure_error}"
@@ -184,3 +279,208 @@ def parse_pdf(file_path: str) -> dict:
             f"Both providers failed to parse PDF. "
             f"Azure OpenAI: {azure_error} | Gemini: {gemini_exc}"
         )
+
+
+# ── Long-document analysis (map-reduce over chunks) ─────────
+def _normalise_label(value: str) -> str:
+    """Lower-case, collapse whitespace and drop trailing punctuation for dedupe."""
+    return re.sub(r"\s+", " ", str(value)).strip().rstrip(".;:,").lower()
+
+
+def _dedupe(values) -> list[str]:
+    """Return *values* without near-duplicates, keeping the first spelling seen."""
+    seen: set[str] = set()
+    unique: list[str] = []
+    for value in values:
+        key = _normalise_label(value)
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(value)
+    return unique
+
+
+def _merge_extractions(partials: list[dict]) -> dict:
+    """Merge per-chunk extraction results into a single result.
+
+    - ``project_purpose``: the first chunk that states one (usually the intro).
+    - ``data_types_used`` / ``potential_risks``: de-duplicated union, in order.
+    - ``human_in_the_loop``: true if any chunk documents human oversight.
+    - ``deployment_target``: the single target named, ``"hybrid"`` if chunks
+      name several, ``"unknown"`` if none do.
+    """
+    purposes = [
+        p["project_purpose"]
+        for p in partials
+        if p.get("project_purpose") and p["project_purpose"] != "Not specified"
+    ]
+    targets = {
+        p.get("deployment_target", "unknown")
+        for p in partials
+        if p.get("deployment_target", "unknown") != "unknown"
+    }
+    if not targets:
+        deployment_target = "unknown"
+    elif len(targets) == 1:
+        deployment_target = targets.pop()
+    else:
+        deployment_target = "hybrid"
+
+    return {
+        "project_purpose": purposes[0] if purposes else "Not specified",
+        "data_types_used": _dedupe(d for p in partials for d in p.get("data_types_used", [])),
+        "potential_risks": _dedupe(r for p in partials for r in p.get("potential_risks", [])),
+        "human_in_the_loop": any(p.get("human_in_the_loop") is True for p in partials),
+        "deployment_target": deployment_target,
+    }
+
+
+def _plan_chunks(pdf_text: str) -> tuple[list[str], int]:
+    """Split *pdf_text* into at most ``PDF_MAX_CHUNKS`` token-bounded chunks.
+
+    Returns ``(chunks, skipped)`` – *skipped* counts the chunks dropped past
+    the limit, which the result reports rather than losing silently.
+    """
+    chunks = _chunk_text(pdf_text, settings.PDF_CHUNK_TOKENS)
+    skipped = max(0, len(chunks) - settings.PDF_MAX_CHUNKS)
+    if skipped:
+        logger.warning(
+            "Document has %d chunks; analysing the first %d (PDF_MAX_CHUNKS)",
+            len(chunks),
+            settings.PDF_MAX_CHUNKS,
+        )
+        chunks = chunks[: settings.PDF_MAX_CHUNKS]
+    return chunks, skipped
+
+
+async def _analyse_long_text_async(pdf_text: str) -> dict:
+    """Analyse the full document as concurrent chunk calls and merge the results.
+
+    At most ``PDF_CHUNK_CONCURRENCY`` chunk calls are in flight at once (a
+    semaphore), so latency grows with ``chunks / concurrency`` rather than
+    with the number of chunks. Chunks that fail on both providers are
+    skipped; the document only fails when every chunk does. Chunks beyond
+    ``PDF_MAX_CHUNKS`` and failed chunks are reported in the result.
+    """
+    chunks, skipped = _plan_chunks(pdf_text)
+    semaphore = asyncio.Semaphore(settings.PDF_CHUNK_CONCURRENCY)
+
+    async def _try_analyse_async(chunk: str) -> dict | Exception:
+        async with semaphore:
+            try:
+                return await _analyse_text_async(chunk)
+            except Exception as exc:
+                return exc
+
+    outcomes = await asyncio.gather(*(_try_analyse_async(chunk) for chunk in chunks))
+    return _combine_chunk_outcomes(outcomes, skipped)
+
+
+def _combine_chunk_outcomes(outcomes: list[dict | Exception], skipped: int = 0) -> dict:
+    """Merge successful chunk results; raise only if every chunk failed.
+
+    The result carries ``partial`` (true when any chunk was skipped or
+    failed), ``chunks_total``, ``chunks_skipped`` and ``chunks_failed``.
+    """
+    partials = [o for o in outcomes if isinstance(o, dict)]
+    errors = [o for o in outcomes if isinstance(o, Exception)]
+    if not partials:
+        raise errors[0]
+    if errors:
+        logger.warning("%d of %d document chunks failed to parse: %s", len(errors), len(outcomes), errors[0])
+
+    merged = _merge_extractions(partials) if len(partials) > 1 else dict(partials[0])
+    fallbacks = [p for p in partials if p["fallback_used"]]
+    merged["source"] = "gemini" if len(fallbacks) == len(partials) else "azure-openai"
+    merged["fallback_used"] = bool(fallbacks)
+    merged["fallback_reason"] = fallbacks[0]["fallback_reason"] if fallbacks else None
+    merged["partial"] = bool(skipped or errors)
+    merged["chunks_total"] = len(outcomes) + skipped
+    merged["chunks_skipped"] = skipped
+    merged["chunks_failed"] = len(errors)
+    logger.info("Long PDF parsed as %d chunks (%d via fallback)", len(partials), len(fallbacks))
+    return merged
+
+
+# ── Public API ───────────────────────────────────────────────
+@dataclass
+class PreparedPdf:
+    """A PDF whose text has been extracted (or whose analysis is cached)."""
+
+    file_path: str
+    digest: str
+    analysis_key: str
+    long_document: bool
+    text: str | None = None
+    cached_result: dict | None = None
+
+
+async def prepare_pdf_async(file_path: str, long_document: bool | None = None) -> PreparedPdf:
+    """CPU-bound half of :func:`parse_pdf_async` – read, hash and extract text.
+
+    Runs in a worker thread. When the analysis is already cached, extraction
+    is skipped and the cached result is attached instead.
+    """
+    if long_document is None:
+        long_document = settings.PDF_LONG_DOCUMENT_MODE
+    max_chars = _text_budget(long_document)
+
+    pdf_bytes, digest, text_key, analysis_key = await asyncio.to_thread(_document_keys, file_path, long_document)
+    prepared = PreparedPdf(file_path, digest, analysis_key, long_document)
+
+    cached = await _cache.aget(analysis_key)
+    if cached is not None:
+        prepared.cached_result = cached
+    else:
+        prepared.text = await asyncio.to_thread(_cached_text, file_path, text_key, max_chars, pdf_bytes)
+    return prepared
+
+
+async def analyse_pdf_async(prepared: PreparedPdf) -> dict:
+    """I/O-bound half of :func:`parse_pdf_async` – the provider calls."""
+    if prepared.cached_result is not None:
+        logger.info("PDF analysis served from cache (sha256=%s)", prepared.digest[:12])
+        return copy.deepcopy(prepared.cached_result)
+
+    if prepared.long_document:
+        result = await _analyse_long_text_async(prepared.text)
+    else:
+        result = await _analyse_text_async(prepared.text)
+    if result["fallback_used"] or result.get("chunks_failed"):
+        # Both reflect transient provider failures – let the next upload try again
+        logger.info("Not caching PDF analysis with fallback / failed chunks (sha256=%s)", prepared.digest[:12])
+    else:
+        await _cache.aset(prepared.analysis_key, result)
+    return copy.deepcopy(result)
+
+
+async def parse_pdf_async(file_path: str, long_document: bool | None = None) -> dict:
+    """Extract project metadata from a PDF.
+
+    Tries Azure OpenAI first; falls back to Google Gemini on any failure.
+    Results are cached by document digest, so re-uploads return immediately.
+    File reading, hashing and pypdf extraction run in a worker thread; the
+    provider calls are awaited natively.
+
+    With *long_document* (default: ``PDF_LONG_DOCUMENT_MODE``) the whole text
+    is analysed in concurrent chunks and merged, rather than fitted to the
+    prompt budget.
+
+    Returns
+    -------
+    dict
+        {
+            "project_purpose": str,
+            "data_types_used": list[str],
+            "potential_risks": list[str],
+            "source": "azure-openai" | "gemini",
+            "fallback_used": bool,
+            "fallback_reason": str | None,
+            # long-document mode only:
+            "partial": bool,          # some chunks skipped or failed
+            "chunks_total": int,
+            "chunks_skipped": int,    # beyond PDF_MAX_CHUNKS
+            "chunks_failed": int,     # failed on both providers
+        }
+    """
+    prepared = await prepare_pdf_async(file_path, long_document)
+    return await analyse_pdf_async(prepared)
@@ -0,0 +1,162 @@
+"""Prompt payload compactor – fits the analyze_risk project JSON to a token budget.
+
+Raw ``code_metadata`` carries the full ``files`` list and every Gitleaks
+finding, so the risk-analysis prompt would otherwise grow with repository
+size. The compactor keeps the signal the model needs and drops the bulk:
+
+* the file list becomes directory and extension histograms plus a short list
+  of notable files (manifests, Dockerfiles, model artefacts, infra code);
+* secret findings are reduced to rule / file / line, de-duplicated, capped
+  and summarised per rule – raw ``Secret`` / ``Match`` values never reach the
+  prompt.
+
+If the result still exceeds the budget, histograms and lists are shrunk
+step by step, then long strings are truncated. The budget is best effort:
+keys are never dropped, so a payload that is still over budget after the
+last step is sent anyway and a warning is logged. Token counts use
+:mod:`app.core.tokens`.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from collections import Counter
+from pathlib import PurePosixPath
+from typing import Any
+
+from app.core.config import settings
+from app.core.tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# File names / suffixes worth showing the model individually
+_NOTABLE_NAMES = {
+    "dockerfile", "docker-compose.yml", "docker-compose.yaml", "requirements.txt",
+    "pyproject.toml", "setup.py", "package.json", "pom.xml", "build.gradle",
+    "go.mod", "cargo.toml", "gemfile", "makefile", "serverless.yml", "chart.yaml",
+    ".env", ".env.example", "readme.md", "license",
+}
+_NOTABLE_SUFFIXES = {
+    ".tf", ".bicep", ".ipynb", ".pkl", ".pt", ".pth", ".onnx", ".h5", ".joblib",
+    ".safetensors", ".sql", ".rego", ".proto",
+}
+
+# (histogram entries, notable files, findings) per shrink level
+_LEVELS = ((25, 40, 25), (15, 20, 15), (8, 10, 8), (4, 5, 4), (2, 0, 2))
+
+
+def payload_tokens(payload: Any) -> int:
+    """Estimated tokens of *payload* serialised the way the prompt carries it."""
+    return estimate_tokens(dumps_compact(payload))
+
+
+def dumps_compact(payload: Any) -> str:
+    """Minified, key-sorted JSON – no indentation tokens, stable across runs."""
+    return json.dumps(payload, separators=(",", ":"), sort_keys=True, default=str)
+
+
+def _top(counter: Counter, limit: int) -> dict[str, int]:
+    top = dict(counter.most_common(limit))
+    other = sum(counter.values()) - sum(top.values())
+    if other:
+        top["(other)"] = other
+    return top
+
+
+def _is_notable(path: str) -> bool:
+    name = PurePosixPath(path).name.lower()
+    return name in _NOTABLE_NAMES or PurePosixPath(name).suffix in _NOTABLE_SUFFIXES
+
+
+def _summarise_files(files: list[str], histogram_limit: int, notable_limit: int) -> dict:
+    directories: Counter = Counter()
+    extensions: Counter = Counter()
+    for path in files:
+        # Bucket by the first two directory levels ("src/app", "tests", ".")
+        directories["/".join(PurePosixPath(path).parent.parts[:2]) or "."] += 1
+        extensions[PurePosixPath(path).suffix.lower() or "(none)"] += 1
+    notable = sorted(p for p in files if _is_notable(p))
+    summary = {
+        "directories": _top(directories, histogram_limit),
+        "extensions": _top(extensions, histogram_limit),
+    }
+    if notable_limit:
+        summary["notable_files"] = notable[:notable_limit]
+        if len(notable) > notable_limit:
+            summary["notable_files_omitted"] = len(notable) - notable_limit
+    return summary
+
+
+def _summarise_findings(findings: list[dict], limit: int) -> dict:
+    unique: dict[tuple, dict] = {}
+    for finding in findings:
+        rule = finding.get("RuleID") or finding.get("rule") or "unknown"
+        path = finding.get("File") or finding.get("file") or ""
+        key = (rule, path)
+        if key not in unique:
+            unique[key] = {"rule": rule, "file": path, "line": finding.get("StartLine") or finding.get("line")}
+    by_rule = Counter(rule for rule, _ in unique)
+    kept = sorted(unique.values(), key=lambda f: (f["rule"], f["file"]))[:limit]
+    summary: dict[str, Any] = {"by_rule": dict(by_rule.most_common()), "findings": kept}
+    if len(unique) > limit:
+        summary["omitted"] = len(unique) - limit
+    return summary
+
+
+def _compact_code_metadata(metadata: dict, level: tuple[int, int, int]) -> dict:
+    histogram_limit, notable_limit, findings_limit = level
+    compact = {
+        key: value
+        for key, value in metadata.items()
+        if key not in {"files", "extensions", "secret_findings"}
+    }
+    if "files" in metadata:
+        compact.update(_summarise_files(metadata["files"], histogram_limit, notable_limit))
+    elif "extensions" in metadata:
+        compact["extensions"] = _top(Counter(metadata["extensions"]), histogram_limit)
+    if metadata.get("secret_findings"):
+        compact["secret_findings"] = _summarise_findings(metadata["secret_findings"], findings_limit)
+    return compact
+
+
+def _truncate_strings(value: Any, max_chars: int) -> Any:
+    if isinstance(value, str):
+        return value if len(value) <= max_chars else value[: max_chars - 1] + "…"
+    if isinstance(value, list):
+        return [_truncate_strings(v, max_chars) for v in value]
+    if isinstance(value, dict):
+        return {k: _truncate_strings(v, max_chars) for k, v in value.items()}
+    return value
+
+
+def compact_project_payload(project_json: dict, token_budget: int | None = None) -> dict:
+    """Return a compacted copy of *project_json* that aims to fit *token_budget*.
+
+    *token_budget* defaults to ``RISK_PAYLOAD_TOKEN_BUDGET``. Keys other than
+    ``code_metadata`` are kept as-is unless the budget forces long strings to
+    be truncated as a last resort. No key is ever dropped, so the budget is
+    best effort: if the most compact form is still over it, that form is
+    returned and a warning is logged.
+    """
+    budget = token_budget or settings.RISK_PAYLOAD_TOKEN_BUDGET
+    metadata = project_json.get("code_metadata")
+
+    payload = dict(project_json)
+    for level in _LEVELS:
+        if isinstance(metadata, dict):
+            payload["code_metadata"] = _compact_code_metadata(metadata, level)
+        if payload_tokens(payload) <= budget:
+            return payload
+
+    # Still too large: shorten free text (PDF purpose, risk descriptions, …)
+    for max_chars in (1_000, 400, 160):
+        truncated = _truncate_strings(payload, max_chars)
+        if payload_tokens(truncated) <= budget:
+            return truncated
+    logger.warning(
+        "Risk payload is ~%d tokens after full compaction, over the %d-token budget – sending it anyway",
+        payload_tokens(truncated),
+        budget,
+    )
+    return truncated
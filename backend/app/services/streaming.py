@@ -0,0 +1,50 @@
+"""Streaming helpers – first-token priming and Server-Sent Events framing.
+
+Provider streams are *primed*: :func:`prime` waits for the first text chunk
+before handing the stream back. Anything that fails before the first token
+(rate limit, open breaker, connection error, exhausted retries) therefore
+raises to the caller, which can still fall back to the other provider.
+Once the first token is out, the answer is committed to that provider.
+"""
+
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+
+async def prime(chunks: AsyncIterator[str]) -> AsyncIterator[str]:
+    """Wait for the first non-empty chunk of *chunks*; return the full stream.
+
+    Raises whatever the stream raises before its first chunk. An empty
+    stream yields nothing.
+    """
+    iterator = aiter(chunks)
+    first = None
+    async for chunk in iterator:
+        if chunk:
+            first = chunk
+            break
+
+    async def _replay() -> AsyncIterator[str]:
+        try:
+            if first is None:
+                return
+            yield first
+            async for chunk in iterator:
+                if chunk:
+                    yield chunk
+        finally:
+            # Closing the replay closes the provider stream, so its cleanup
+            # runs on client disconnect rather than at garbage collection.
+            await iterator.aclose()
+
+    return _replay()
+
+
+def sse_event(data: Any, event: str | None = None) -> str:
+    """Frame *data* (JSON-encoded) as one Server-Sent Event."""
+    lines = [f"event: {event}"] if event else []
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
@@ -1,8 +1,22 @@
-"""Persistent ChromaDB vector store for AI policy documents."""
+"""Persistent ChromaDB vector store for AI policy documents.
+
+``VECTOR_STORE_BACKEND=numpy`` swaps in the in-memory exact-search
+:class:`~app.services.numpy_vector_store.NumpyPolicyVectorStore` (same
+interface, persisted under ``POLICY_INDEX_DIRECTORY``).
+
+The app shares one warm store per process: :func:`open_policy_store` opens
+it in the FastAPI ``lifespan`` and runs a first query, so the collection and
+its index are loaded before the first job. Jobs take it from
+:func:`get_policy_store` (created lazily outside the app, as in scripts and
+tests); both backends are thread-safe, so concurrent jobs query it directly.
+"""
 
 from __future__ import annotations
 
+import logging
 import sys
+import threading
+import time
 
 # ---------------------------------------------------------------------------
 # Monkey-patch pydantic v1 shim so chromadb can load on Python ≥ 3.14
@@ -35,7 +49,9 @@ if sys.version_info >= (3, 14):  # pragma: no cover
     except Exception:
         pass
 
-import chromadb
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
 
 
 class PolicyVectorStore:
@@ -44,6 +60,9 @@ class PolicyVectorStore:
     COLLECTION_NAME = "ai_policies"
 
     def __init__(self, persist_directory: str = "./chroma_data") -> None:
+        # Imported here so the NumPy backend never loads chromadb
+        import chromadb
+
         self._client = chromadb.PersistentClient(path=persist_directory)
         self._collection = self._client.get_or_create_collection(
             name=self.COLLECTION_NAME,
@@ -58,7 +77,26 @@ class PolicyVectorStore:
             embeddings=[embedding],
         )
 
+    def add_policies(self, policies: list[tuple[str, str, list[float]]]) -> None:
+        """Upsert several ``(id, text, embedding)`` policies in one call."""
+        if not policies:
+            return
+        ids, texts, embeddings = zip(*policies)
+        self._collection.upsert(ids=list(ids), documents=list(texts), embeddings=list(embeddings))
+
     # ── read ─────────────────────────────────────────────────
+    def count(self) -> int:
+        """Number of stored policies."""
+        return self._collection.count()
+
+    def warm(self) -> int:
+        """Load the collection into memory with a throwaway query; return the policy count."""
+        sample = self._collection.peek(limit=1)
+        embeddings = sample.get("embeddings")
+        if embeddings is not None and len(embeddings):
+            self.search(query_embedding=list(embeddings[0]), top_k=1)
+        return self.count()
+
     def search(
         self,
         query_embedding: list[float],
@@ -68,21 +106,37 @@ class PolicyVectorStore:
 
         Each result dict contains ``id``, ``document``, and ``distance``.
         """
+        return self.search_many([query_embedding], top_k=top_k)[0]
+
+    def search_many(
+        self,
+        query_embeddings: list[list[float]],
+        top_k: int = 5,
+    ) -> list[list[dict]]:
+        """Run every query in one collection call; return each query's hits in input order.
+
+        Each hit has the same ``id`` / ``document`` / ``distance`` shape as :meth:`search`.
+        """
+        if not query_embeddings:
+            return []
         results = self._collection.query(
-            query_embeddings=[query_embedding],
+            query_embeddings=list(query_embeddings),
             n_results=top_k,
         )
 
-        hits: list[dict] = []
-        for idx in range(len(results["ids"][0])):
-            hits.append(
-                {
-                    "id": results["ids"][0][idx],
-                    "document": results["documents"][0][idx],
-                    "distance": results["distances"][0][idx],
-                }
-            )
-        return hits
+        batches: list[list[dict]] = []
+        for q in range(len(query_embeddings)):
+            hits: list[dict] = []
+            for idx in range(len(results["ids"][q])):
+                hits.append(
+                    {
+                        "id": results["ids"][q][idx],
+                        "document": results["documents"][q][idx],
+                        "distance": results["distances"][q][idx],
+                    }
+                )
+            batches.append(hits)
+        return batches
 
     # ── convenience ──────────────────────────────────────────
     async def get_relevant_policies(
@@ -101,3 +155,62 @@ class PolicyVectorStore:
         query_embedding = await engine.get_embedding(project_description)
         hits = self.search(query_embedding=query_embedding, top_k=top_k)
         return [h["document"] for h in hits]
+
+
+# ── Process-wide store ───────────────────────────────────────
+_store: PolicyVectorStore | None = None
+_store_lock = threading.Lock()
+_status: dict = {"ready": False, "policies": None, "warm_ms": None, "error": None}
+
+
+def _build_store() -> PolicyVectorStore:
+    backend = settings.VECTOR_STORE_BACKEND
+    if backend == "chroma":
+        return PolicyVectorStore(persist_directory=settings.CHROMA_PERSIST_DIRECTORY)
+    if backend == "numpy":
+        from app.services.numpy_vector_store import NumpyPolicyVectorStore
+
+        return NumpyPolicyVectorStore(persist_directory=settings.POLICY_INDEX_DIRECTORY)  # type: ignore[return-value]
+    raise ValueError(f"Unknown VECTOR_STORE_BACKEND {backend!r} (expected 'chroma' or 'numpy')")
+
+
+def get_policy_store() -> PolicyVectorStore:
+    """Return the shared store for ``VECTOR_STORE_BACKEND``, opening it on first use."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = _build_store()
+        return _store
+
+
+def open_policy_store() -> PolicyVectorStore | None:
+    """Open and warm the shared store (called from the app lifespan).
+
+    Failures are logged and reported by :func:`policy_store_status` rather
+    than raised, so the rest of the API still starts.
+    """
+    started = time.perf_counter()
+    try:
+        store = get_policy_store()
+        policies = store.warm()
+    except Exception as exc:
+        logger.error("Policy vector store could not be opened: %s", exc)
+        _status.update(ready=False, policies=None, warm_ms=None, error=str(exc))
+        return None
+    warm_ms = round((time.perf_counter() - started) * 1000, 1)
+    _status.update(ready=True, policies=policies, warm_ms=warm_ms, error=None)
+    logger.info("Policy vector store ready (%d policies, warmed in %.0f ms)", policies, warm_ms)
+    return store
+
+
+def close_policy_store() -> None:
+    """Drop the shared store; a later :func:`get_policy_store` opens a fresh one."""
+    global _store
+    with _store_lock:
+        _store = None
+    _status.update(ready=False, policies=None, warm_ms=None, error=None)
+
+
+def policy_store_status() -> dict:
+    """Readiness of the shared store: ``ready``, ``policies``, ``warm_ms`` and ``error``."""
+    return dict(_status)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""Back-fill PDF analyses for a directory or manifest of documents.
+
+Runs text extraction and LLM analysis as bounded concurrent stages and
+appends one NDJSON line per document. Re-running with the same output file
+resumes: documents already recorded as successful are skipped.
+
+Usage (from the backend/ directory):
+    python -m scripts.bulk_ingest ./archive --output results.ndjson
+    python -m scripts.bulk_ingest manifest.txt --analysis-concurrency 16
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Ensure the backend package is importable when running as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.config import settings
+from app.services.bulk_ingest import discover_pdfs, run_bulk_ingest
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("source", help="Directory of PDFs or a manifest file (one path per line)")
+    parser.add_argument("--output", default="bulk_ingest.ndjson", help="NDJSON results file (appended to)")
+    parser.add_argument("--long-document", action="store_true", help="Analyse full text in chunks")
+    parser.add_argument("--extract-concurrency", type=int, default=settings.BULK_EXTRACT_CONCURRENCY)
+    parser.add_argument("--analysis-concurrency", type=int, default=settings.BULK_ANALYSIS_CONCURRENCY)
+    return parser.parse_args(argv)
+
+
+async def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    paths = discover_pdfs(args.source)
+    print(f"Ingesting {len(paths)} PDFs from {args.source} → {args.output} …")
+
+    summary = await run_bulk_ingest(
+        paths,
+        args.output,
+        long_document=args.long_document or None,
+        extract_concurrency=args.extract_concurrency,
+        analysis_concurrency=args.analysis_concurrency,
+    )
+    print(
+        f"Done – {summary['succeeded']} succeeded, {summary['failed']} failed, "
+        f"{summary['skipped']} already done (of {summary['total']})"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
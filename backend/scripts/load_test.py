@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+"""Load-test /generate against the offline stub provider.
+
+Forces ``LLM_PROVIDER_BACKEND=stub`` and drives the in-process app with
+concurrent requests, so the numbers reflect the pipeline's own overhead
+(routing, rate limiting, breakers, retries, coalescing) on top of the
+simulated provider latency – no network or provider quota is used.
+
+Usage (from the backend/ directory):
+    python -m scripts.load_test --requests 500 --concurrency 50
+    python -m scripts.load_test --error-rate 0.05 --latency 0.8 --stream
+    python -m scripts.load_test --no-rate-limits   # measure overhead without RPM queueing
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Ensure the backend package is importable when running as a script
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import httpx
+
+from app.core.config import settings
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Total /generate requests")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight at once")
+    parser.add_argument("--distinct-prompts", type=int, default=0, help="Cycle N prompts (0 = all distinct)")
+    parser.add_argument("--stream", action="store_true", help="Use streamed (SSE) responses")
+    parser.add_argument("--latency", type=float, default=settings.STUB_LATENCY_SECONDS)
+    parser.add_argument("--error-rate", type=float, default=settings.STUB_ERROR_RATE)
+    parser.add_argument("--rate-limit-rate", type=float, default=settings.STUB_RATE_LIMIT_RATE)
+    parser.add_argument("--seed", type=int, default=settings.STUB_SEED)
+    parser.add_argument("--no-rate-limits", action="store_true", help="Disable client-side RPM / TPM limits")
+    return parser.parse_args(argv)
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(pct / 100 * len(ordered)))]
+
+
+async def main(argv: list[str] | None = None) -> None:
+    args = _parse_args(argv)
+    settings.LLM_PROVIDER_BACKEND = "stub"
+    settings.STUB_LATENCY_SECONDS = args.latency
+    settings.STUB_ERROR_RATE = args.error_rate
+    settings.STUB_RATE_LIMIT_RATE = args.rate_limit_rate
+    settings.STUB_SEED = args.seed
+    if args.no_rate_limits:
+        settings.RATE_LIMIT_ENABLED = False
+
+    from app.main import app
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+
+    async def _one(client: httpx.AsyncClient, i: int) -> None:
+        prompt = f"load test prompt {i % args.distinct_prompts if args.distinct_prompts else i}"
+        async with semaphore:
+            started = time.perf_counter()
+            response = await client.post("/api/v1/generate", json={"prompt": prompt, "stream": args.stream})
+            latencies.append(time.perf_counter() - started)
+        statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    print(
+        f"{args.requests} requests, concurrency {args.concurrency}, stub latency {args.latency}s, "
+        f"errors {args.error_rate:.0%}, 429s {args.rate_limit_rate:.0%} …"
+    )
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(_one(client, i) for i in range(args.requests)))
+        elapsed = time.perf_counter() - started
+
+    print(f"\nDone in {elapsed:.2f}s – {args.requests / elapsed:.1f} req/s")
+    print(f"  status codes: {dict(sorted(statuses.items()))}")
+    print(
+        f"  latency: p50={_percentile(latencies, 50) * 1000:.0f}ms  "
+        f"p95={_percentile(latencies, 95) * 1000:.0f}ms  "
+        f"p99={_percentile(latencies, 99) * 1000:.0f}ms  "
+        f"mean={statistics.mean(latencies) * 1000:.0f}ms"
+    )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -19,7 +19,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
 
 from app.core.config import settings
 from app.services.ai_engine import AzureAIEngine
-from app.services.vector_store import PolicyVectorStore
+from app.services.vector_store import get_policy_store
 
 # ── Internal AI-ethics rules ─────────────────────────────────
 _ETHICS_POLICIES: list[dict[str, str]] = [
@@ -109,23 +109,26 @@ POLICIES: list[dict[str, str]] = _ETHICS_POLICIES + _REGULATORY_POLICIES
 
 async def main() -> None:
     engine = AzureAIEngine()
-    store = PolicyVectorStore(persist_directory=settings.CHROMA_PERSIST_DIRECTORY)
+    store = get_policy_store()
 
-    print(f"Seeding {len(POLICIES)} AI-ethics rules into ChromaDB …\n")
-    for policy in POLICIES:
-        print(f"  → embedding '{policy['id']}' …", end=" ", flush=True)
-        embedding = await engine.get_embedding(policy["text"])
-        store.add_policy(id=policy["id"], text=policy["text"], embedding=embedding)
-        print(f"done  (dim={len(embedding)})")
+    print(f"Seeding {len(POLICIES)} AI-ethics rules into the {settings.VECTOR_STORE_BACKEND} policy store …\n")
+    embeddings = await engine.get_embeddings([policy["text"] for policy in POLICIES])
+    store.add_policies([(policy["id"], policy["text"], embedding) for policy, embedding in zip(POLICIES, embeddings)])
+    for policy, embedding in zip(POLICIES, embeddings):
+        print(f"  → stored '{policy['id']}'  (dim={len(embedding)})")
 
-    # Quick sanity check – search with the first policy's own text
+    # Quick sanity check – search with the first policy's own text (cached)
     query_embedding = await engine.get_embedding(POLICIES[0]["text"])
     hits = store.search(query_embedding=query_embedding, top_k=min(len(POLICIES), 5))
     print(f"\nSanity search (top {len(hits)} for '{POLICIES[0]['id']}'):")
     for h in hits:
         print(f"  {h['id']}  dist={h['distance']:.4f}  {h['document'][:60]}…")
 
-    print(f"\nDone – {len(POLICIES)} policies persisted to {settings.CHROMA_PERSIST_DIRECTORY}")
+    if settings.VECTOR_STORE_BACKEND == "numpy":
+        directory = settings.POLICY_INDEX_DIRECTORY
+    else:
+        directory = settings.CHROMA_PERSIST_DIRECTORY
+    print(f"\nDone – {len(POLICIES)} policies persisted to {directory}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,42 @@
+"""Shared test configuration and fixtures."""
+
+import os
+
+import pytest
+from pypdf import PdfWriter
+from pypdf.generic import DecodedStreamObject, DictionaryObject, NameObject
+
+# Keep the suite hermetic: the embedding / PDF caches default to ./cache,
+# so run them memory-only unless a test builds its own TwoLevelCache on tmp_path.
+os.environ.setdefault("EMBEDDING_CACHE_DIRECTORY", "")
+os.environ.setdefault("PDF_CACHE_DIRECTORY", "")
+
+
+def _write_text_pdf(path, page_texts: list[str]) -> str:
+    """Write a PDF with one line of Helvetica text per page."""
+    writer = PdfWriter()
+    font = writer._add_object(
+        DictionaryObject(
+            {
+                NameObject("/Type"): NameObject("/Font"),
+                NameObject("/Subtype"): NameObject("/Type1"),
+                NameObject("/BaseFont"): NameObject("/Helvetica"),
+            }
+        )
+    )
+    for text in page_texts:
+        page = writer.add_blank_page(width=612, height=792)
+        stream = DecodedStreamObject()
+        stream.set_data(f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode())
+        page[NameObject("/Contents")] = writer._add_object(stream)
+        page[NameObject("/Resources")] = DictionaryObject(
+            {NameObject("/Font"): DictionaryObject({NameObject("/F1"): font})}
+        )
+    writer.write(str(path))
+    return str(path)
+
+
+@pytest.fixture
+def text_pdf(tmp_path):
+    """Factory: ``text_pdf(name, page_texts)`` writes a real text PDF under tmp_path and returns its path."""
+    return lambda name, page_texts: _write_text_pdf(tmp_path / name, page_texts)
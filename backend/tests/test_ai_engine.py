@@ -19,6 +19,15 @@ def _mock_embedding_response(embedding: list[float] | None = None):
     return SimpleNamespace(data=[datum], model=EMBEDDING_MODEL, usage=SimpleNamespace(prompt_tokens=5, total_tokens=5))
 
 
+@pytest.fixture(autouse=True)
+def _clear_embedding_cache():
+    from app.services import ai_engine
+
+    ai_engine._embedding_cache.clear()
+    yield
+    ai_engine._embedding_cache.clear()
+
+
 # ── Tests ────────────────────────────────────────────────────
 
 @pytest.mark.asyncio
@@ -94,3 +103,89 @@ async def test_get_embedding_empty_string():
 
     engine._client.embeddings.create.assert_awaited_once_with(model=EMBEDDING_MODEL, input="")
     assert result == FAKE_EMBEDDING
+
+
+# ── Embedding cache ──────────────────────────────────────────
+
+@pytest.mark.asyncio
+async def test_get_embedding_serves_repeats_from_cache():
+    """Identical text is embedded once; the repeat is a cache hit."""
+    from app.services.ai_engine import embedding_cache_stats
+
+    engine = AzureAIEngine()
+    engine._client.embeddings.create = AsyncMock(return_value=_mock_embedding_response())
+    before = embedding_cache_stats()
+
+    first = await engine.get_embedding("repeated project description")
+    second = await engine.get_embedding("repeated project description")
+
+    assert first == FAKE_EMBEDDING
+    # The memory tier holds float32 – the hit is a fresh copy at that precision
+    assert second == pytest.approx(FAKE_EMBEDDING, rel=1e-6)
+    second.append(9.9)
+    assert len(await engine.get_embedding("repeated project description")) == len(FAKE_EMBEDDING)
+    engine._client.embeddings.create.assert_awaited_once()
+    after = embedding_cache_stats()
+    assert after["memory_hits"] == before["memory_hits"] + 2
+    assert after["misses"] == before["misses"] + 1
+
+
+def test_embedding_disk_codec_is_float32():
+    """Vectors are stored as 4-byte floats and round-trip at float32 precision."""
+    from app.services.ai_engine import _decode_vector, _encode_vector
+
+    data = _encode_vector([0.1] * 1536)
+
+    assert len(data) == 1536 * 4
+    assert _decode_vector(data) == pytest.approx([0.1] * 1536, rel=1e-6)
+
+
+# ── Batched embeddings ───────────────────────────────────────
+
+def _mock_batch_create():
+    """Fake embeddings.create that embeds each input as [len(text)], reversed order."""
+
+    async def create(model, input):
+        data = [SimpleNamespace(embedding=[float(len(text))], index=i) for i, text in enumerate(input)]
+        return SimpleNamespace(data=list(reversed(data)), usage=SimpleNamespace(total_tokens=len(input)))
+
+    return AsyncMock(side_effect=create)
+
+
+def test_pack_batches_respects_item_and_token_limits():
+    from app.services.ai_engine import _pack_batches
+
+    texts = ["a" * 40, "b" * 40, "c" * 40, "d" * 400, "e"]  # 10, 10, 10, 100, 1 tokens
+
+    assert _pack_batches(texts, max_items=2, max_tokens=1_000) == [[0, 1], [2, 3], [4]]
+    assert _pack_batches(texts, max_items=10, max_tokens=30) == [[0, 1, 2], [3], [4]]
+
+
+@pytest.mark.asyncio
+async def test_get_embeddings_batches_and_preserves_order(monkeypatch):
+    """Inputs are packed into batches; vectors come back in input order."""
+    from app.services import ai_engine
+
+    monkeypatch.setattr(ai_engine.settings, "EMBEDDING_BATCH_SIZE", 2)
+    engine = AzureAIEngine()
+    engine._client.embeddings.create = _mock_batch_create()
+    texts = ["a", "bb", "ccc", "dddd", "eeeee"]
+
+    vectors = await engine.get_embeddings(texts)
+
+    assert vectors == [[1.0], [2.0], [3.0], [4.0], [5.0]]
+    assert engine._client.embeddings.create.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_get_embeddings_skips_cached_and_duplicate_texts():
+    """Only unique, uncached texts reach the API."""
+    engine = AzureAIEngine()
+    engine._client.embeddings.create = _mock_batch_create()
+    await engine.get_embeddings(["policy one"])
+
+    vectors = await engine.get_embeddings(["policy one", "policy two!", "policy two!"])
+
+    assert vectors == [[10.0], [11.0], [11.0]]
+    last_call = engine._client.embeddings.create.await_args
+    assert last_call.kwargs["input"] == ["policy two!"]
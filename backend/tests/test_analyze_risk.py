@@ -125,3 +125,108 @@ async def test_analyze_risk_propagates_api_error():
 
     with pytest.raises(RuntimeError, match="service down"):
         await engine.analyze_risk(SAMPLE_PROJECT, SAMPLE_POLICIES)
+
+
+# ── Prompt-cache friendly layout ─────────────────────────────
+async def test_analyze_risk_prompt_has_stable_policy_prefix():
+    """Policies come first in canonical order, so the prefix is identical across jobs."""
+    engine = AzureAIEngine()
+    engine._client.chat.completions.create = AsyncMock(return_value=_mock_chat_response())
+
+    await engine.analyze_risk(SAMPLE_PROJECT, SAMPLE_POLICIES)
+    await engine.analyze_risk({"project_name": "Other"}, list(reversed(SAMPLE_POLICIES)))
+
+    first, second = (
+        call.kwargs["messages"] for call in engine._client.chat.completions.create.call_args_list
+    )
+    assert first[0] == second[0]
+    prefix_first = first[1]["content"].split("## Project context")[0]
+    prefix_second = second[1]["content"].split("## Project context")[0]
+    assert prefix_first == prefix_second
+    assert first[1]["content"].index("No PII allowed") < first[1]["content"].index("Test Project")
+
+
+async def test_analyze_risk_records_cached_prompt_tokens():
+    """Cached-token counts reported by the provider are recorded in telemetry."""
+    from app.core.telemetry import job_telemetry
+    from app.services.ai_engine import RISK_ANALYSIS_MODEL, prompt_cache_stats
+
+    response = _mock_chat_response()
+    response.usage = SimpleNamespace(
+        prompt_tokens=2_000,
+        total_tokens=2_100,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=1_536),
+    )
+    engine = AzureAIEngine()
+    engine._client.chat.completions.create = AsyncMock(return_value=response)
+    before = prompt_cache_stats()
+
+    with job_telemetry("cached-prompt") as job:
+        await engine.analyze_risk({"project_name": "Cached"}, SAMPLE_POLICIES)
+
+    model = job.snapshot()["models"][RISK_ANALYSIS_MODEL]
+    assert (model["calls"], model["prompt_tokens"], model["cached_tokens"]) == (1, 2_000, 1_536)
+    # /health/caches reads the same process-wide telemetry
+    after = prompt_cache_stats()
+    assert after["calls"] == before["calls"] + 1
+    assert after["cached_tokens"] - before["cached_tokens"] == 1_536
+
+
+# ── Per-framework fan-out ────────────────────────────────────
+POLICY_HITS = [
+    {"id": "eu-ai-act-001", "document": "Subliminal manipulation is prohibited."},
+    {"id": "ethics-002", "document": "AI systems must be regularly audited for bias."},
+    {"id": "nist-ai-rmf-001", "document": "Accountability structures must be in place."},
+    {"id": "eu-ai-act-002", "document": "High-risk systems need human oversight."},
+]
+
+
+def test_policies_are_grouped_by_framework():
+    from app.services.ai_engine import group_policies_by_framework
+
+    groups = group_policies_by_framework(POLICY_HITS)
+
+    assert list(groups) == ["EU AI Act", "Internal ethics", "NIST AI RMF"]
+    assert groups["EU AI Act"] == [POLICY_HITS[0]["document"], POLICY_HITS[3]["document"]]
+
+
+def test_merge_risks_dedupes_by_category_and_reason_similarity():
+    from app.services.ai_engine import merge_risks
+
+    eu = [{"category": "Data Privacy", "severity": "medium", "reason": "PII is stored without encryption."}]
+    nist = [
+        {"category": "data privacy", "severity": "high", "reason": "PII is stored without any encryption"},
+        {"category": "Data Privacy", "severity": "low", "reason": "No retention schedule for logs."},
+        {"category": "Bias", "severity": "medium", "reason": "PII is stored without encryption."},
+    ]
+
+    merged = merge_risks([eu, nist])
+
+    assert [(r["category"], r["severity"]) for r in merged] == [
+        ("Data Privacy", "high"),
+        ("Data Privacy", "low"),
+        ("Bias", "medium"),
+    ]
+    assert merge_risks([nist, eu])[0]["category"] == "data privacy"
+    assert eu[0]["severity"] == "medium"  # inputs are not mutated
+
+
+async def test_analyze_risk_by_framework_runs_one_call_per_framework():
+    def _reply(**kwargs):
+        policies = kwargs["messages"][1]["content"].split("## Project context")[0]
+        category = "Prohibited Practice" if "Subliminal" in policies else "Accountability"
+        risk = {"category": category, "severity": "high", "reason": "Shared finding."}
+        return _mock_chat_response(json.dumps({"risks": [risk, {**risk, "category": "Bias"}]}))
+
+    engine = AzureAIEngine()
+    engine._client.chat.completions.create = AsyncMock(side_effect=_reply)
+
+    result = await engine.analyze_risk_by_framework(SAMPLE_PROJECT, POLICY_HITS)
+
+    assert engine._client.chat.completions.create.await_count == 3
+    categories = [r["category"] for r in result["risks"]]
+    assert categories == ["Prohibited Practice", "Bias", "Accountability"]
+
+    engine._client.chat.completions.create.reset_mock()
+    await engine.analyze_risk_by_framework(SAMPLE_PROJECT, POLICY_HITS[:1])
+    assert engine._client.chat.completions.create.await_count == 1
@@ -1,3 +1,4 @@
+import json
 import logging
 import uuid
 from contextlib import contextmanager
@@ -83,12 +84,17 @@ async def test_empty_vector_store_emits_warning(caplog):
         patch("app.services.git_scanner.clone_repo_context", side_effect=fake_clone_ctx),
         patch("app.services.git_scanner.list_files", return_value=["README.md"]),
         patch("app.services.git_scanner.scan_secrets", return_value=mock_scan),
-        patch("app.services.pdf_parser.parse_pdf", return_value=mock_pdf),
+        patch("app.services.pdf_parser.parse_pdf_async", new=AsyncMock(return_value=mock_pdf)),
         patch("app.services.ai_engine.AzureAIEngine", return_value=mock_engine_instance),
-        patch("app.services.vector_store.PolicyVectorStore", return_value=mock_store_instance),
+        patch("app.services.vector_store.get_policy_store", return_value=mock_store_instance),
         patch("app.services.opa_client.OPAGatekeeper", return_value=mock_opa_instance),
         caplog.at_level(logging.WARNING, logger="app.main"),
     ):
         await run_assessment(str(job_id), "/tmp/fake.pdf", "https://github.com/owner/repo")
 
     assert "No relevant policies retrieved from the vector store" in caplog.text
+
+    # Provider telemetry is attached to the persisted result
+    with Session(engine) as session:
+        result = json.loads(session.get(AssessmentJob, job_id).result_json)
+    assert result["telemetry"]["totals"]["calls"] == 0
@@ -0,0 +1,239 @@
+"""Tests for backend/app/services/bulk_ingest.py and POST /api/v1/ingest/bulk."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import bulk_ingest
+from app.services.bulk_ingest import discover_pdfs, load_completed, run_bulk_ingest
+from app.services.pdf_parser import PreparedPdf
+
+client = TestClient(app)
+
+
+def _make_archive(tmp_path):
+    archive = tmp_path / "archive"
+    (archive / "nested").mkdir(parents=True)
+    for name in ("a.pdf", "nested/b.PDF", "c.pdf"):
+        (archive / name).write_bytes(b"%PDF-1.4 fake")
+    (archive / "notes.txt").write_text("not a pdf")
+    return archive
+
+
+async def _fake_prepare(path, long_document=None):
+    await asyncio.sleep(0)
+    if path.endswith("c.pdf"):
+        raise ValueError("PDF contains no extractable text.")
+    return PreparedPdf(path, f"sha-{path[-5:]}", "key", False, text="text")
+
+
+async def _fake_analyse(prepared):
+    await asyncio.sleep(0)
+    return {"project_purpose": f"Purpose of {prepared.file_path[-5:]}", "source": "azure-openai"}
+
+
+# ── Discovery ────────────────────────────────────────────────
+def test_discover_pdfs_from_directory(tmp_path):
+    archive = _make_archive(tmp_path)
+
+    paths = discover_pdfs(str(archive))
+
+    assert [p.name for p in paths] == ["a.pdf", "c.pdf", "b.PDF"]
+
+
+def test_discover_pdfs_from_manifest(tmp_path):
+    archive = _make_archive(tmp_path)
+    manifest = archive / "manifest.txt"
+    manifest.write_text("# back-fill batch 1\na.pdf\n\n" + str(archive / "c.pdf") + "\n")
+
+    paths = discover_pdfs(str(manifest))
+
+    assert paths == [archive / "a.pdf", archive / "c.pdf"]
+
+
+# ── Pipeline ─────────────────────────────────────────────────
+async def test_run_bulk_ingest_writes_ndjson_and_resumes(tmp_path):
+    archive = _make_archive(tmp_path)
+    output = tmp_path / "out" / "results.ndjson"
+    paths = discover_pdfs(str(archive))
+
+    with (
+        patch.object(bulk_ingest, "prepare_pdf_async", side_effect=_fake_prepare),
+        patch.object(bulk_ingest, "analyse_pdf_async", side_effect=_fake_analyse) as mock_analyse,
+    ):
+        first = await run_bulk_ingest(paths, str(output), extract_concurrency=2, analysis_concurrency=2)
+        second = await run_bulk_ingest(paths, str(output), extract_concurrency=2, analysis_concurrency=2)
+
+    assert first == {"total": 3, "skipped": 0, "succeeded": 2, "failed": 1}
+    # Only the failed document is retried on the second run
+    assert second == {"total": 3, "skipped": 2, "succeeded": 0, "failed": 1}
+    assert mock_analyse.call_count == 2
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    ok = {r["path"]: r for r in records if r["status"] == "ok"}
+    assert set(ok) == {str(archive / "a.pdf"), str(archive / "nested" / "b.PDF")}
+    assert ok[str(archive / "a.pdf")]["result"]["project_purpose"] == "Purpose of a.pdf"
+    assert load_completed(str(output)) == set(ok)
+
+
+async def test_run_bulk_ingest_stops_when_the_analysers_die(tmp_path):
+    """A failing output write kills the analysers; blocked extractors are cancelled, not left hanging."""
+    archive = tmp_path / "archive"
+    archive.mkdir()
+    for i in range(8):
+        (archive / f"doc{i}.pdf").write_bytes(b"%PDF-1.4 fake")
+    output = tmp_path / "results.ndjson"
+
+    def full_disk(out, line):
+        raise OSError("No space left on device")
+
+    with (
+        patch.object(bulk_ingest, "prepare_pdf_async", side_effect=_fake_prepare),
+        patch.object(bulk_ingest, "analyse_pdf_async", side_effect=_fake_analyse),
+        patch.object(bulk_ingest, "_append_line", side_effect=full_disk),
+        pytest.raises(ExceptionGroup) as excinfo,
+    ):
+        await asyncio.wait_for(
+            run_bulk_ingest(discover_pdfs(str(archive)), str(output), extract_concurrency=4, analysis_concurrency=1),
+            timeout=5,
+        )
+
+    assert excinfo.value.subgroup(OSError) is not None
+    # The output file is free for the next run
+    bulk_ingest.claim_output(str(output))
+    bulk_ingest.release_output(str(output))
+
+
+async def test_one_run_per_output_file(tmp_path):
+    output = str(tmp_path / "results.ndjson")
+    bulk_ingest.claim_output(output)
+    try:
+        with pytest.raises(bulk_ingest.BulkIngestBusyError):
+            await run_bulk_ingest([], output)
+    finally:
+        bulk_ingest.release_output(output)
+
+    assert await run_bulk_ingest([], output) == {"total": 0, "skipped": 0, "succeeded": 0, "failed": 0}
+
+
+# ── Endpoint ─────────────────────────────────────────────────
+@pytest.fixture()
+def bulk_root(tmp_path, monkeypatch):
+    from app.api import routes
+
+    monkeypatch.setattr(routes.settings, "BULK_INGEST_ROOT", str(tmp_path))
+    yield tmp_path
+    # run_bulk_ingest is mocked out, so nothing releases the scheduled runs' outputs
+    bulk_ingest._active_outputs.clear()
+
+
+def test_ingest_bulk_endpoint_schedules_run(bulk_root):
+    archive = _make_archive(bulk_root)
+
+    with patch("app.services.bulk_ingest.run_bulk_ingest", new=AsyncMock()) as mock_run:
+        response = client.post("/api/v1/ingest/bulk", json={"source": str(archive)})
+
+    assert response.status_code == 202
+    data = response.json()
+    assert data["documents"] == 3
+    assert data["already_done"] == 0
+    assert data["output_path"] == str(archive.resolve() / "bulk_ingest.ndjson")
+    mock_run.assert_awaited_once()
+
+
+def test_ingest_bulk_resolves_relative_paths_against_the_root(bulk_root, tmp_path_factory, monkeypatch):
+    archive = _make_archive(bulk_root)
+    monkeypatch.chdir(tmp_path_factory.mktemp("elsewhere"))
+
+    with patch("app.services.bulk_ingest.run_bulk_ingest", new=AsyncMock()) as mock_run:
+        response = client.post("/api/v1/ingest/bulk", json={"source": "archive", "output_path": "out/run.ndjson"})
+
+    assert response.status_code == 202
+    assert response.json()["documents"] == 3
+    assert response.json()["output_path"] == str(bulk_root.resolve() / "out" / "run.ndjson")
+    assert mock_run.await_args.args[0][0].is_relative_to(archive.resolve())
+
+
+def test_ingest_bulk_rejects_a_second_run_for_the_same_output(bulk_root):
+    archive = _make_archive(bulk_root)
+
+    with patch("app.services.bulk_ingest.run_bulk_ingest", new=AsyncMock()):
+        first = client.post("/api/v1/ingest/bulk", json={"source": str(archive)})
+        second = client.post("/api/v1/ingest/bulk", json={"source": str(archive)})
+
+    assert first.status_code == 202
+    assert second.status_code == 409
+
+
+def test_ingest_bulk_is_refused_without_a_root(tmp_path, monkeypatch):
+    from app.api import routes
+
+    monkeypatch.setattr(routes.settings, "BULK_INGEST_ROOT", "")
+
+    with patch("app.services.bulk_ingest.run_bulk_ingest", new=AsyncMock()) as mock_run:
+        response = client.post("/api/v1/ingest/bulk", json={"source": str(_make_archive(tmp_path))})
+
+    assert response.status_code == 403
+    assert "BULK_INGEST_ROOT" in response.json()["detail"]
+    mock_run.assert_not_awaited()
+
+
+def test_ingest_bulk_rejects_missing_source(bulk_root):
+    response = client.post("/api/v1/ingest/bulk", json={"source": str(bulk_root / "missing")})
+
+    assert response.status_code == 400
+
+
+def test_ingest_bulk_enforces_root(tmp_path, monkeypatch):
+    from app.api import routes
+
+    monkeypatch.setattr(routes.settings, "BULK_INGEST_ROOT", str(tmp_path / "allowed"))
+
+    response = client.post("/api/v1/ingest/bulk", json={"source": str(_make_archive(tmp_path))})
+
+    assert response.status_code == 400
+    assert "must be inside" in response.json()["detail"]
+
+
+def test_ingest_bulk_confines_manifest_entries_and_output(tmp_path, monkeypatch):
+    """``../`` and absolute manifest entries, and the output path, may not leave the root."""
+    from app.api import routes
+
+    root = tmp_path / "allowed"
+    root.mkdir()
+    (tmp_path / "secret.pdf").write_bytes(b"%PDF-1.4 fake")
+    (root / "inside.pdf").write_bytes(b"%PDF-1.4 fake")
+    monkeypatch.setattr(routes.settings, "BULK_INGEST_ROOT", str(root))
+
+    with patch("app.services.bulk_ingest.run_bulk_ingest", new=AsyncMock()) as mock_run:
+        for entry in ("../secret.pdf", str(tmp_path / "secret.pdf")):
+            manifest = root / "manifest.txt"
+            manifest.write_text(f"inside.pdf\n{entry}\n")
+            response = client.post("/api/v1/ingest/bulk", json={"source": str(manifest)})
+            assert response.status_code == 400
+            assert "must be inside" in response.json()["detail"]
+
+        manifest.write_text("inside.pdf\n")
+        response = client.post(
+            "/api/v1/ingest/bulk",
+            json={"source": str(manifest), "output_path": str(root / ".." / "out.ndjson")},
+        )
+        assert response.status_code == 400
+        assert "must be inside" in response.json()["detail"]
+
+    mock_run.assert_not_awaited()
+
+
+def test_discover_pdfs_rejects_paths_outside_root(tmp_path):
+    root = tmp_path / "allowed"
+    root.mkdir()
+    manifest = tmp_path / "manifest.txt"
+    manifest.write_text("allowed/a.pdf\nallowed/../secret.pdf\n")
+
+    assert discover_pdfs(str(manifest))[1] == (tmp_path / "secret.pdf").resolve()
+    with pytest.raises(ValueError, match="outside"):
+        discover_pdfs(str(manifest), root=root.resolve())
@@ -0,0 +1,118 @@
+"""Tests for backend/app/core/cache.py"""
+
+import pytest
+
+from app.core.cache import TwoLevelCache, make_key
+
+
+def test_make_key_is_stable_and_order_sensitive():
+    assert make_key("text", "abc", 12_000) == make_key("text", "abc", 12_000)
+    assert make_key("a", "b") != make_key("b", "a")
+    assert make_key("ab", "c") != make_key("a", "bc")
+
+
+def test_memory_tier_evicts_least_recently_used():
+    cache = TwoLevelCache("test", max_items=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_encoded_memory_tier_returns_copies():
+    cache = TwoLevelCache("emb", max_items=2, encode_memory=True)
+    value = {"vector": [1.0, 2.0]}
+    cache.set("k", value)
+    value["vector"].append(3.0)
+
+    first = cache.get("k")
+    first["vector"].clear()
+
+    assert cache.get("k") == {"vector": [1.0, 2.0]}
+    assert isinstance(cache._memory["k"], bytes)
+
+
+async def test_async_accessors_run_disk_io_in_a_worker_thread(tmp_path, monkeypatch):
+    import threading
+
+    cache = TwoLevelCache("emb", directory=str(tmp_path), max_items=1, max_disk_bytes=1000)
+    threads = set()
+    for name in ("_read_disk", "_write_disk", "_account_disk"):
+        original = getattr(cache, name)
+
+        def _spy(*args, _original=original):
+            threads.add(threading.current_thread())
+            return _original(*args)
+
+        monkeypatch.setattr(cache, name, _spy)
+
+    await cache.aset("a", [1.0])
+    await cache.aset("b", [2.0])  # evicts "a" from memory
+    assert await cache.aget("a") == [1.0]  # disk hit
+    assert await cache.aget("missing") is None
+
+    assert threads and threading.main_thread() not in threads
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["misses"]) == (1, 1)
+
+
+def test_disk_tier_survives_a_new_instance(tmp_path):
+    key = make_key("analysis", "digest")
+    TwoLevelCache("pdf", directory=str(tmp_path)).set(key, {"risks": ["bias"]})
+
+    fresh = TwoLevelCache("pdf", directory=str(tmp_path))
+
+    assert fresh.get(key) == {"risks": ["bias"]}
+    assert (tmp_path / "pdf" / key[:2] / key).exists()
+
+
+def test_clear_drops_memory_but_keeps_disk(tmp_path):
+    cache = TwoLevelCache("pdf", directory=str(tmp_path))
+    cache.set("k1", "text")
+    cache.clear()
+
+    assert cache.get("k1") == "text"
+
+
+def test_corrupt_disk_entry_is_a_miss(tmp_path):
+    cache = TwoLevelCache("pdf", directory=str(tmp_path))
+    path = tmp_path / "pdf" / "ab" / "abcd"
+    path.parent.mkdir(parents=True)
+    path.write_bytes(b"{not json")
+
+    assert cache.get("abcd") is None
+    assert not path.exists()
+
+
+def test_stats_count_hits_and_misses_per_tier(tmp_path):
+    TwoLevelCache("emb", directory=str(tmp_path)).set("k", [1.0])
+    cache = TwoLevelCache("emb", directory=str(tmp_path))
+
+    cache.get("k")  # disk hit, promoted to memory
+    cache.get("k")  # memory hit
+    cache.get("missing")
+
+    stats = cache.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_rate"] == pytest.approx(0.667, abs=1e-3)
+
+
+def test_disk_tier_evicts_least_recently_used_past_size_bound(tmp_path):
+    import os
+
+    cache = TwoLevelCache("emb", directory=str(tmp_path), max_items=1, max_disk_bytes=250)
+    for index, key in enumerate(("a", "b", "c")):
+        cache.set(key, "x" * 100)
+        path = tmp_path / "emb" / key[:2] / key
+        os.utime(path, (index, index))
+
+    # Third write pushed the tier over 250 bytes – the oldest entry goes
+    cache.set("d", "x" * 100)
+
+    assert cache.stats()["evictions"] >= 1
+    assert not (tmp_path / "emb" / "a" / "a").exists()
+    assert (tmp_path / "emb" / "d" / "d").exists()
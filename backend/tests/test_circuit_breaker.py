@@ -0,0 +1,180 @@
+"""Tests for backend/app/core/circuit_breaker.py and GET /health/providers."""
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import circuit_breaker
+from app.core.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    get_breaker,
+    reset_breakers,
+)
+from app.main import app
+
+client = TestClient(app)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture(autouse=True)
+def _small_windows(monkeypatch):
+    monkeypatch.setattr(circuit_breaker.settings, "BREAKER_WINDOW_SIZE", 10)
+    monkeypatch.setattr(circuit_breaker.settings, "BREAKER_MIN_CALLS", 4)
+    monkeypatch.setattr(circuit_breaker.settings, "BREAKER_FAILURE_RATE", 0.5)
+    monkeypatch.setattr(circuit_breaker.settings, "BREAKER_SLOW_CALL_SECONDS", 1.0)
+    monkeypatch.setattr(circuit_breaker.settings, "BREAKER_OPEN_SECONDS", 30.0)
+    reset_breakers()
+    yield
+    reset_breakers()
+
+
+async def _boom():
+    raise RuntimeError("503")
+
+
+async def _ok():
+    return "ok"
+
+
+# ── State machine ────────────────────────────────────────────
+async def test_breaker_opens_on_error_rate_and_fails_fast():
+    breaker = CircuitBreaker("azure-openai:test", clock=FakeClock())
+    provider = AsyncMock(side_effect=RuntimeError("503"))
+
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            await breaker.call_async(provider)
+
+    assert breaker.state == OPEN
+    with pytest.raises(CircuitOpenError):
+        await breaker.call_async(provider)
+    assert provider.await_count == 4
+
+
+def test_breaker_opens_on_slow_calls():
+    breaker = CircuitBreaker("gemini:test", clock=FakeClock())
+
+    for _ in range(4):
+        breaker.before_call()
+        breaker.record(True, 5.0)
+
+    assert breaker.state == OPEN
+
+
+async def test_half_open_trial_closes_or_reopens():
+    clock = FakeClock()
+    breaker = CircuitBreaker("gemini:test", clock=clock)
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            await breaker.call_async(_boom)
+
+    clock.now = 31.0
+    assert breaker.state == HALF_OPEN
+    with pytest.raises(RuntimeError):
+        await breaker.call_async(_boom)
+    assert breaker.state == OPEN
+
+    clock.now = 62.0
+    assert await breaker.call_async(_ok) == "ok"
+    assert breaker.state == CLOSED
+    # The window restarts with the successful trial call
+    assert breaker.snapshot()["calls"] == 1
+
+
+async def test_call_async_records_outcomes():
+    breaker = CircuitBreaker("azure-openai:async")
+
+    assert await breaker.call_async(_ok) == "ok"
+    assert breaker.snapshot()["calls"] == 1
+    assert breaker.snapshot()["error_rate"] == 0.0
+
+
+async def test_cancelled_half_open_trial_frees_its_slot(monkeypatch):
+    monkeypatch.setattr(circuit_breaker.settings, "BREAKER_HALF_OPEN_CALLS", 1)
+    clock = FakeClock()
+    breaker = CircuitBreaker("gemini:cancelled", clock=clock)
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            await breaker.call_async(_boom)
+    clock.now = 31.0
+
+    started = asyncio.Event()
+
+    async def hang():
+        started.set()
+        await asyncio.sleep(60)
+
+    trial = asyncio.create_task(breaker.call_async(hang))
+    await started.wait()
+    trial.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await trial
+
+    # The cancelled trial recorded nothing, and the next caller gets the slot
+    assert breaker.state == HALF_OPEN
+    assert await breaker.call_async(AsyncMock(return_value="ok")) == "ok"
+    assert breaker.state == CLOSED
+
+
+# ── Services skip open providers ─────────────────────────────
+@patch("app.services.gemini_service.get_clients")
+async def test_generate_content_skips_provider_while_open(mock_get_clients):
+    from app.services.gemini_service import DEFAULT_MODEL, generate_content
+
+    sdk_call = AsyncMock(side_effect=RuntimeError("429"))
+    mock_get_clients.return_value.gemini.aio.models.generate_content = sdk_call
+    for _ in range(4):
+        with pytest.raises(RuntimeError):
+            await generate_content("Hi")
+
+    with pytest.raises(CircuitOpenError):
+        await generate_content("Hi")
+    assert sdk_call.await_count == 4
+    assert get_breaker(f"gemini:{DEFAULT_MODEL}").state == OPEN
+
+
+@patch("app.services.azure_openai_service.chat_completion", return_value="azure reply")
+def test_generate_falls_back_immediately_when_gemini_open(mock_azure):
+    from app.services.gemini_service import DEFAULT_MODEL
+
+    breaker = get_breaker(f"gemini:{DEFAULT_MODEL}")
+    for _ in range(4):
+        breaker.before_call()
+        breaker.record(False, 0.1)
+
+    response = client.post("/api/v1/generate", json={"prompt": "Hi"})
+
+    assert response.status_code == 200
+    assert response.json()["source"] == "azure-openai"
+    assert "Circuit open" in response.json()["fallback_reason"]
+
+
+# ── Health endpoint ──────────────────────────────────────────
+async def test_provider_health_reports_breaker_state():
+    await get_breaker("azure-openai:gpt-4o").call_async(_ok)
+    gemini = get_breaker("gemini:gemini-3-flash-preview")
+    for _ in range(4):
+        gemini.before_call()
+        gemini.record(False, 0.2)
+
+    response = client.get("/health/providers")
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "degraded"
+    assert data["providers"]["azure-openai:gpt-4o"]["state"] == CLOSED
+    assert data["providers"]["gemini:gemini-3-flash-preview"]["state"] == OPEN
+    assert data["providers"]["gemini:gemini-3-flash-preview"]["error_rate"] == 1.0
@@ -0,0 +1,66 @@
+"""Tests for backend/app/core/clients.py – the shared provider client registry."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import clients
+from app.core.clients import close_clients, get_clients
+
+
+async def test_get_clients_returns_one_shared_registry():
+    await close_clients()
+
+    first = get_clients()
+    second = get_clients()
+
+    assert first is second
+    assert first.async_azure._client is first._azure_async_http
+
+
+async def test_close_clients_closes_pools_and_resets():
+    registry = get_clients()
+
+    await close_clients()
+
+    assert registry._azure_async_http.is_closed
+    assert registry._gemini_async_http.is_closed
+    assert get_clients() is not registry
+
+
+def test_engine_and_services_share_the_pooled_client():
+    from app.services.ai_engine import AzureAIEngine
+
+    assert AzureAIEngine()._client is get_clients().async_azure
+    assert AzureAIEngine()._client is AzureAIEngine()._client
+
+
+async def test_provider_clients_are_built_on_first_use(monkeypatch):
+    """A missing Gemini key only fails Gemini calls, not startup or Azure."""
+    monkeypatch.setattr(clients.settings, "GEMINI_API_KEY", "")
+    monkeypatch.delenv("GOOGLE_API_KEY", raising=False)
+    monkeypatch.delenv("GEMINI_API_KEY", raising=False)
+    await close_clients()
+
+    registry = get_clients()
+    assert registry._gemini is None and registry._async_azure is None
+    assert registry.async_azure is registry.async_azure
+
+    with pytest.raises(ValueError, match="API key"):
+        registry.gemini
+    await close_clients()
+
+
+def test_lifespan_opens_and_closes_registry(tmp_path, monkeypatch):
+    from app.main import app
+    from app.services import vector_store
+
+    monkeypatch.setattr(vector_store.settings, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "chroma"))
+
+    with TestClient(app):
+        registry = clients._clients
+        assert registry is not None
+        assert vector_store.policy_store_status()["ready"] is True
+
+    assert clients._clients is None
+    assert registry._azure_async_http.is_closed
+    assert vector_store._store is None
@@ -0,0 +1,129 @@
+"""Tests for backend/app/services/hedging.py and hedged /api/v1/generate."""
+
+import asyncio
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services import hedging
+from app.services.hedging import AllProvidersFailed, LatencyTracker, hedge_delay, hedged_call
+
+client = TestClient(app)
+
+
+def _reply(value, seconds=0.0, calls=None):
+    async def call():
+        if calls is not None:
+            calls.append(value)
+        await asyncio.sleep(seconds)
+        return value
+
+    return call
+
+
+def _fail(message, seconds=0.0):
+    async def call():
+        await asyncio.sleep(seconds)
+        raise RuntimeError(message)
+
+    return call
+
+
+@pytest.fixture(autouse=True)
+def _reset_trackers():
+    hedging._trackers.clear()
+    yield
+    hedging._trackers.clear()
+
+
+# ── Latency percentile ───────────────────────────────────────
+def test_tracker_percentile_and_hedge_delay(monkeypatch):
+    tracker = LatencyTracker(window=100)
+    for ms in range(1, 101):
+        tracker.record(ms / 1000)
+
+    assert tracker.percentile(95) == pytest.approx(0.095)
+    assert tracker.percentile(50) == pytest.approx(0.050)
+
+    monkeypatch.setattr(hedging.settings, "GENERATE_HEDGE_MIN_SAMPLES", 5)
+    monkeypatch.setattr(hedging.settings, "GENERATE_HEDGE_MIN_DELAY_SECONDS", 0.01)
+    assert hedge_delay("gemini") == hedging.settings.GENERATE_HEDGE_DEFAULT_DELAY_SECONDS
+    hedging._trackers["gemini"] = tracker
+    assert hedge_delay("gemini") == pytest.approx(0.095)
+
+
+# ── Racing ───────────────────────────────────────────────────
+async def test_fast_primary_is_not_hedged():
+    calls = []
+
+    result = await hedged_call(("a", _reply("A", 0.0, calls)), ("b", _reply("B", 0.0, calls)), delay=0.5)
+
+    assert (result.source, result.value, result.hedged) == ("a", "A", False)
+    assert calls == ["A"]
+
+
+async def test_slow_primary_is_hedged_and_secondary_wins():
+    result = await hedged_call(("a", _reply("A", 1.0)), ("b", _reply("B", 0.0)), delay=0.02)
+
+    assert (result.source, result.value, result.hedged) == ("b", "B", True)
+    assert result.latency < 0.5
+    assert len(hedging.get_tracker("b")) == 1
+    # The cancelled primary is sampled at (at least) the hedge delay
+    assert hedging.get_tracker("a").percentile(100) >= 0.02
+
+
+async def test_primary_failure_starts_secondary_immediately():
+    started = time.perf_counter()
+
+    result = await hedged_call(("a", _fail("429")), ("b", _reply("B")), delay=5.0)
+
+    assert result.source == "b"
+    assert result.hedged is False
+    assert str(result.errors["a"]) == "429"
+    assert time.perf_counter() - started < 1.0
+
+
+async def test_both_failing_raises():
+    with pytest.raises(AllProvidersFailed) as excinfo:
+        await hedged_call(("a", _fail("down", 0.05)), ("b", _fail("also down")), delay=0.01)
+
+    assert set(excinfo.value.errors) == {"a", "b"}
+    # Failed attempts are sampled as well, so slow errors raise the hedge delay
+    assert hedging.get_tracker("a").percentile(100) >= 0.05
+    assert len(hedging.get_tracker("b")) == 1
+
+
+# ── Endpoint ─────────────────────────────────────────────────
+def test_generate_hedged_reports_winner_and_latency(monkeypatch):
+    monkeypatch.setattr(hedging.settings, "GENERATE_HEDGE_DEFAULT_DELAY_SECONDS", 0.02)
+
+    async def slow_gemini(prompt, model=None):
+        await asyncio.sleep(0.5)
+        return "gemini reply"
+
+    with (
+        patch("app.services.gemini_service.generate_content", side_effect=slow_gemini),
+        patch("app.services.azure_openai_service.chat_completion", return_value="azure reply"),
+    ):
+        response = client.post("/api/v1/generate", json={"prompt": "Hi", "hedge": True})
+
+    assert response.status_code == 200
+    data = response.json()
+    assert data["source"] == "azure-openai"
+    assert data["hedged"] is True
+    assert data["fallback_used"] is True
+    assert data["latency_ms"] < 500
+
+
+def test_unhedged_generate_samples_failed_gemini_calls():
+    with (
+        patch("app.services.gemini_service.generate_content", side_effect=TimeoutError("deadline")),
+        patch("app.services.azure_openai_service.chat_completion", return_value="azure reply"),
+    ):
+        response = client.post("/api/v1/generate", json={"prompt": "Hi", "hedge": False})
+
+    assert response.json()["source"] == "azure-openai"
+    assert len(hedging.get_tracker("gemini")) == 1
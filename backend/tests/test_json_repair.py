@@ -0,0 +1,116 @@
+"""Tests for backend/app/core/json_repair.py and the LLM output schemas."""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from app.core.json_repair import LLMOutputError, parse_llm_json, repair_json
+from app.schemas.llm_outputs import PdfExtraction, RiskReport
+
+EXTRACTION = {
+    "project_purpose": "Fraud detection for card payments.",
+    "data_types_used": ["financial_data", "pii"],
+    "potential_risks": ["Bias against new customers"],
+    "human_in_the_loop": True,
+    "deployment_target": "public_cloud",
+}
+
+
+# ── Repair ───────────────────────────────────────────────────
+def test_repair_drops_prose_and_trailing_commas():
+    raw = 'Here is the analysis:\n{"risks": [{"category": "Bias", "severity": "low", "reason": "r",},]}\nHope it helps!'
+
+    assert json.loads(repair_json(raw)) == {"risks": [{"category": "Bias", "severity": "low", "reason": "r"}]}
+    assert repair_json("no json here") is None
+
+
+def test_repair_closes_truncated_arrays_at_the_last_complete_element():
+    complete = {"category": "Bias", "severity": "high", "reason": "Skewed training data"}
+    truncated = json.dumps({"risks": [complete, complete]})[:-30]
+
+    repaired = json.loads(repair_json(truncated))
+    assert repaired["risks"][0] == complete
+    assert len(repaired["risks"]) == 2
+
+    assert json.loads(repair_json('{"a": [1, 2, "thr')) == {"a": [1, 2, "thr"]}
+    assert json.loads(repair_json('{"a": [1, 2], "b":')) == {"a": [1, 2]}
+
+
+# ── Schema validation ────────────────────────────────────────
+def test_extraction_fast_path_and_normalisation():
+    assert parse_llm_json(json.dumps(EXTRACTION), PdfExtraction).model_dump() == EXTRACTION
+
+    loose = {
+        "project_purpose": "Triage assistant",
+        "data_types_used": "health_records",
+        "potential_risks": None,
+        "deployment_target": "On-Prem",
+    }
+    parsed = parse_llm_json(json.dumps(loose), PdfExtraction)
+    assert parsed.data_types_used == ["health_records"]
+    assert parsed.potential_risks == []
+    assert parsed.human_in_the_loop is False
+    assert parsed.deployment_target == "on_premise"
+
+    with pytest.raises(LLMOutputError, match="missing keys"):
+        parse_llm_json('{"project_purpose": "x"}', PdfExtraction)
+    with pytest.raises(ValueError):
+        parse_llm_json("I could not read the document.", PdfExtraction)
+
+
+def test_risk_severities_are_normalised():
+    raw = json.dumps(
+        {"risks": [
+            {"category": "Privacy", "severity": "High", "reason": "a"},
+            {"category": "Bias", "severity": "moderate risk", "reason": "b"},
+            {"category": "Manipulation", "severity": "Prohibited", "reason": "c"},
+        ]}
+    )
+
+    report = parse_llm_json(raw, RiskReport)
+    assert [r.severity for r in report.risks] == ["high", "medium", "critical"]
+
+
+def test_unknown_severities_are_flagged_not_guessed_and_invalid_risks_are_counted(caplog):
+    from app.core.telemetry import reset_telemetry, telemetry_snapshot
+    from app.services.ai_engine import RISK_ANALYSIS_MODEL, _drop_invalid_risks
+
+    reset_telemetry()
+    raw = json.dumps(
+        {"risks": [
+            {"category": "Security", "severity": "lo", "reason": "a"},
+            {"category": "Bias", "severity": None, "reason": "b"},
+            {"category": "Oversight", "reason": "c"},
+            {"severity": "low", "reason": "no category"},
+        ]}
+    )
+
+    with caplog.at_level("WARNING"):
+        report = parse_llm_json(raw, RiskReport, salvage=_drop_invalid_risks)
+
+    assert [(r.category, r.severity) for r in report.risks] == [
+        ("Security", "unknown"), ("Bias", "unknown"), ("Oversight", "unknown"),
+    ]
+    assert "Unrecognised risk severity 'lo'" in caplog.text
+    assert "Dropping invalid risk" in caplog.text and "no category" in caplog.text
+    assert telemetry_snapshot()["models"][RISK_ANALYSIS_MODEL]["dropped_items"] == 1
+
+
+# ── Services ─────────────────────────────────────────────────
+async def test_analyze_risk_repairs_truncated_output_without_a_new_call():
+    from app.services.ai_engine import AzureAIEngine
+
+    complete = {"category": "Data Privacy", "severity": "HIGH", "reason": "PII stored unencrypted."}
+    content = "```json\n" + json.dumps({"risks": [complete]})[:-2] + ', {"category": "Bias", "sever'
+    message = SimpleNamespace(content=content)
+    engine = AzureAIEngine()
+    engine._client.chat.completions.create = AsyncMock(
+        return_value=SimpleNamespace(choices=[SimpleNamespace(message=message)], usage=None)
+    )
+
+    result = await engine.analyze_risk({"project_name": "Truncated"}, ["Encrypt PII."])
+
+    assert result == {"risks": [{**complete, "severity": "high"}]}
+    assert engine._client.chat.completions.create.await_count == 1
@@ -1,5 +1,9 @@
-from unittest.mock import patch
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
 
+import httpx
 from fastapi.testclient import TestClient
 
 from app.main import app
@@ -71,3 +75,29 @@ def test_generate_azure_openai(mock_chat):
     data = response.json()
     assert data["source"] == "azure-openai"
     assert data["response"] == "mocked azure reply"
+
+
+# ── Concurrency (async provider calls do not block the loop) ─
+@patch("app.services.gemini_service.get_clients")
+async def test_concurrent_generate_requests_overlap(mock_get_clients):
+    from app.core.circuit_breaker import reset_breakers
+
+    reset_breakers()
+
+    async def slow_gemini(model, contents):
+        await asyncio.sleep(0.3)
+        return SimpleNamespace(text=f"reply to {contents}", usage_metadata=None)
+
+    mock_get_clients.return_value.gemini.aio.models.generate_content = AsyncMock(side_effect=slow_gemini)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as async_client:
+        started = time.perf_counter()
+        responses = await asyncio.gather(
+            *(async_client.post("/api/v1/generate", json={"prompt": f"prompt {i}"}) for i in range(10))
+        )
+        elapsed = time.perf_counter() - started
+
+    assert [r.json()["response"] for r in responses] == [f"reply to prompt {i}" for i in range(10)]
+    # Ten 0.3 s calls would take 3 s if they serialised on the event loop
+    assert elapsed < 1.5
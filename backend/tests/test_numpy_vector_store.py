@@ -0,0 +1,149 @@
+"""Tests for NumpyPolicyVectorStore – the in-memory exact-search backend."""
+
+from __future__ import annotations
+
+import sys
+
+import numpy as np
+import pytest
+
+from app.services.numpy_vector_store import NumpyPolicyVectorStore
+from app.services.vector_store import PolicyVectorStore
+
+
+# ── Helpers ──────────────────────────────────────────────────
+
+@pytest.fixture()
+def store(tmp_path):
+    """Return a NumpyPolicyVectorStore backed by a throwaway temp directory."""
+    return NumpyPolicyVectorStore(persist_directory=str(tmp_path / "policy_index"))
+
+
+def _unit(*values: float) -> list[float]:
+    vector = np.asarray(values, dtype=np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+# ── Tests ────────────────────────────────────────────────────
+
+def test_search_matches_chromadb_ranking_and_distance(store, tmp_path):
+    """Same interface, same nearest-first order and l2 distances as the ChromaDB store."""
+    chroma = PolicyVectorStore(persist_directory=str(tmp_path / "chroma"))
+    rng = np.random.default_rng(7)
+    policies = [(f"pol-{i}", f"Policy {i}", _unit(*rng.normal(size=16))) for i in range(40)]
+    for policy_id, text, embedding in policies:
+        chroma.add_policy(id=policy_id, text=text, embedding=embedding)
+    store.add_policies(policies)
+
+    query = _unit(*rng.normal(size=16))
+    expected = chroma.search(query_embedding=query, top_k=5)
+    hits = store.search(query_embedding=query, top_k=5)
+
+    assert [h["id"] for h in hits] == [h["id"] for h in expected]
+    assert [h["document"] for h in hits] == [h["document"] for h in expected]
+    assert np.allclose([h["distance"] for h in hits], [h["distance"] for h in expected], atol=1e-4)
+
+
+def test_search_many_matches_per_query_search(store):
+    """One batched product gives the same hits, in input order, as one search per query."""
+    rng = np.random.default_rng(11)
+    store.add_policies([(f"pol-{i}", f"Policy {i}", _unit(*rng.normal(size=8))) for i in range(25)])
+    queries = [_unit(*rng.normal(size=8)) for _ in range(6)]
+
+    batches = store.search_many(queries, top_k=4)
+
+    assert len(batches) == 6
+    for query, hits in zip(queries, batches):
+        expected = store.search(query_embedding=query, top_k=4)
+        assert [h["id"] for h in hits] == [h["id"] for h in expected]
+        assert [h["distance"] for h in hits] == sorted(h["distance"] for h in hits)
+    assert store.search_many([], top_k=4) == []
+
+
+def test_upsert_top_k_and_empty_store(store):
+    """Upserts replace in place, top_k is capped, and an empty store returns nothing."""
+    assert store.search(query_embedding=[1.0, 0.0], top_k=3) == []
+    assert store.search_many([[1.0, 0.0], [0.0, 1.0]], top_k=3) == [[], []]
+
+    store.add_policy(id="a", text="Policy A", embedding=[1.0, 0.0])
+    store.add_policy(id="b", text="Policy B", embedding=[0.0, 3.0])
+    store.add_policy(id="a", text="Policy A v2", embedding=[0.0, -1.0])
+
+    hits = store.search(query_embedding=[0.0, -2.0], top_k=10)
+    assert [(h["id"], h["document"]) for h in hits] == [("a", "Policy A v2"), ("b", "Policy B")]
+    assert hits[0]["distance"] == pytest.approx(0.0)
+    assert store.count() == 2
+
+
+def test_index_is_persisted_and_memory_mapped(store, tmp_path):
+    """A new store on the same directory maps the saved matrix read-only."""
+    store.add_policies([("a", "Policy A", [0.6, 0.8]), ("b", "Policy B", [1.0, 0.0])])
+
+    reopened = NumpyPolicyVectorStore(persist_directory=str(tmp_path / "policy_index"))
+
+    matrix = reopened._snapshot[0]
+    assert isinstance(matrix, np.memmap) and matrix.dtype == np.float32
+    assert np.allclose(np.linalg.norm(matrix, axis=1), 1.0)
+    assert reopened.warm() == 2
+    assert reopened.search(query_embedding=[0.6, 0.8], top_k=1)[0]["id"] == "a"
+
+
+def test_external_seed_is_picked_up_without_a_restart(store, tmp_path):
+    """A store opened before another process seeds the directory sees the new index on its next read."""
+    assert store.count() == 0
+
+    seeder = NumpyPolicyVectorStore(persist_directory=str(tmp_path / "policy_index"))
+    seeder.add_policies([("a", "Policy A", [1.0, 0.0]), ("b", "Policy B", [0.0, 1.0])])
+
+    assert store.count() == 2
+    assert store.search(query_embedding=[0.0, 1.0], top_k=1)[0]["id"] == "b"
+
+    seeder.add_policy(id="c", text="Policy C", embedding=[-1.0, 0.0])
+    assert [h["id"] for h in store.search_many([[-1.0, 0.0]], top_k=1)[0]] == ["c"]
+
+
+def test_publish_is_a_single_pointer_swap(store, tmp_path, monkeypatch):
+    """A write that dies before the pointer rename leaves the previous index intact and readable."""
+    index_dir = tmp_path / "policy_index"
+    store.add_policies([("a", "Policy A", [1.0, 0.0])])
+    store.add_policy(id="b", text="Policy B", embedding=[0.0, 1.0])
+    store.add_policy(id="c", text="Policy C", embedding=[0.6, 0.8])
+
+    # Only the current and the previous version directories are kept
+    assert len([p for p in index_dir.iterdir() if p.is_dir()]) == 2
+
+    def crash(*_args):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("app.services.numpy_vector_store.os.replace", crash)
+    with pytest.raises(OSError):
+        store.add_policy(id="d", text="Policy D", embedding=[-1.0, 0.0])
+    monkeypatch.undo()
+
+    reopened = NumpyPolicyVectorStore(persist_directory=str(index_dir))
+    assert reopened.count() == 3
+    assert [h["id"] for h in reopened.search(query_embedding=[0.6, 0.8], top_k=3)][0] == "c"
+
+
+def test_dimension_mismatch_is_rejected(store):
+    store.add_policy(id="a", text="Policy A", embedding=[1.0, 0.0])
+
+    with pytest.raises(ValueError, match="dimension"):
+        store.add_policy(id="b", text="Policy B", embedding=[1.0, 0.0, 0.0])
+    with pytest.raises(ValueError, match="dimension"):
+        store.search(query_embedding=[1.0, 0.0, 0.0])
+
+
+def test_numpy_backend_is_selected_by_setting(tmp_path, monkeypatch):
+    """VECTOR_STORE_BACKEND=numpy serves the shared store without importing chromadb."""
+    from app.services import vector_store
+
+    monkeypatch.setattr(vector_store.settings, "VECTOR_STORE_BACKEND", "numpy")
+    monkeypatch.setattr(vector_store.settings, "POLICY_INDEX_DIRECTORY", str(tmp_path / "shared"))
+    monkeypatch.setitem(sys.modules, "chromadb", None)  # any import would raise
+    vector_store.close_policy_store()
+    try:
+        assert isinstance(vector_store.open_policy_store(), NumpyPolicyVectorStore)
+        assert vector_store.policy_store_status()["ready"] is True
+    finally:
+        vector_store.close_policy_store()
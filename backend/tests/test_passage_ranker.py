@@ -0,0 +1,57 @@
+"""Tests for backend/app/services/passage_ranker.py"""
+
+from app.services.passage_ranker import GAP_MARKER, score_passages, select_passages, split_passages
+
+INTRO = "Project Atlas automates visitor check-in for corporate offices."
+FILLER = "The quarterly roadmap lists milestones, owners and meeting cadences for the team."
+DATA = "The system captures facial images and fingerprint templates (biometric data) plus visitor PII."
+DEPLOY = "It is deployed on AWS public cloud in the eu-west-1 region."
+
+
+def _pages() -> list[str]:
+    filler_page = "\n".join([FILLER] * 12)
+    return [INTRO + "\n" + filler_page, filler_page, DATA + "\n" + filler_page, filler_page + "\n" + DEPLOY]
+
+
+def test_split_passages_respects_size_and_pages():
+    passages = split_passages(["a\nb", "c"], passage_chars=2)
+
+    assert passages == ["a", "b", "c"]
+
+
+def test_split_passages_hard_splits_a_single_line_page():
+    page = " ".join([FILLER] * 20 + [DATA])  # one 1,700+ char line, no line breaks
+
+    passages = split_passages([page], passage_chars=300)
+
+    assert len(passages) > 1
+    assert all(len(p) <= 300 for p in passages)
+    # Cuts fall on whitespace, so no word is broken in two
+    assert " ".join(passages).split() == page.split()
+    # A single-line page longer than the budget still yields its relevant passage
+    assert "biometric" in select_passages([page], max_chars=900)
+
+
+def test_relevant_passages_outscore_filler():
+    scores = score_passages([FILLER, DATA, DEPLOY])
+
+    assert scores[1] > scores[0]
+    assert scores[2] > scores[0]
+
+
+def test_select_passages_packs_relevant_text_within_budget():
+    pages = _pages()
+    selected = select_passages(pages, max_chars=3_200)
+
+    assert len(selected) <= 3_200
+    assert selected.count(FILLER) < "".join(pages).count(FILLER) / 2
+    assert selected.startswith(INTRO)
+    assert "biometric data" in selected
+    assert "AWS public cloud" in selected
+    assert GAP_MARKER in selected
+    # Document order is preserved
+    assert selected.index("biometric") < selected.index("AWS")
+
+
+def test_select_passages_returns_everything_that_fits():
+    assert select_passages([INTRO, DATA], max_chars=10_000) == INTRO + "\n" + DATA
@@ -0,0 +1,125 @@
+"""Tests for backend/app/services/pdf_extraction.py"""
+
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import pytest
+from pypdf._page import PageObject
+
+from app.services import pdf_extraction
+from app.services.pdf_extraction import _extract_page_range, extract_pages, split_page_ranges
+
+
+@pytest.fixture
+def multi_page_pdf(text_pdf):
+    """A 12-page PDF whose pages read 'Page 1' … 'Page 12'."""
+    return text_pdf("multi.pdf", [f"Page {i}" for i in range(1, 13)])
+
+
+# ── 1. Range splitting ──────────────────────────────────────
+def test_split_page_ranges_covers_every_page_in_order():
+    ranges = split_page_ranges(10, 3)
+
+    assert ranges == [(0, 4), (4, 8), (8, 10)]
+    assert split_page_ranges(0, 4) == []
+    assert split_page_ranges(2, 8) == [(0, 1), (1, 2)]
+
+
+# ── 2. Small documents stay in-process ──────────────────────
+def test_extract_pages_serial_below_threshold(multi_page_pdf, monkeypatch):
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_PARALLEL_MIN_PAGES", 100)
+    monkeypatch.setattr(pdf_extraction, "_get_pool", lambda: pytest.fail("pool should not be used"))
+
+    pages = extract_pages(multi_page_pdf)
+
+    assert pages == [f"Page {i}" for i in range(1, 13)]
+
+
+# ── 3. Large documents fan out and keep page order ──────────
+def test_extract_pages_parallel_preserves_order(multi_page_pdf, monkeypatch):
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_PARALLEL_MIN_PAGES", 2)
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_EXTRACT_WORKERS", 2)
+
+    try:
+        pages = extract_pages(multi_page_pdf)
+    finally:
+        pdf_extraction.shutdown_pool()
+
+    assert pages == [f"Page {i}" for i in range(1, 13)]
+
+
+# ── 4. A slow page is skipped, not fatal ────────────────────
+def test_extract_page_range_skips_page_past_deadline(multi_page_pdf, monkeypatch):
+    original = PageObject.extract_text
+
+    def slow_on_third_page(self, *args, **kwargs):
+        text = original(self, *args, **kwargs)
+        if text == "Page 3":
+            time.sleep(5)
+        return text
+
+    monkeypatch.setattr(PageObject, "extract_text", slow_on_third_page)
+
+    started = time.monotonic()
+    pages = _extract_page_range(multi_page_pdf, 0, 4, page_timeout=0.2)
+
+    assert time.monotonic() - started < 2
+    assert pages == ["Page 1", "Page 2", "", "Page 4"]
+
+
+# ── 5. Off the main thread, small documents keep the deadline in-process ─
+def _in_worker_thread(fn, *args):
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(fn, *args).result()
+
+
+def test_serial_extraction_off_main_thread_stays_in_process(multi_page_pdf, monkeypatch):
+    original = PageObject.extract_text
+
+    def slow_operators_on_third_page(self, *args, visitor_operand_before=None, **kwargs):
+        text = original(self, *args, **kwargs)
+        if text == "Page 3":
+            for _ in range(100):
+                time.sleep(0.05)
+                visitor_operand_before(b"Tj", [], None, None)
+        return text
+
+    monkeypatch.setattr(PageObject, "extract_text", slow_operators_on_third_page)
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_PARALLEL_MIN_PAGES", 100)
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_PAGE_TIMEOUT_SECONDS", 0.2)
+    monkeypatch.setattr(pdf_extraction, "_get_pool", lambda: pytest.fail("pool should not be used"))
+
+    started = time.monotonic()
+    pages = _in_worker_thread(extract_pages, multi_page_pdf)
+
+    assert time.monotonic() - started < 2
+    assert pages == ["Page 1", "Page 2", ""] + [f"Page {i}" for i in range(4, 13)]
+
+
+# ── 6. A task past its budget replaces the pool ─────────────
+class _HangingPool:
+    """Stands in for the process pool: accepts tasks and never finishes them."""
+
+    def __init__(self) -> None:
+        self.shut_down = False
+
+    def submit(self, fn, *args) -> Future:
+        return Future()
+
+    def shutdown(self, wait=True, cancel_futures=False) -> None:
+        self.shut_down = True
+
+
+def test_timed_out_task_replaces_the_pool(multi_page_pdf, monkeypatch):
+    pool = _HangingPool()
+    monkeypatch.setattr(pdf_extraction.settings, "PDF_PAGE_TIMEOUT_SECONDS", 0.01)
+    monkeypatch.setattr(pdf_extraction, "_pool", pool)
+
+    try:
+        pages = pdf_extraction._extract_in_pool(multi_page_pdf, [(0, 6), (6, 12)])
+
+        assert pages == [""] * 12
+        assert pool.shut_down
+        assert isinstance(pdf_extraction._pool, ProcessPoolExecutor)
+    finally:
+        pdf_extraction.shutdown_pool()
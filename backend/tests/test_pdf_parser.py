@@ -1,7 +1,8 @@
 """Tests for backend/app/services/pdf_parser.py"""
 
 import json
-from unittest.mock import MagicMock, patch
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
@@ -19,6 +20,19 @@ MOCK_EXTRACTED = {
 MOCK_JSON_STRING = json.dumps(MOCK_EXTRACTED)
 
 
+# ── Isolate the module-level PDF cache and breakers between tests ─
+@pytest.fixture(autouse=True)
+def _clear_pdf_cache():
+    from app.core.circuit_breaker import reset_breakers
+    from app.services import pdf_parser
+
+    pdf_parser._cache.clear()
+    reset_breakers()
+    yield
+    pdf_parser._cache.clear()
+    reset_breakers()
+
+
 # ── Helper: fake PDF bytes on disk ───────────────────────────
 @pytest.fixture
 def fake_pdf(tmp_path):
@@ -29,14 +43,14 @@ def fake_pdf(tmp_path):
 
 
 # ── 1. Azure OpenAI succeeds ────────────────────────────────
-@patch("app.services.pdf_parser._extract_via_azure")
-def test_parse_pdf_azure_success(mock_azure, fake_pdf):
-    """When Azure OpenAI succeeds, parse_pdf returns its result without fallback."""
+@patch("app.services.pdf_parser._extract_via_azure_async")
+async def test_parse_pdf_azure_success(mock_azure, fake_pdf):
+    """When Azure OpenAI succeeds, parse_pdf_async returns its result without fallback."""
     mock_azure.return_value = MOCK_EXTRACTED.copy()
 
-    from app.services.pdf_parser import parse_pdf
+    from app.services.pdf_parser import parse_pdf_async
 
-    result = parse_pdf(fake_pdf)
+    result = await parse_pdf_async(fake_pdf)
 
     mock_azure.assert_called_once()
     assert result["source"] == "azure-openai"
@@ -48,15 +62,15 @@ def test_parse_pdf_azure_success(mock_azure, fake_pdf):
 
 
 # ── 2. Azure fails → Gemini fallback succeeds ───────────────
-@patch("app.services.pdf_parser._extract_via_gemini")
-@patch("app.services.pdf_parser._extract_via_azure", side_effect=Exception("Azure quota exceeded"))
-def test_parse_pdf_falls_back_to_gemini(mock_azure, mock_gemini, fake_pdf):
-    """When Azure OpenAI fails, parse_pdf falls back to Gemini."""
+@patch("app.services.pdf_parser._extract_via_gemini_async")
+@patch("app.services.pdf_parser._extract_via_azure_async", side_effect=Exception("Azure quota exceeded"))
+async def test_parse_pdf_falls_back_to_gemini(mock_azure, mock_gemini, fake_pdf):
+    """When Azure OpenAI fails, parse_pdf_async falls back to Gemini."""
     mock_gemini.return_value = MOCK_EXTRACTED.copy()
 
-    from app.services.pdf_parser import parse_pdf
+    from app.services.pdf_parser import parse_pdf_async
 
-    result = parse_pdf(fake_pdf)
+    result = await parse_pdf_async(fake_pdf)
 
     mock_azure.assert_called_once()
     mock_gemini.assert_called_once_with(fake_pdf)
@@ -69,35 +83,35 @@ def test_parse_pdf_falls_back_to_gemini(mock_azure, mock_gemini, fake_pdf):
 
 
 # ── 3. Both providers fail ───────────────────────────────────
-@patch("app.services.pdf_parser._extract_via_gemini", side_effect=Exception("Gemini 429"))
-@patch("app.services.pdf_parser._extract_via_azure", side_effect=Exception("Azure 500"))
-def test_parse_pdf_both_fail(mock_azure, mock_gemini, fake_pdf):
-    """When both providers fail, parse_pdf raises RuntimeError."""
-    from app.services.pdf_parser import parse_pdf
+@patch("app.services.pdf_parser._extract_via_gemini_async", side_effect=Exception("Gemini 429"))
+@patch("app.services.pdf_parser._extract_via_azure_async", side_effect=Exception("Azure 500"))
+async def test_parse_pdf_both_fail(mock_azure, mock_gemini, fake_pdf):
+    """When both providers fail, parse_pdf_async raises RuntimeError."""
+    from app.services.pdf_parser import parse_pdf_async
 
     with pytest.raises(RuntimeError, match="Both providers failed"):
-        parse_pdf(fake_pdf)
+        await parse_pdf_async(fake_pdf)
 
 
 # ── 4. File not found ───────────────────────────────────────
-def test_parse_pdf_file_not_found():
-    """parse_pdf raises FileNotFoundError for a missing file."""
-    from app.services.pdf_parser import parse_pdf
+async def test_parse_pdf_file_not_found():
+    """parse_pdf_async raises FileNotFoundError for a missing file."""
+    from app.services.pdf_parser import parse_pdf_async
 
     with pytest.raises(FileNotFoundError):
-        parse_pdf("/nonexistent/path/doc.pdf")
+        await parse_pdf_async("/nonexistent/path/doc.pdf")
 
 
 # ── 5. Non-PDF file rejected ────────────────────────────────
-def test_parse_pdf_rejects_non_pdf(tmp_path):
-    """parse_pdf raises ValueError for non-.pdf extensions."""
+async def test_parse_pdf_rejects_non_pdf(tmp_path):
+    """parse_pdf_async raises ValueError for non-.pdf extensions."""
     txt_file = tmp_path / "notes.txt"
     txt_file.write_text("hello")
 
-    from app.services.pdf_parser import parse_pdf
+    from app.services.pdf_parser import parse_pdf_async
 
     with pytest.raises(ValueError, match="Expected a .pdf file"):
-        parse_pdf(str(txt_file))
+        await parse_pdf_async(str(txt_file))
 
 
 # ── 6. _parse_json strips markdown fences ────────────────────
@@ -126,43 +140,296 @@ def test_parse_json_rejects_incomplete():
         _parse_json(incomplete)
 
 
-# ── 8. End-to-end with mocked Azure chat completion ─────────
-@patch("app.services.pdf_parser._azure_client")
-def test_extract_via_azure_end_to_end(mock_client, fake_pdf):
-    """_extract_via_azure calls the chat completions API and parses JSON."""
-    # Build a mock response chain: response.choices[0].message.content
+# ── 8. End-to-end with the mocked async Azure client ────────
+@patch("app.services.pdf_parser.get_clients")
+async def test_extract_via_azure_end_to_end(mock_get_clients, fake_pdf):
+    """parse_pdf_async awaits one chat completion and parses its JSON."""
     mock_message = MagicMock()
     mock_message.content = MOCK_JSON_STRING
-    mock_choice = MagicMock()
-    mock_choice.message = mock_message
     mock_response = MagicMock()
-    mock_response.choices = [mock_choice]
-    mock_client.chat.completions.create.return_value = mock_response
+    mock_response.choices = [MagicMock(message=mock_message)]
+    mock_client = mock_get_clients.return_value.async_azure
+    mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
 
-    from app.services.pdf_parser import _extract_via_azure, _read_pdf_bytes
+    from app.services import pdf_parser
 
-    pdf_bytes = _read_pdf_bytes(fake_pdf)
-    result = _extract_via_azure(pdf_bytes, "sample.pdf")
-
-    mock_client.chat.completions.create.assert_called_once()
-    assert result == MOCK_EXTRACTED
+    with patch.object(pdf_parser, "_extract_text", return_value="Design doc text"):
+        result = await pdf_parser.parse_pdf_async(fake_pdf)
 
+    mock_client.chat.completions.create.assert_awaited_once()
+    assert result["source"] == "azure-openai"
+    assert result["project_purpose"] == MOCK_EXTRACTED["project_purpose"]
 
-# ── 9. End-to-end with mocked Gemini upload + generate ──────
-@patch("app.services.pdf_parser._gemini_client")
-def test_extract_via_gemini_end_to_end(mock_client, fake_pdf):
-    """_extract_via_gemini uploads file and calls generate_content."""
-    mock_uploaded = MagicMock()
-    mock_client.files.upload.return_value = mock_uploaded
 
+# ── 9. End-to-end with mocked async Gemini generate ─────────
+@patch("app.services.pdf_parser.get_clients")
+async def test_extract_via_gemini_end_to_end(mock_get_clients):
+    """_extract_via_gemini_async awaits generate_content and parses JSON."""
     mock_response = MagicMock()
     mock_response.text = MOCK_JSON_STRING
-    mock_client.models.generate_content.return_value = mock_response
+    mock_client = mock_get_clients.return_value.gemini
+    mock_client.aio.models.generate_content = AsyncMock(return_value=mock_response)
+
+    from app.services.pdf_parser import _extract_via_gemini_async
+
+    result = await _extract_via_gemini_async("Design doc text")
 
-    from app.services.pdf_parser import _extract_via_gemini
+    mock_client.aio.models.generate_content.assert_awaited_once()
+    assert result["project_purpose"] == MOCK_EXTRACTED["project_purpose"]
+    assert result["potential_risks"] == MOCK_EXTRACTED["potential_risks"]
+
+
+# ── 10. Re-upload is served from the digest cache ───────────
+@patch("app.services.pdf_parser._extract_via_azure_async")
+async def test_parse_pdf_reupload_hits_cache(mock_azure, tmp_path, text_pdf):
+    """A second parse of identical bytes skips both pypdf and the LLM call."""
+    from app.services import pdf_parser
+
+    mock_azure.return_value = MOCK_EXTRACTED.copy()
+    first_path = text_pdf("design.pdf", ["Biometric data on AWS"])
+    reupload = tmp_path / "design-copy.pdf"
+    reupload.write_bytes(Path(first_path).read_bytes())
+
+    with patch.object(pdf_parser, "extract_pages", wraps=pdf_parser.extract_pages) as mock_pages:
+        first = await pdf_parser.parse_pdf_async(first_path)
+        first["data_types_used"].append("mutated by caller")
+        second = await pdf_parser.parse_pdf_async(str(reupload))
+
+    mock_azure.assert_called_once()
+    mock_pages.assert_called_once()
+    assert second["source"] == "azure-openai"
+    assert second["data_types_used"] == MOCK_EXTRACTED["data_types_used"]
+
+
+# ── 11. Long documents are chunked within the token bound ───
+def test_chunk_text_respects_token_bound():
+    from app.core.tokens import tokens_to_chars
+    from app.services.pdf_parser import _chunk_text
+
+    text = "\n".join(f"Paragraph {i} " + "x" * 90 for i in range(200))
+    chunks = _chunk_text(text, max_tokens=500)
+
+    assert len(chunks) > 1
+    assert all(len(c) <= tokens_to_chars(500) for c in chunks)
+    assert chunks[0].startswith("Paragraph 0 ")
+    assert chunks[-1].endswith("x" * 90)
+    assert sum(c.count("Paragraph") for c in chunks) == 200
+
+
+# ── 12. Partial results merge into the output schema ────────
+def test_merge_extractions_unions_and_reconciles():
+    from app.services.pdf_parser import _merge_extractions
+
+    merged = _merge_extractions(
+        [
+            {
+                "project_purpose": "Face-matching for building access.",
+                "data_types_used": ["biometric_data", "pii"],
+                "potential_risks": ["Bias in matching."],
+                "human_in_the_loop": False,
+                "deployment_target": "unknown",
+            },
+            {
+                "project_purpose": "Not specified",
+                "data_types_used": ["PII", "access_logs"],
+                "potential_risks": ["bias in matching", "Data retention beyond need"],
+                "human_in_the_loop": True,
+                "deployment_target": "public_cloud",
+            },
+        ]
+    )
+
+    assert merged == {
+        "project_purpose": "Face-matching for building access.",
+        "data_types_used": ["biometric_data", "pii", "access_logs"],
+        "potential_risks": ["Bias in matching.", "Data retention beyond need"],
+        "human_in_the_loop": True,
+        "deployment_target": "public_cloud",
+    }
+    conflicting = [{"deployment_target": "public_cloud"}, {"deployment_target": "on_premise"}]
+    assert _merge_extractions(conflicting)["deployment_target"] == "hybrid"
+
+
+# ── 13. Long-document mode analyses every chunk ─────────────
+async def test_parse_pdf_long_document_mode(fake_pdf, monkeypatch):
+    """Every chunk is sent (none truncated) and a failed chunk falls back to Gemini."""
+    from app.services import pdf_parser
+
+    monkeypatch.setattr(pdf_parser.settings, "PDF_CHUNK_TOKENS", 1000)
+    sections = [f"SECTION-{i} " + ("filler text " * 300) for i in range(4)]
+    long_text = "\n".join(sections)
+
+    def fake_azure(chunk):
+        if "SECTION-3" in chunk:
+            raise Exception("Azure 429")
+        section = chunk.split(" ", 1)[0]
+        return {
+            "project_purpose": "Long doc" if section == "SECTION-0" else "Not specified",
+            "data_types_used": [section.lower()],
+            "potential_risks": [],
+        }
+
+    def fake_gemini(chunk):
+        return {"project_purpose": "Not specified", "data_types_used": ["late_data"], "potential_risks": ["late risk"]}
+
+    with (
+        patch.object(pdf_parser, "_extract_text", return_value=long_text) as mock_text,
+        patch.object(pdf_parser, "_extract_via_azure_async", side_effect=fake_azure) as mock_azure,
+        patch.object(pdf_parser, "_extract_via_gemini_async", side_effect=fake_gemini),
+    ):
+        result = await pdf_parser.parse_pdf_async(fake_pdf, long_document=True)
+
+    mock_text.assert_called_once_with(fake_pdf, None, data=b"%PDF-1.4 fake content")
+    assert mock_azure.call_count == 4
+    assert result["project_purpose"] == "Long doc"
+    assert result["data_types_used"] == ["section-0", "section-1", "section-2", "late_data"]
+    assert result["potential_risks"] == ["late risk"]
+    assert result["source"] == "azure-openai"
+    assert result["fallback_used"] is True
+    assert "Azure 429" in result["fallback_reason"]
+    assert result["partial"] is False
+    assert (result["chunks_total"], result["chunks_skipped"], result["chunks_failed"]) == (4, 0, 0)
+
+
+# ── 14. Async API: Azure succeeds ───────────────────────────
+async def test_parse_pdf_async_azure_success(fake_pdf):
+    """parse_pdf_async awaits the async Azure extractor and skips Gemini."""
+    from app.services import pdf_parser
+
+    with (
+        patch.object(pdf_parser, "_extract_text", return_value="Design doc text"),
+        patch.object(
+            pdf_parser, "_extract_via_azure_async", new=AsyncMock(return_value=MOCK_EXTRACTED.copy())
+        ) as mock_azure,
+        patch.object(pdf_parser, "_extract_via_gemini_async", new=AsyncMock()) as mock_gemini,
+    ):
+        result = await pdf_parser.parse_pdf_async(fake_pdf)
+
+    mock_azure.assert_awaited_once_with("Design doc text")
+    mock_gemini.assert_not_awaited()
+    assert result["source"] == "azure-openai"
+    assert result["fallback_used"] is False
+
+
+# ── 15. Async API: same fallback semantics ──────────────────
+async def test_parse_pdf_async_falls_back_to_gemini(fake_pdf):
+    from app.services import pdf_parser
+
+    with (
+        patch.object(pdf_parser, "_extract_text", return_value="Design doc text"),
+        patch.object(pdf_parser, "_extract_via_azure_async", new=AsyncMock(side_effect=Exception("Azure 503"))),
+        patch.object(pdf_parser, "_extract_via_gemini_async", new=AsyncMock(return_value=MOCK_EXTRACTED.copy())),
+    ):
+        result = await pdf_parser.parse_pdf_async(fake_pdf)
+
+    assert result["source"] == "gemini"
+    assert result["fallback_used"] is True
+    assert "Azure 503" in result["fallback_reason"]
+
+
+# ── 16. Async Azure extractor uses the async client ─────────
+@patch("app.services.pdf_parser.get_clients")
+async def test_extract_via_azure_async_awaits_client(mock_get_clients):
+    mock_message = MagicMock()
+    mock_message.content = MOCK_JSON_STRING
+    mock_response = MagicMock()
+    mock_response.choices = [MagicMock(message=mock_message)]
+    mock_client = mock_get_clients.return_value.async_azure
+    mock_client.chat.completions.create = AsyncMock(return_value=mock_response)
+
+    from app.services.pdf_parser import _extract_via_azure_async
+
+    result = await _extract_via_azure_async("Design doc text")
+
+    mock_client.chat.completions.create.assert_awaited_once()
+    assert result["project_purpose"] == MOCK_EXTRACTED["project_purpose"]
 
-    result = _extract_via_gemini(fake_pdf)
 
-    mock_client.files.upload.assert_called_once_with(file=fake_pdf)
-    mock_client.models.generate_content.assert_called_once()
-    assert result == MOCK_EXTRACTED
+# ── 17. Over-budget text is fitted by relevance, not truncated ─
+def test_extract_text_selects_relevant_passages(monkeypatch):
+    from app.services import pdf_parser
+
+    filler = "\n".join(["Team roster and meeting notes for the sprint."] * 40)
+    pages = ["Intro: visitor check-in kiosk.", filler, filler, "Stores fingerprint biometric data on AWS cloud."]
+    monkeypatch.setattr(pdf_parser, "extract_pages", lambda path, data=None: pages)
+
+    monkeypatch.setattr(pdf_parser.settings, "PDF_PAGE_SELECTION", "relevance")
+    relevant = pdf_parser._extract_text("doc.pdf", max_chars=500)
+    monkeypatch.setattr(pdf_parser.settings, "PDF_PAGE_SELECTION", "head")
+    head = pdf_parser._extract_text("doc.pdf", max_chars=500)
+
+    assert relevant.startswith("Intro: visitor check-in kiosk.")
+    assert "fingerprint biometric data on AWS" in relevant
+    assert "fingerprint" not in head
+    assert len(relevant) <= 500
+
+
+# ── 18. Fallback analyses are not cached ────────────────────
+async def test_fallback_analysis_is_not_cached(fake_pdf):
+    """A Gemini answer given during an Azure outage is not replayed with stale provenance."""
+    from app.services import pdf_parser
+
+    azure = AsyncMock(side_effect=[Exception("Azure 503"), MOCK_EXTRACTED.copy()])
+    with (
+        patch.object(pdf_parser, "_extract_text", return_value="Design doc text"),
+        patch.object(pdf_parser, "_extract_via_azure_async", new=azure),
+        patch.object(pdf_parser, "_extract_via_gemini_async", new=AsyncMock(return_value=MOCK_EXTRACTED.copy())),
+    ):
+        during_outage = await pdf_parser.parse_pdf_async(fake_pdf)
+        recovered = await pdf_parser.parse_pdf_async(fake_pdf)
+        cached = await pdf_parser.parse_pdf_async(fake_pdf)
+
+    assert during_outage["fallback_used"] is True
+    assert recovered["source"] == "azure-openai" and recovered["fallback_reason"] is None
+    assert cached == recovered
+    assert azure.await_count == 2
+
+
+# ── 19. Skipped and failed chunks are reported, not just logged ─
+async def test_long_document_reports_skipped_and_failed_chunks(fake_pdf, monkeypatch):
+    from app.services import pdf_parser
+
+    monkeypatch.setattr(pdf_parser.settings, "PDF_CHUNK_TOKENS", 1000)
+    monkeypatch.setattr(pdf_parser.settings, "PDF_MAX_CHUNKS", 3)
+    long_text = "\n".join(f"SECTION-{i} " + ("filler text " * 300) for i in range(5))
+
+    async def fake_azure(chunk):
+        if "SECTION-1" in chunk:
+            raise Exception("Azure 500")
+        return {"project_purpose": "Long doc", "data_types_used": [chunk.split(" ", 1)[0]], "potential_risks": []}
+
+    azure = AsyncMock(side_effect=fake_azure)
+    with (
+        patch.object(pdf_parser, "_extract_text", return_value=long_text),
+        patch.object(pdf_parser, "_extract_via_azure_async", new=azure),
+        patch.object(pdf_parser, "_extract_via_gemini_async", new=AsyncMock(side_effect=Exception("Gemini 429"))),
+    ):
+        result = await pdf_parser.parse_pdf_async(fake_pdf, long_document=True)
+        await pdf_parser.parse_pdf_async(fake_pdf, long_document=True)
+
+    assert result["partial"] is True
+    assert (result["chunks_total"], result["chunks_skipped"], result["chunks_failed"]) == (5, 2, 1)
+    assert result["data_types_used"] == ["SECTION-0", "SECTION-2"]
+    # A result with failed chunks is not cached – the second parse calls the providers again
+    assert azure.await_count == 6
+
+
+# ── 20. One read per document, bounded disk tier ────────────
+async def test_prepare_reads_the_file_once_and_bounds_the_disk_cache(text_pdf, monkeypatch):
+    from app.services import pdf_extraction, pdf_parser
+
+    path = text_pdf("once.pdf", ["Biometric data on AWS"])
+    sources = []
+    real_reader = pdf_extraction.PdfReader
+
+    def recording_reader(source, *args, **kwargs):
+        sources.append(source)
+        return real_reader(source, *args, **kwargs)
+
+    monkeypatch.setattr(pdf_extraction, "PdfReader", recording_reader)
+    prepared = await pdf_parser.prepare_pdf_async(path)
+
+    assert prepared.text == "Biometric data on AWS"
+    # Extraction parses the bytes read for hashing instead of reopening the file
+    assert sources and not any(isinstance(source, str) for source in sources)
+    assert pdf_parser._cache.max_disk_bytes == pdf_parser.settings.PDF_CACHE_MAX_DISK_MB * 1024 * 1024
@@ -0,0 +1,92 @@
+"""Tests for backend/app/services/prompt_compactor.py"""
+
+import json
+from unittest.mock import AsyncMock
+
+from app.services.prompt_compactor import compact_project_payload, payload_tokens
+
+
+def _large_project(file_count: int = 5_000, finding_count: int = 400) -> dict:
+    files = [f"src/module_{i % 50}/component_{i}/file_{i}.py" for i in range(file_count)]
+    files += ["Dockerfile", "requirements.txt", "infra/main.tf", "models/classifier.onnx"]
+    findings = [
+        {
+            "RuleID": "generic-api-key" if i % 3 else "aws-access-token",
+            "File": f"config/settings_{i % 40}.py",
+            "StartLine": i,
+            "Secret": "AKIA" + "X" * 16,
+            "Match": "aws_key = AKIA...",
+        }
+        for i in range(finding_count)
+    ]
+    return {
+        "github_url": "https://github.com/example/big",
+        "code_metadata": {
+            "files": files,
+            "files_count": len(files),
+            "extensions": {".py": file_count},
+            "secrets_found": finding_count,
+            "secret_scan_successful": True,
+            "secret_findings": findings,
+        },
+        "pdf_analysis": {"project_purpose": "Fraud detection for card payments."},
+    }
+
+
+def test_compaction_fits_budget_and_keeps_signal():
+    project = _large_project()
+    assert payload_tokens(project) > 50_000
+
+    compact = compact_project_payload(project, token_budget=2_000)
+
+    assert payload_tokens(compact) <= 2_000
+    metadata = compact["code_metadata"]
+    assert "files" not in metadata
+    assert metadata["files_count"] == project["code_metadata"]["files_count"]
+    assert metadata["extensions"][".py"] == 5_000
+    assert sum(metadata["directories"].values()) == metadata["files_count"]
+    assert compact["pdf_analysis"]["project_purpose"] == "Fraud detection for card payments."
+
+
+def test_findings_are_deduped_capped_and_redacted():
+    compact = compact_project_payload(_large_project(file_count=10), token_budget=5_000)
+
+    findings = compact["code_metadata"]["secret_findings"]
+    # 400 raw findings collapse to 80 unique (rule, file) pairs
+    assert sum(findings["by_rule"].values()) == 80
+    assert len(findings["findings"]) + findings.get("omitted", 0) == 80
+    assert "AKIA" not in json.dumps(compact)
+
+
+def test_notable_files_are_listed():
+    compact = compact_project_payload(_large_project(file_count=10, finding_count=0), token_budget=5_000)
+
+    notable = compact["code_metadata"]["notable_files"]
+    assert {"Dockerfile", "requirements.txt", "infra/main.tf", "models/classifier.onnx"} <= set(notable)
+
+
+def test_over_budget_payload_is_returned_with_warning(caplog):
+    # Many short top-level keys survive every compaction step
+    project = {f"key_{i}": "value" for i in range(200)}
+
+    with caplog.at_level("WARNING", logger="app.services.prompt_compactor"):
+        compact = compact_project_payload(project, token_budget=50)
+
+    assert compact == project
+    assert "over the 50-token budget" in caplog.text
+
+
+async def test_analyze_risk_sends_compacted_payload():
+    from types import SimpleNamespace
+
+    from app.services.ai_engine import AzureAIEngine
+
+    engine = AzureAIEngine()
+    reply = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content='{"risks": []}'))], usage=None)
+    engine._client.chat.completions.create = AsyncMock(return_value=reply)
+
+    await engine.analyze_risk(_large_project(), ["Policy A"])
+
+    user_msg = engine._client.chat.completions.create.call_args.kwargs["messages"][1]["content"]
+    assert "component_4999" not in user_msg
+    assert len(user_msg) < 20_000
@@ -0,0 +1,138 @@
+"""Tests for backend/app/core/rate_limiter.py"""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core import rate_limiter
+from app.core.rate_limiter import DeploymentLimiter, get_limiter, reset_limiters, usage_tokens
+
+
+@pytest.fixture(autouse=True)
+def _fresh_limiters():
+    from app.services import ai_engine
+
+    reset_limiters()
+    ai_engine._embedding_cache.clear()
+    yield
+    reset_limiters()
+    ai_engine._embedding_cache.clear()
+
+
+# ── Token buckets ────────────────────────────────────────────
+async def test_acquire_waits_for_token_refill():
+    limiter = DeploymentLimiter("gpt-4o", rpm=0, tpm=600)  # 10 tokens / second
+    await limiter.acquire(600)
+
+    started = time.perf_counter()
+    await limiter.acquire(5)
+
+    assert time.perf_counter() - started >= 0.4
+
+
+async def test_waiters_are_served_in_arrival_order():
+    limiter = DeploymentLimiter("text-embedding-3-small-1", rpm=0, tpm=6_000)  # 100 tokens / second
+    await limiter.acquire(6_000)
+    served = []
+
+    async def caller(label, tokens):
+        await limiter.acquire(tokens)
+        served.append(label)
+
+    big = asyncio.create_task(caller("big", 50))
+    await asyncio.sleep(0)
+    # Small requests would fit sooner, but must not overtake the queued big one
+    await asyncio.gather(big, caller("small-1", 1), caller("small-2", 1))
+
+    assert served == ["big", "small-1", "small-2"]
+
+
+async def test_cancelled_waiter_leaves_the_queue():
+    limiter = DeploymentLimiter("gpt-4o", rpm=0, tpm=6_000)
+    await limiter.acquire(6_000)
+
+    head = asyncio.create_task(limiter.acquire(3_000))
+    behind = asyncio.create_task(limiter.acquire(1))
+    await asyncio.sleep(0.01)
+    head.cancel()
+
+    await asyncio.wait_for(behind, timeout=1)
+    assert not limiter._queue
+
+
+def test_no_limits_are_assumed_by_default():
+    from app.core.config import Settings
+
+    assert Settings.model_fields["RATE_LIMITS"].default == {}
+    assert get_limiter("gpt-4o").unlimited
+
+
+async def test_settle_refunds_overestimated_tokens():
+    limiter = DeploymentLimiter("gpt-4o", rpm=0, tpm=600)
+    await limiter.acquire(600)
+
+    limiter.settle(600, 100)
+
+    assert 495 <= limiter.snapshot()["tokens"]["available"] <= 510
+
+
+async def test_request_bucket_limits_calls_per_minute():
+    limiter = DeploymentLimiter("gemini-3-flash-preview", rpm=120, tpm=0)  # 2 requests / second
+    for _ in range(120):
+        await limiter.acquire()
+
+    started = time.perf_counter()
+    await limiter.acquire()
+
+    assert time.perf_counter() - started >= 0.4
+
+
+# ── Registry & settings ──────────────────────────────────────
+def test_get_limiter_reads_configured_limits(monkeypatch):
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMITS", {"gpt-4o": {"rpm": 10, "tpm": 1_000}})
+
+    assert get_limiter("gpt-4o").snapshot() == {
+        "requests": {"per_minute": 10, "available": 10},
+        "tokens": {"per_minute": 1_000, "available": 1_000},
+    }
+    assert get_limiter("unknown-deployment").unlimited
+
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMIT_ENABLED", False)
+    reset_limiters()
+    assert get_limiter("gpt-4o").unlimited
+
+
+def test_usage_tokens_reads_both_providers():
+    assert usage_tokens(SimpleNamespace(usage=SimpleNamespace(total_tokens=42))) == 42
+    assert usage_tokens(SimpleNamespace(usage_metadata=SimpleNamespace(total_token_count=7))) == 7
+    assert usage_tokens(MagicMock()) is None
+
+
+# ── Callers reserve capacity ─────────────────────────────────
+async def test_get_embedding_draws_from_embedding_limiter(monkeypatch):
+    from app.services.ai_engine import EMBEDDING_MODEL, AzureAIEngine
+
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMITS", {EMBEDDING_MODEL: {"rpm": 100, "tpm": 100_000}})
+    engine = AzureAIEngine(client=MagicMock())
+    response = SimpleNamespace(data=[SimpleNamespace(embedding=[0.1])], usage=SimpleNamespace(total_tokens=3))
+    engine._client.embeddings.create = AsyncMock(return_value=response)
+
+    await engine.get_embedding("hello world")
+
+    assert get_limiter(EMBEDDING_MODEL).snapshot()["requests"]["available"] == 99
+
+
+async def test_provider_health_includes_rate_limits(monkeypatch):
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    monkeypatch.setattr(rate_limiter.settings, "RATE_LIMITS", {"gpt-4o": {"rpm": 10, "tpm": 1_000}})
+    await get_limiter("gpt-4o").acquire(100)
+
+    response = TestClient(app).get("/health/providers")
+
+    assert response.json()["rate_limits"]["gpt-4o"]["requests"]["available"] == 9
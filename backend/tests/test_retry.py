@@ -0,0 +1,135 @@
+"""Tests for backend/app/core/retry.py and the provider calls that use it."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import openai
+import pytest
+from google.genai import errors as genai_errors
+
+from app.core import retry
+from app.core.retry import is_retryable, retry_after, retry_budget, retry_call_async
+
+
+@pytest.fixture(autouse=True)
+def _fast_retries(monkeypatch):
+    monkeypatch.setattr(retry.settings, "RETRY_MAX_ATTEMPTS", 3)
+    monkeypatch.setattr(retry.settings, "RETRY_BASE_DELAY_SECONDS", 0.0)
+    monkeypatch.setattr(retry.settings, "RETRY_MAX_RETRY_AFTER_SECONDS", 30.0)
+    sleeps: list[float] = []
+
+    async def sleep(delay: float) -> None:
+        sleeps.append(delay)
+
+    monkeypatch.setattr(retry, "asyncio", SimpleNamespace(sleep=sleep))
+    return sleeps
+
+
+def _status_error(status: int, headers: dict | None = None) -> openai.APIStatusError:
+    request = httpx.Request("POST", "https://example.test/chat")
+    response = httpx.Response(status, headers=headers, request=request)
+    return openai.APIStatusError("boom", response=response, body=None)
+
+
+# ── Classification ───────────────────────────────────────────
+def test_transient_errors_are_retryable_and_client_errors_are_not():
+    request = httpx.Request("POST", "https://example.test")
+
+    assert is_retryable(_status_error(429))
+    assert is_retryable(_status_error(503))
+    assert is_retryable(openai.APITimeoutError(request=request))
+    assert is_retryable(httpx.ConnectError("reset"))
+    assert is_retryable(genai_errors.APIError(503, {"error": {"message": "overloaded"}}))
+
+    assert not is_retryable(_status_error(400))
+    assert not is_retryable(_status_error(401))
+    assert not is_retryable(genai_errors.APIError(404, {"error": {"message": "no model"}}))
+    assert not is_retryable(ValueError("bad json"))
+
+
+def test_retry_after_headers():
+    assert retry_after(_status_error(429, {"retry-after-ms": "1500"})) == 1.5
+    assert retry_after(_status_error(429, {"retry-after": "4"})) == 4.0
+    assert retry_after(_status_error(429, {"retry-after": "Wed, 21 Oct 2015 07:28:00 GMT"})) == 0.0
+    assert retry_after(_status_error(429)) is None
+    assert retry_after(ValueError()) is None
+
+
+# ── Runners ──────────────────────────────────────────────────
+async def test_transient_failure_is_retried_with_server_delay(_fast_retries):
+    fn = AsyncMock(side_effect=[_status_error(429, {"retry-after": "2"}), _status_error(503), "ok"])
+
+    assert await retry_call_async(fn) == "ok"
+    assert fn.await_count == 3
+    assert _fast_retries[0] == 2.0
+
+
+async def test_gives_up_after_max_attempts_and_on_permanent_errors():
+    flaky = AsyncMock(side_effect=_status_error(500))
+    with pytest.raises(openai.APIStatusError):
+        await retry_call_async(flaky)
+    assert flaky.await_count == 3
+
+    bad_request = AsyncMock(side_effect=_status_error(400))
+    with pytest.raises(openai.APIStatusError):
+        await retry_call_async(bad_request)
+    assert bad_request.await_count == 1
+
+
+async def test_long_retry_after_fails_fast():
+    fn = AsyncMock(side_effect=_status_error(429, {"retry-after": "120"}))
+
+    with pytest.raises(openai.APIStatusError):
+        await retry_call_async(fn)
+    assert fn.await_count == 1
+
+
+async def test_job_budget_is_shared_across_calls():
+    fn = AsyncMock(side_effect=_status_error(503))
+
+    with retry_budget(3) as budget:
+        for _ in range(3):
+            with pytest.raises(openai.APIStatusError):
+                await retry_call_async(fn)
+
+    # 3 first attempts + the 3 retries the budget allowed
+    assert fn.await_count == 6
+    assert budget.remaining == 0 and budget.used == 3
+
+
+# ── Services ─────────────────────────────────────────────────
+async def test_get_embedding_retries_transient_errors():
+    from app.services import ai_engine
+    from app.services.ai_engine import AzureAIEngine
+
+    ai_engine._embedding_cache.clear()
+    engine = AzureAIEngine()
+    engine._client.embeddings.create = AsyncMock(
+        side_effect=[
+            _status_error(503),
+            SimpleNamespace(data=[SimpleNamespace(embedding=[0.25])], usage=None),
+        ]
+    )
+
+    assert await engine.get_embedding("retry me") == [0.25]
+    assert engine._client.embeddings.create.await_count == 2
+    ai_engine._embedding_cache.clear()
+
+
+@patch("app.services.gemini_service.get_clients")
+async def test_generate_content_retries_transient_errors(mock_get_clients):
+    from app.core.circuit_breaker import reset_breakers
+    from app.services.gemini_service import generate_content
+
+    reset_breakers()
+    sdk_call = AsyncMock(
+        side_effect=[
+            genai_errors.APIError(503, {"error": {"message": "overloaded"}}),
+            SimpleNamespace(text="recovered", usage_metadata=None),
+        ]
+    )
+    mock_get_clients.return_value.gemini.aio.models.generate_content = sdk_call
+
+    assert await generate_content("retry prompt") == "recovered"
+    assert sdk_call.await_count == 2
@@ -0,0 +1,137 @@
+"""Tests for backend/app/core/single_flight.py and the services that use it."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.core import single_flight
+from app.core.single_flight import SingleFlight
+
+
+# ── Async callers ────────────────────────────────────────────
+async def test_identical_calls_share_one_upstream_call():
+    flights = SingleFlight("test")
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return {"risks": []}
+
+    results = await asyncio.gather(*(flights.do("same", upstream) for _ in range(5)))
+
+    assert len(calls) == 1
+    assert all(r == {"risks": []} for r in results)
+    # Followers get their own copy
+    assert len({id(r) for r in results}) == 5
+    assert flights.coalesced == 4
+
+
+async def test_errors_are_shared_and_nothing_is_remembered():
+    flights = SingleFlight("test")
+    upstream = AsyncMock(side_effect=RuntimeError("429"))
+
+    async def slow_failure():
+        await asyncio.sleep(0.02)
+        return await upstream()
+
+    outcomes = await asyncio.gather(*(flights.do("k", slow_failure) for _ in range(3)), return_exceptions=True)
+
+    assert all(isinstance(o, RuntimeError) for o in outcomes)
+    assert upstream.await_count == 1
+
+    # A later call with the same key goes upstream again
+    with pytest.raises(RuntimeError):
+        await flights.do("k", slow_failure)
+    assert upstream.await_count == 2
+
+
+async def test_different_keys_and_disabled_setting_are_not_coalesced(monkeypatch):
+    flights = SingleFlight("test")
+    calls = []
+
+    async def upstream():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return 1
+
+    await asyncio.gather(flights.do("a", upstream), flights.do("b", upstream))
+    monkeypatch.setattr(single_flight.settings, "SINGLE_FLIGHT_ENABLED", False)
+    await asyncio.gather(flights.do("c", upstream), flights.do("c", upstream))
+
+    assert len(calls) == 4
+
+
+async def test_shared_call_is_cancelled_only_when_the_last_waiter_leaves():
+    flights = SingleFlight("test")
+    started, cancelled = asyncio.Event(), asyncio.Event()
+
+    async def upstream():
+        started.set()
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    first = asyncio.create_task(flights.do("k", upstream))
+    second = asyncio.create_task(flights.do("k", upstream))
+    await started.wait()
+
+    first.cancel()
+    await asyncio.sleep(0.01)
+    assert not cancelled.is_set()  # the second caller still waits for it
+
+    second.cancel()
+    await asyncio.wait_for(cancelled.wait(), timeout=1)
+    await asyncio.gather(first, second, return_exceptions=True)
+    assert flights._async_calls[asyncio.get_running_loop()] == {}
+
+    # The next caller starts a fresh call rather than joining the cancelled one
+    async def fresh():
+        return "ok"
+
+    assert await flights.do("k", fresh) == "ok"
+
+
+# ── Services ─────────────────────────────────────────────────
+async def test_concurrent_get_embedding_calls_are_coalesced():
+    from app.services import ai_engine
+    from app.services.ai_engine import AzureAIEngine
+
+    ai_engine._embedding_cache.clear()
+
+    async def create(model, input):
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[0.5])], usage=None)
+
+    engine = AzureAIEngine()
+    engine._client.embeddings.create = AsyncMock(side_effect=create)
+
+    vectors = await asyncio.gather(*(engine.get_embedding("burst text") for _ in range(4)))
+
+    assert vectors == [[0.5]] * 4
+    engine._client.embeddings.create.assert_awaited_once()
+    ai_engine._embedding_cache.clear()
+
+
+@patch("app.services.azure_openai_service.get_clients")
+async def test_concurrent_chat_completions_are_coalesced(mock_get_clients):
+    from app.core.circuit_breaker import reset_breakers
+    from app.services.azure_openai_service import chat_completion
+
+    reset_breakers()
+
+    async def create(**kwargs):
+        await asyncio.sleep(0.1)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="hi"))], usage=None)
+
+    sdk_call = AsyncMock(side_effect=create)
+    mock_get_clients.return_value.async_azure.chat.completions.create = sdk_call
+
+    replies = await asyncio.gather(*(chat_completion("dashboard prompt") for _ in range(3)))
+
+    assert replies == ["hi"] * 3
+    assert sdk_call.await_count == 1
@@ -0,0 +1,180 @@
+"""Tests for streamed /generate responses and backend/app/services/streaming.py"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.main import app
+from app.services.streaming import prime, sse_event
+
+client = TestClient(app)
+
+
+async def _agen(*chunks, fail_after: Exception | None = None):
+    for chunk in chunks:
+        yield chunk
+    if fail_after is not None:
+        raise fail_after
+
+
+def _primed(*chunks, fail_after: Exception | None = None):
+    """Side effect for a patched ``stream_*`` provider function."""
+
+    async def _open(*args, **kwargs):
+        return await prime(_agen(*chunks, fail_after=fail_after))
+
+    return _open
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    """Parse an SSE body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = "message", None
+        for line in block.splitlines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((event, data))
+    return events
+
+
+# ── Helpers ──────────────────────────────────────────────────
+async def test_prime_waits_for_first_chunk_and_replays_it():
+    stream = await prime(_agen("", "Hel", "lo"))
+    assert [chunk async for chunk in stream] == ["Hel", "lo"]
+
+    with pytest.raises(RuntimeError):
+        await prime(_agen(fail_after=RuntimeError("503 before first token")))
+
+
+def test_sse_event_framing():
+    assert sse_event({"delta": "hi"}) == 'data: {"delta": "hi"}\n\n'
+    assert sse_event({"latency_ms": 1.0}, event="done") == 'event: done\ndata: {"latency_ms": 1.0}\n\n'
+
+
+# ── Unified /generate ────────────────────────────────────────
+@patch("app.services.gemini_service.stream_content")
+def test_generate_streams_gemini_tokens(mock_stream):
+    mock_stream.side_effect = _primed("Hello", ", ", "world")
+
+    response = client.post("/api/v1/generate", json={"prompt": "Hi", "stream": True})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = _events(response.text)
+    assert events[0][0] == "meta" and events[0][1]["source"] == "gemini"
+    assert events[0][1]["fallback_used"] is False
+    assert "".join(data["delta"] for event, data in events if event == "message") == "Hello, world"
+    assert events[-1][0] == "done"
+
+
+@patch("app.services.azure_openai_service.stream_chat_completion")
+@patch("app.services.gemini_service.stream_content", side_effect=Exception("429 RESOURCE_EXHAUSTED"))
+def test_generate_stream_falls_back_before_first_token(mock_gemini, mock_azure):
+    mock_azure.side_effect = _primed("azure ", "reply")
+
+    response = client.post("/api/v1/generate", json={"prompt": "Hi", "stream": True})
+
+    meta = _events(response.text)[0][1]
+    assert meta["source"] == "azure-openai"
+    assert meta["fallback_used"] is True
+    assert "RESOURCE_EXHAUSTED" in meta["fallback_reason"]
+
+
+@patch("app.services.azure_openai_service.stream_chat_completion", side_effect=Exception("Azure down"))
+@patch("app.services.gemini_service.stream_content", side_effect=Exception("Gemini down"))
+def test_generate_stream_both_fail(mock_gemini, mock_azure):
+    response = client.post("/api/v1/generate", json={"prompt": "Hi", "stream": True})
+
+    assert response.status_code == 502
+    assert "Both providers failed" in response.json()["detail"]
+
+
+@patch("app.services.gemini_service.stream_content")
+def test_mid_stream_failure_is_reported_as_event(mock_stream):
+    mock_stream.side_effect = _primed("partial", fail_after=RuntimeError("connection reset"))
+
+    events = _events(client.post("/api/v1/generate/gemini", json={"prompt": "Hi", "stream": True}).text)
+
+    assert events[1] == ("message", {"delta": "partial"})
+    assert events[-1] == ("error", {"detail": "connection reset"})
+
+
+# ── Provider streams ─────────────────────────────────────────
+@patch("app.services.azure_openai_service.get_clients")
+def test_direct_azure_endpoint_streams_sdk_deltas(mock_get_clients):
+    from app.core.circuit_breaker import reset_breakers
+
+    reset_breakers()
+
+    def delta(content):
+        return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=content))])
+
+    create = AsyncMock(return_value=_agen(delta(None), delta("to"), delta("kens"), SimpleNamespace(choices=[])))
+    mock_get_clients.return_value.async_azure.chat.completions.create = create
+
+    response = client.post("/api/v1/generate/azure-openai", json={"prompt": "Hi", "stream": True})
+
+    deltas = [data["delta"] for event, data in _events(response.text) if event == "message"]
+    assert deltas == ["to", "kens"]
+    assert create.await_args.kwargs["stream"] is True
+
+
+@patch("app.services.gemini_service.get_clients")
+async def test_gemini_stream_retries_until_first_token(mock_get_clients, monkeypatch):
+    from google.genai import errors as genai_errors
+
+    from app.core import retry
+    from app.core.circuit_breaker import reset_breakers
+    from app.services.gemini_service import stream_content
+
+    reset_breakers()
+    monkeypatch.setattr(retry.settings, "RETRY_BASE_DELAY_SECONDS", 0.0)
+    chunk = SimpleNamespace(text="streamed", usage_metadata=None)
+    mock_get_clients.return_value.gemini.aio.models.generate_content_stream = AsyncMock(
+        side_effect=[
+            _agen(fail_after=genai_errors.APIError(503, {"error": {"message": "overloaded"}})),
+            _agen(chunk),
+        ]
+    )
+
+    stream = await stream_content("Hi")
+
+    assert [text async for text in stream] == ["streamed"]
+    assert mock_get_clients.return_value.gemini.aio.models.generate_content_stream.await_count == 2
+
+
+@pytest.mark.parametrize("provider", ["gemini", "azure"])
+async def test_stream_settles_reservation_on_early_close(provider):
+    from app.core.circuit_breaker import reset_breakers
+    from app.services import azure_openai_service, gemini_service
+
+    reset_breakers()
+    settled: list[int | None] = []
+    limiter = SimpleNamespace(acquire=AsyncMock(), settle=lambda reserved, actual: settled.append(actual))
+    if provider == "gemini":
+        module, open_stream = gemini_service, gemini_service.stream_content
+        chunks = [SimpleNamespace(text=text, usage_metadata=None) for text in ("a", "b")]
+        path = "gemini.aio.models.generate_content_stream"
+    else:
+        module, open_stream = azure_openai_service, azure_openai_service.stream_chat_completion
+        chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))]) for text in "ab"]
+        path = "async_azure.chat.completions.create"
+
+    with patch.object(module, "get_limiter", return_value=limiter), patch.object(module, "get_clients") as clients:
+        target = clients.return_value
+        *parents, attr = path.split(".")
+        for name in parents:
+            target = getattr(target, name)
+        setattr(target, attr, AsyncMock(return_value=_agen(*chunks)))
+
+        stream = await open_stream("Hi")
+        assert await stream.__anext__() == "a"
+        await stream.aclose()
+
+    assert settled == [None]
@@ -0,0 +1,110 @@
+"""Tests for backend/app/core/stub_provider.py – the offline provider backend."""
+
+import json
+import math
+
+import openai
+import pytest
+from google.genai import errors as genai_errors
+
+from app.core import clients, stub_provider
+from app.core.circuit_breaker import reset_breakers
+from app.core.stub_provider import StubProviderClients, stub_answer, stub_embedding
+
+
+@pytest.fixture
+def stub_backend(monkeypatch):
+    """Route every service through the stub registry with no latency."""
+    monkeypatch.setattr(clients.settings, "LLM_PROVIDER_BACKEND", "stub")
+    monkeypatch.setattr(stub_provider.settings, "STUB_LATENCY_SECONDS", 0.0)
+    monkeypatch.setattr(stub_provider.settings, "STUB_EMBEDDING_LATENCY_SECONDS", 0.0)
+    monkeypatch.setattr(stub_provider.settings, "STUB_STREAM_CHUNK_SECONDS", 0.0)
+    monkeypatch.setattr(clients, "_clients", None)
+    reset_breakers()
+    yield
+    monkeypatch.setattr(clients, "_clients", None)
+
+
+def _cosine(a, b):
+    return sum(x * y for x, y in zip(a, b))
+
+
+# ── Deterministic content ────────────────────────────────────
+def test_embeddings_are_deterministic_normalised_and_similarity_preserving():
+    a = stub_embedding("biometric data retention policy")
+    b = stub_embedding("biometric data retention policy")
+    near = stub_embedding("retention policy for biometric data")
+    far = stub_embedding("quarterly marketing newsletter")
+
+    assert a == b
+    assert len(a) == 1536
+    assert math.isclose(sum(v * v for v in a), 1.0)
+    assert _cosine(a, near) > _cosine(a, far)
+
+
+def test_answers_follow_the_requested_schema():
+    from app.services.ai_engine import _RISK_SYSTEM_PROMPT
+    from app.services.pdf_parser import EXTRACTION_PROMPT
+
+    risks = json.loads(stub_answer(_RISK_SYSTEM_PROMPT + "\n## Project context\n{}"))
+    assert risks["risks"]
+    assert all(set(r) == {"category", "severity", "reason"} for r in risks["risks"])
+
+    document = "Face matching for card payments. Hosted on AWS with human review of alerts."
+    extraction = json.loads(stub_answer(f"{EXTRACTION_PROMPT}\n\n--- DOCUMENT TEXT ---\n{document}"))
+    assert extraction["project_purpose"] == "Face matching for card payments."
+    assert set(extraction["data_types_used"]) == {"biometric_data", "financial_data"}
+    assert extraction["human_in_the_loop"] is True
+    assert extraction["deployment_target"] == "public_cloud"
+
+    assert stub_answer("Hi") == stub_answer("Hi")
+    assert stub_answer("Hi").startswith("Stub reply:")
+
+
+# ── Failures ─────────────────────────────────────────────────
+async def test_configured_failures_raise_real_sdk_errors(monkeypatch):
+    monkeypatch.setattr(stub_provider.settings, "STUB_LATENCY_SECONDS", 0.0)
+    monkeypatch.setattr(stub_provider.settings, "STUB_RATE_LIMIT_RATE", 1.0)
+    registry = StubProviderClients()
+
+    with pytest.raises(openai.RateLimitError) as excinfo:
+        await registry.async_azure.chat.completions.create(model="m", messages=[{"role": "user", "content": "x"}])
+    assert excinfo.value.response.headers["retry-after"] == "1"
+
+    monkeypatch.setattr(stub_provider.settings, "STUB_RATE_LIMIT_RATE", 0.0)
+    monkeypatch.setattr(stub_provider.settings, "STUB_ERROR_RATE", 1.0)
+    with pytest.raises(genai_errors.ServerError):
+        await registry.gemini.aio.models.generate_content(model="g", contents="x")
+
+
+# ── Services on the stub backend ─────────────────────────────
+async def test_services_run_unchanged_on_the_stub_backend(stub_backend):
+    from app.services import ai_engine
+    from app.services.ai_engine import AzureAIEngine
+    from app.services.azure_openai_service import chat_completion, stream_chat_completion
+    from app.services.gemini_service import generate_content
+    from app.services.pdf_parser import _extract_via_gemini_async
+
+    assert isinstance(clients.get_clients(), StubProviderClients)
+
+    ai_engine._embedding_cache.clear()
+    engine = AzureAIEngine()
+    vectors = await engine.get_embeddings(["policy one", "policy two"])
+    assert vectors[0] == stub_embedding("policy one")
+    assert "risks" in await engine.analyze_risk({"github_url": "https://example.test"}, ["Policy A"])
+    ai_engine._embedding_cache.clear()
+
+    assert (await generate_content("Hi")).startswith("Stub reply:")
+    assert await chat_completion("Hi") == "".join([chunk async for chunk in await stream_chat_completion("Hi")])
+
+    extraction = await _extract_via_gemini_async("A patient triage assistant deployed on-premise.")
+    assert extraction["data_types_used"] == ["health_records"]
+    assert extraction["deployment_target"] == "on_premise"
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    monkeypatch.setattr(clients.settings, "LLM_PROVIDER_BACKEND", "mock")
+    monkeypatch.setattr(clients, "_clients", None)
+
+    with pytest.raises(ValueError, match="LLM_PROVIDER_BACKEND"):
+        clients.get_clients()
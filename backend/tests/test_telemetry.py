@@ -0,0 +1,117 @@
+"""Tests for backend/app/core/telemetry.py and GET /health/telemetry."""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import openai
+import pytest
+from fastapi.testclient import TestClient
+
+from app.core import retry, telemetry
+from app.core.telemetry import (
+    estimate_cost,
+    job_snapshot,
+    job_telemetry,
+    telemetry_snapshot,
+    tracked_call_async,
+    usage_breakdown,
+)
+from app.main import app
+
+client = TestClient(app)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_telemetry(monkeypatch):
+    monkeypatch.setattr(retry.settings, "RETRY_BASE_DELAY_SECONDS", 0.0)
+    telemetry.reset_telemetry()
+    yield
+    telemetry.reset_telemetry()
+
+
+def _chat_response(prompt: int, completion: int, cached: int = 0):
+    usage = SimpleNamespace(
+        prompt_tokens=prompt,
+        completion_tokens=completion,
+        total_tokens=prompt + completion,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=cached),
+    )
+    return SimpleNamespace(usage=usage)
+
+
+def _server_error() -> openai.APIStatusError:
+    response = httpx.Response(503, request=httpx.Request("POST", "https://example.test"))
+    return openai.APIStatusError("unavailable", response=response, body=None)
+
+
+# ── Usage and cost ───────────────────────────────────────────
+def test_usage_breakdown_and_cost():
+    gemini = SimpleNamespace(
+        usage_metadata=SimpleNamespace(prompt_token_count=100, candidates_token_count=20, cached_content_token_count=40)
+    )
+
+    assert usage_breakdown(_chat_response(1_000, 200, cached=600)) == (1_000, 200, 600)
+    assert usage_breakdown(gemini) == (100, 20, 40)
+    assert usage_breakdown(SimpleNamespace()) == (0, 0, 0)
+
+    # gpt-4o: 400 × 2.50 + 600 × 1.25 + 200 × 10.00 per million
+    assert estimate_cost("gpt-4o", 1_000, 200, 600) == pytest.approx(3_750 / 1_000_000)
+    assert estimate_cost("unpriced-model", 1_000, 200, 0) is None
+
+
+# ── Aggregation ──────────────────────────────────────────────
+async def test_calls_are_aggregated_per_model_and_per_job():
+    attempt = AsyncMock(side_effect=[_server_error(), _chat_response(1_000, 100)])
+
+    with job_telemetry("job-1") as job:
+        await tracked_call_async("gpt-4o", attempt)
+        with pytest.raises(openai.APIStatusError):
+            await tracked_call_async("gpt-4o-mini-2024-07-18", AsyncMock(side_effect=_server_error()))
+        telemetry.record_fallback("gpt-4o-mini-2024-07-18", TimeoutError())
+
+    # Outside the job, calls only reach the process-wide aggregates
+    await tracked_call_async("gpt-4o", AsyncMock(return_value=_chat_response(10, 10)))
+
+    job_models = job.snapshot()["models"]
+    assert job_models["gpt-4o"]["calls"] == 1
+    assert job_models["gpt-4o"]["retries"] == 1
+    assert job_models["gpt-4o"]["prompt_tokens"] == 1_000
+    assert job_models["gpt-4o"]["cost_usd"] == pytest.approx((1_000 * 2.5 + 100 * 10) / 1_000_000)
+    assert job_models["gpt-4o-mini-2024-07-18"]["errors"] == 1
+    assert job_models["gpt-4o-mini-2024-07-18"]["fallback_reasons"] == {"TimeoutError": 1}
+
+    assert telemetry_snapshot()["models"]["gpt-4o"]["calls"] == 2
+    assert job_snapshot("job-1")["totals"]["calls"] == 2
+
+
+async def test_pdf_fallback_is_recorded_with_error_type():
+    from app.services.pdf_parser import AZURE_DEPLOYMENT, _analyse_text_async
+
+    parsed = {"project_purpose": "x", "data_types_used": [], "potential_risks": []}
+    with (
+        patch("app.services.pdf_parser._extract_via_azure_async", new=AsyncMock(side_effect=_server_error())),
+        patch("app.services.pdf_parser._extract_via_gemini_async", new=AsyncMock(return_value=parsed)),
+        job_telemetry("pdf-job") as job,
+    ):
+        result = await _analyse_text_async("document text")
+
+    assert result["fallback_used"] is True
+    assert job.snapshot()["models"][AZURE_DEPLOYMENT]["fallback_reasons"] == {"APIStatusError": 1}
+
+
+# ── Endpoint ─────────────────────────────────────────────────
+@patch("app.services.gemini_service.generate_content", side_effect=RuntimeError("Gemini down"))
+@patch("app.services.azure_openai_service.chat_completion", return_value="azure reply")
+def test_telemetry_endpoint_reports_models_jobs_and_fallbacks(mock_azure, mock_gemini):
+    with job_telemetry("job-42"):
+        telemetry._global.record_call("gpt-4o", 0.5, usage=(100, 10, 0))
+
+    client.post("/api/v1/generate", json={"prompt": "Hi"})
+    data = client.get("/health/telemetry").json()
+
+    assert data["models"]["gpt-4o"]["latency_ms_avg"] == 500.0
+    assert data["models"]["gemini-3-flash-preview"]["fallback_reasons"] == {"RuntimeError": 1}
+    assert "job-42" in data["recent_jobs"]
+    assert client.get("/health/telemetry/job-42").status_code == 200
+    assert client.get("/health/telemetry/unknown").status_code == 404
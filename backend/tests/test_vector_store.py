@@ -96,3 +96,42 @@ def test_multiple_policies_all_returned(store: PolicyVectorStore):
     assert len(hits) == 2
     returned_ids = {h["id"] for h in hits}
     assert returned_ids == {"a", "b"}
+
+
+def test_search_many_returns_each_query_in_order(store: PolicyVectorStore):
+    """search_many answers several queries in one call, matching per-query search."""
+    store.add_policy(id="a", text="Policy A", embedding=[1.0, 0.0])
+    store.add_policy(id="b", text="Policy B", embedding=[0.0, 1.0])
+    queries = [[0.1, 0.9], [0.9, 0.1], [0.5, 0.6]]
+
+    batches = store.search_many(queries, top_k=1)
+
+    assert [hits[0]["id"] for hits in batches] == ["b", "a", "b"]
+    assert batches == [store.search(query_embedding=q, top_k=1) for q in queries]
+    assert store.search_many([], top_k=1) == []
+
+
+# ── Shared warm store ────────────────────────────────────────
+
+def test_shared_store_is_opened_once_and_reported_ready(tmp_path, monkeypatch):
+    """open_policy_store warms one store that every job then reuses."""
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+    from app.services import vector_store
+
+    monkeypatch.setattr(vector_store.settings, "CHROMA_PERSIST_DIRECTORY", str(tmp_path / "chroma_shared"))
+    vector_store.close_policy_store()
+    client = TestClient(app)
+    assert client.get("/health/ready").status_code == 503
+
+    vector_store.get_policy_store().add_policy(id="pol-1", text="Explainability.", embedding=FAKE_EMBEDDING)
+    opened = vector_store.open_policy_store()
+
+    assert vector_store.get_policy_store() is opened
+    response = client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["policy_store"]["policies"] == 1
+
+    vector_store.close_policy_store()
+    assert vector_store.policy_store_status()["ready"] is False